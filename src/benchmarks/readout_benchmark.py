@@ -0,0 +1,95 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+"""
+Per-line overhead of the buffer result path for one line of a buffered 2D sweep.
+
+Compares the list based path (flatten_array, list comprehensions for static gettables)
+with the numpy path (ravel_array, np.full) and measures datasaver.add_result for both.
+Run with ``python readout_benchmark.py [num_points]``.
+"""
+
+import os
+import sys
+import tempfile
+from timeit import repeat
+
+import numpy as np
+from qcodes.dataset import (
+    Measurement,
+    initialise_or_create_database_at,
+    load_or_create_experiment,
+)
+from qcodes.parameters import Parameter
+
+from qumada.utils.utils import flatten_array, ravel_array
+
+
+def _best_of(func, number=5) -> float:
+    """Best time of one call in ms."""
+    return min(repeat(func, number=1, repeat=number)) * 1e3
+
+
+def main(num_points: int = 100_000) -> None:
+    initialise_or_create_database_at(os.path.join(tempfile.mkdtemp(), "readout_benchmark.db"))
+    load_or_create_experiment("readout_benchmark", sample_name="none")
+
+    slow = Parameter("slow", set_cmd=None)
+    fast = Parameter("fast", set_cmd=None)
+    measured = [Parameter(f"buffered_{i}", get_cmd=None) for i in range(2)]
+    static = Parameter("static", get_cmd=None)
+    meas = Measurement()
+    meas.register_parameter(slow)
+    meas.register_parameter(fast)
+    for param in (*measured, static):
+        meas.register_parameter(param, setpoints=(slow, fast))
+
+    fast_setpoints = np.linspace(0, 1, num_points)
+    # Raw buffer data as returned by array (e.g. MFLI) and list based (e.g. Dummy DMM) buffers
+    raw_data = {
+        "array": [np.random.sample((1, num_points)) for _ in measured],
+        "list": [list(np.random.sample(num_points)) for _ in measured],
+    }
+
+    def list_path(raw):
+        results = [(param, flatten_array(data)) for param, data in zip(measured, raw)]
+        return results, [(static, [0.1 for _ in range(num_points)])]
+
+    def numpy_path(raw):
+        results = [(param, ravel_array(data)) for param, data in zip(measured, raw)]
+        return results, [(static, np.full(num_points, 0.1))]
+
+    print(f"Per-line overhead for {num_points} points and {len(measured)} buffered parameters:")
+    with meas.run() as datasaver:
+        for raw_type, raw in raw_data.items():
+            for name, path in (("list", list_path), ("numpy", numpy_path)):
+                results, static_gettables = path(raw)
+                t_convert = _best_of(lambda: path(raw))
+                t_store = _best_of(
+                    lambda: datasaver.add_result((slow, 0.0), (fast, fast_setpoints), *results, *static_gettables),
+                    number=3,
+                )
+                print(
+                    f"  {raw_type:>5} buffer data, {name:>5} path: "
+                    f"conversion {t_convert:8.2f} ms, add_result {t_store:8.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
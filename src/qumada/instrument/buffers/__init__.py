@@ -20,6 +20,7 @@
 from qumada.instrument.buffers.buffer import (
     Buffer,
     BufferException,
+    RunningAverage,
     is_bufferable,
     is_triggerable,
     map_buffers,
@@ -31,6 +32,7 @@ from qumada.instrument.buffers.sr830_buffer import SR830Buffer
 __all__ = [
     "Buffer",
     "BufferException",
+    "RunningAverage",
     "map_buffers",
     "is_bufferable",
     "is_triggerable",
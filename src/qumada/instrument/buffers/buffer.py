@@ -21,9 +21,11 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from collections.abc import Mapping
+from collections.abc import Callable, Mapping
+from time import monotonic, sleep
 from typing import Any
 
+import numpy as np
 from qcodes.instrument import Instrument
 from qcodes.metadatable import Metadatable
 from qcodes.parameters import Parameter
@@ -52,6 +54,40 @@ class BufferException(Exception):
     """General Buffer Exception"""
 
 
+class RunningAverage:
+    """
+    Running mean and variance of repeated bursts (Welford's algorithm).
+
+    Only the mean and the summed squared deviations of each entry are kept,
+    so the memory does not grow with the number of bursts.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean: dict = {}
+        self._squared_deviations: dict = {}
+
+    def add(self, data: Mapping[Any, Any]) -> None:
+        """Adds one burst, data maps e.g. parameter names to arrays of the same shape in each burst."""
+        self.count += 1
+        for key, values in data.items():
+            values = np.asarray(values, dtype=float)
+            if key not in self.mean:
+                self.mean[key] = values.copy()
+                self._squared_deviations[key] = np.zeros_like(self.mean[key])
+                continue
+            delta = values - self.mean[key]
+            self.mean[key] += delta / self.count
+            self._squared_deviations[key] += delta * (values - self.mean[key])
+
+    @property
+    def variance(self) -> dict:
+        """Sample variance of each entry, NaN if less than two bursts were added."""
+        if self.count < 2:
+            return {key: np.full_like(value, np.nan) for key, value in self.mean.items()}
+        return {key: value / (self.count - 1) for key, value in self._squared_deviations.items()}
+
+
 def map_buffers(
     components: Mapping[Any, Metadatable],
     properties: dict,
@@ -178,6 +214,7 @@ class Buffer(ABC):
         "burst_duration",
         "grid_interpolation",
         "num_bursts",
+        "repetitions",
     }
 
     TRIGGER_MODE_NAMES: list[str] = [
@@ -203,6 +240,13 @@ class Buffer(ABC):
 
     AVAILABLE_TRIGGERS: list[str] = []
 
+    # True, if the instrument averages the repetitions of a burst itself (setting "repetitions").
+    # Otherwise the bursts are read one by one and averaged with a RunningAverage.
+    HARDWARE_AVERAGING: bool = False
+
+    # True, if the buffer implements read_available to read data while the acquisition continues.
+    SUPPORTS_STREAMING: bool = False
+
     settings_schema = {
         "type": "object",
         "properties": {
@@ -220,6 +264,7 @@ class Buffer(ABC):
             "duration": {"type": "number"},
             "burst_duration": {"type": "number"},
             "num_bursts": {"type": "integer"},
+            "repetitions": {"type": "integer", "minimum": 1},
         },
         "oneOf": [
             {
@@ -267,6 +312,11 @@ class Buffer(ABC):
     @abstractmethod
     def num_points(self) -> None: ...
 
+    @property
+    def repetitions(self) -> int:
+        """Number of repetitions of each burst, that are averaged."""
+        return int(getattr(self, "settings", {}).get("repetitions", 1))
+
     @abstractmethod
     def force_trigger(self) -> None:
         """Triggers the trigger."""
@@ -289,6 +339,16 @@ class Buffer(ABC):
 
         """
 
+    def read_available(self) -> dict:
+        """
+        Read the data acquired since the last call without stopping the acquisition.
+        Required for streaming measurements, that store the data while the buffer is running.
+
+        Output has the same structure as read(). Only implemented for buffers
+        with SUPPORTS_STREAMING.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming.")
+
     @abstractmethod
     def read_raw(self) -> Any:
         """Read the buffer and return raw output."""
@@ -321,6 +381,73 @@ class Buffer(ABC):
     def is_finished(self) -> bool:
         """True, if measurement is done and data has finished reading from the buffer."""
 
+    def wait_finished(
+        self,
+        timeout: float | None = None,
+        min_interval: float = 1e-3,
+        max_interval: float = 0.1,
+    ) -> bool:
+        """
+        Blocks until the measurement is done.
+
+        The default implementation polls is_finished() with an adaptive backoff: the
+        interval starts at min_interval and grows up to max_interval, so short bursts
+        are detected quickly without flooding the instrument with requests during
+        long ones. Buffers that can be notified on completion should override this.
+
+        Args:
+            timeout (float | None): Maximum time to wait in s. Waits forever if None.
+            min_interval (float): Initial polling interval in s. Default 1 ms.
+            max_interval (float): Maximum polling interval in s. Default 0.1 s.
+
+        Returns:
+            bool: True if the buffer is finished, False if the timeout was reached.
+        """
+        return self._poll(self.is_finished, timeout, min_interval, max_interval)
+
+    def num_acquired_repetitions(self) -> int | None:
+        """
+        Number of repetitions of the burst (setting "repetitions") acquired so far, None
+        if the instrument cannot tell. Buffers with HARDWARE_AVERAGING should implement
+        this, as they are only finished after the last repetition.
+        """
+        return None
+
+    def wait_repetitions(
+        self,
+        repetitions: int,
+        timeout: float | None = None,
+        min_interval: float = 1e-3,
+        max_interval: float = 0.1,
+    ) -> bool:
+        """
+        Blocks until the given number of repetitions of the burst was acquired or the
+        buffer is finished. Polls num_acquired_repetitions() as wait_finished() polls
+        is_finished(), see there for the arguments.
+
+        Returns:
+            bool: True if the repetitions were acquired, False if the timeout was reached.
+        """
+
+        def acquired() -> bool:
+            return self.is_finished() or (self.num_acquired_repetitions() or 0) >= repetitions
+
+        return self._poll(acquired, timeout, min_interval, max_interval)
+
+    @staticmethod
+    def _poll(condition: Callable[[], bool], timeout: float | None, min_interval: float, max_interval: float) -> bool:
+        deadline = None if timeout is None else monotonic() + timeout
+        interval = min_interval
+        while not condition():
+            if deadline is not None:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    return False
+                interval = min(interval, remaining)
+            sleep(interval)
+            interval = min(interval * 2, max_interval)
+        return True
+
 
 # class SoftwareTrigger(Parameter):
 #     def __init__(self, **kwargs):
@@ -39,11 +39,15 @@ class DummyDMMBuffer(Buffer):
 
     AVAILABLE_TRIGGERS: list[str] = ["software"]
 
+    SUPPORTS_STREAMING: bool = True
+
     def __init__(self, device: DummyDmm):
         self._device = device
         self._trigger: str | None = None
         self._subscribed_parameters: set[Parameter] = set()
         self._num_points: int | None = None
+        self._num_bursts: int = 1
+        self._num_streamed_points: int = 0
 
     def setup_buffer(self, settings: dict) -> None:
         """Sets instrument related settings for the buffer."""
@@ -60,8 +64,11 @@ class DummyDMMBuffer(Buffer):
             raise BufferException("The Dummy Dac does not support negative delays.")
         else:
             self.delay_data_points = int(self.delay * self._device.buffer_SR())
+            burst_points = self.num_points
             self.num_points = self.delay_data_points + self.num_points
-            self._device.buffer_n_points(self.num_points)
+            # Bursts follow each other without gaps, only the burst size is limited by the capacity
+            self._device.buffer_n_points(self.num_points + (self._num_bursts - 1) * burst_points)
+        self._num_streamed_points = 0
         self._device.buffer.ready_buffer()
 
     @property
@@ -70,10 +77,11 @@ class DummyDMMBuffer(Buffer):
 
     @num_points.setter
     def num_points(self, num_points) -> None:
-        if num_points > 16383:
+        if num_points > self._device.buffer_capacity():
             raise BufferException(
                 "Dummy Dacs Buffer is to small for this measurement. "
-                "Please reduce the number of data points or the delay"
+                "Please reduce the number of data points or the delay "
+                "or increase the buffer_capacity of the instrument."
             )
         self._num_points = int(num_points)
 
@@ -93,10 +101,22 @@ class DummyDMMBuffer(Buffer):
         """
         if all(k in self.settings for k in ("sampling_rate", "burst_duration", "num_points")):
             raise BufferException("You cannot define sampling_rate, burst_duration and num_points at the same time")
-        elif self.settings.get("num_points", False):
+        if all(k in self.settings for k in ("num_bursts", "duration", "burst_duration")):
+            raise BufferException("You cannnot define duration, burst_duration and num_bursts at the same time")
+        burst_duration = self.settings.get("burst_duration")
+        self._num_bursts = 1
+        if "duration" in self.settings:
+            if burst_duration is not None:
+                self._num_bursts = int(np.ceil(self.settings["duration"] / burst_duration))
+            elif "num_bursts" in self.settings:
+                self._num_bursts = int(self.settings["num_bursts"])
+                burst_duration = self.settings["duration"] / self._num_bursts
+            else:
+                burst_duration = self.settings["duration"]
+        if self.settings.get("num_points", False):
             self.num_points = self.settings["num_points"]
-        elif all(k in self.settings for k in ("sampling_rate", "burst_duration")):
-            self.num_points = int(np.ceil(self.settings["sampling_rate"] * self.settings["burst_duration"]))
+        elif burst_duration is not None:
+            self.num_points = int(np.ceil(self.settings["sampling_rate"] * burst_duration))
 
     @property
     def trigger(self) -> str | None:
@@ -112,14 +132,23 @@ class DummyDMMBuffer(Buffer):
 
     def read_raw(self) -> dict:
         data = {}
-
+        buffer_data = self._device.buffer.get()
         for parameter in self._subscribed_parameters:
             index = self._device.buffer.subscribed_params.index(parameter)
-            data[parameter.name] = self._device.buffer.get()[index]
-            data[parameter.name] = data[parameter.name][self.delay_data_points : self.num_points]
-        data["timestamps"] = np.linspace(0, self.num_points / self._device.buffer_SR(), self.num_points)
+            data[parameter.name] = buffer_data[index][self.delay_data_points :]
+        num_points = len(buffer_data[0]) - self.delay_data_points if buffer_data else 0
+        data["timestamps"] = np.arange(max(num_points, 0)) / self._device.buffer_SR()
         return data
 
+    def read_available(self) -> dict:
+        data = self._device.buffer.read()
+        # Drop the points acquired during the delay
+        skip = min(max(self.delay_data_points - self._num_streamed_points, 0), len(data["timestamps"]))
+        self._num_streamed_points += len(data["timestamps"])
+        result = {parameter.name: data[parameter.name][skip:] for parameter in self._subscribed_parameters}
+        result["timestamps"] = data["timestamps"][skip:] - self.delay_data_points / self._device.buffer_SR()
+        return result
+
     def read(self) -> dict:
         # TODO: Add timetrace if possible
         return self.read_raw()
@@ -143,9 +172,13 @@ class DummyDMMBuffer(Buffer):
     def start(self) -> None:
         self._device.start()
 
-    def stop(self) -> None: ...
+    def stop(self) -> None:
+        self._device.stop()
 
     def is_ready(self) -> bool: ...
 
     def is_finished(self) -> bool:
         return self._device.is_finished()
+
+    def wait_finished(self, timeout: float | None = None, **kwargs) -> bool:
+        return self._device.buffer.finished_event.wait(timeout)
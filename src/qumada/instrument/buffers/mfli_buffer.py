@@ -35,6 +35,10 @@ logger = logging.getLogger(__name__)
 class MFLIBuffer(Buffer):
     """Buffer for ZurichInstruments MFLI"""
 
+    SUPPORTS_STREAMING: bool = True
+
+    HARDWARE_AVERAGING: bool = True
+
     AVAILABLE_TRIGGERS: list[str] = [
         "trigger_in_1",
         "trigger_in_2",
@@ -157,8 +161,6 @@ class MFLIBuffer(Buffer):
         -------
         None
         """
-        # TODO: Include ._daq.repetitions (averages over multiple bursts)
-
         if all(k in self.settings for k in ("sampling_rate", "burst_duration", "num_points")):
             raise BufferException("You cannot define sampling_rate, burst_duration and num_points at the same time")
 
@@ -201,6 +203,8 @@ class MFLIBuffer(Buffer):
         self._daq.count(self._num_bursts)
         self._daq.duration(self._burst_duration)
         self._daq.grid.cols(self.num_points)
+        # Each burst is averaged over this number of triggers by the DAQ module
+        self._daq.grid.repetitions(self.repetitions)
 
     def read(self) -> dict:
         data = self.read_raw()
@@ -213,6 +217,18 @@ class MFLIBuffer(Buffer):
                 result_dict["timestamps"] = data[key][0].time
         return result_dict
 
+    def read_available(self) -> dict:
+        # The DAQ module returns the bursts completed since the last read
+        data = self.read_raw()
+        result_dict = {}
+        for parameter in self._subscribed_parameters:
+            node = self._get_node_from_parameter(parameter)
+            bursts = next((value for key, value in data.items() if str(key) == str(node)), [])
+            result_dict[parameter.name] = np.concatenate([np.ravel(burst.value) for burst in bursts] or [[]])
+            if "timestamps" not in result_dict:
+                result_dict["timestamps"] = np.concatenate([np.ravel(burst.time) for burst in bursts] or [[]])
+        return result_dict
+
     def read_raw(self) -> dict:
         return self._daq.read()
 
@@ -246,5 +262,11 @@ class MFLIBuffer(Buffer):
     def is_finished(self) -> bool:
         return self._daq.raw_module.finished()
 
+    def num_acquired_repetitions(self) -> int:
+        # The progress counts the triggers of all bursts and their repetitions
+        num_triggers = int(self._num_bursts) * self.repetitions
+        progress = float(np.ravel(self._daq.raw_module.progress())[0])
+        return int(np.floor(progress * num_triggers + 1e-9)) // int(self._num_bursts)
+
     def _get_node_from_parameter(self, parameter: Parameter):
         return self._device.demods[self._channel].sample.__getattr__(parameter.signal_name[1])
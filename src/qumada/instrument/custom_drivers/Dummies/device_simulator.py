@@ -0,0 +1,185 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+"""
+Simulation backend for the dummy instruments.
+
+A DeviceSimulator links the voltages of DummyDac channels to the readings of a
+DummyDmm parameter through a device model. Models get a dict of gate name ->
+voltage array and return the signal for all points at once, so whole buffer
+bursts are evaluated in one call.
+
+Example:
+    simulator = DeviceSimulator(
+        PinchOff({"P1": 1.0, "B1": 0.5}, threshold=0.8, width=0.05),
+        gates={"P1": dac.ch01, "B1": dac.ch02},
+        noise=1e-3,
+    )
+    dmm.simulate("voltage", simulator)
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping, Sequence
+from time import perf_counter
+
+import numpy as np
+from qcodes.parameters import Parameter
+
+
+class DeviceModel:
+    """
+    Base class for vectorized device models.
+
+    Args:
+        lever_arms (Mapping[str, float]): Lever arm of each gate. The model depends on the
+            effective voltage sum(lever_arm * voltage).
+        amplitude (float): Amplitude of the signal.
+        offset (float): Constant offset of the signal.
+    """
+
+    def __init__(self, lever_arms: Mapping[str, float], amplitude: float = 1.0, offset: float = 0.0):
+        self.lever_arms = dict(lever_arms)
+        self.amplitude = amplitude
+        self.offset = offset
+
+    def effective_voltage(self, voltages: Mapping[str, np.ndarray]) -> np.ndarray:
+        return sum(lever_arm * np.asarray(voltages[gate]) for gate, lever_arm in self.lever_arms.items())
+
+    def signal(self, effective_voltage: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def __call__(self, voltages: Mapping[str, np.ndarray]) -> np.ndarray:
+        return self.offset + self.amplitude * self.signal(self.effective_voltage(voltages))
+
+
+class PinchOff(DeviceModel):
+    """Pinch-off curve of a channel, opening at the threshold voltage."""
+
+    def __init__(self, lever_arms: Mapping[str, float], threshold: float, width: float, **kwargs):
+        super().__init__(lever_arms, **kwargs)
+        self.threshold = threshold
+        self.width = width
+
+    def signal(self, effective_voltage: np.ndarray) -> np.ndarray:
+        return 0.5 * (1 + np.tanh((effective_voltage - self.threshold) / (2 * self.width)))
+
+
+class CoulombPeaks(DeviceModel):
+    """Equidistant, thermally broadened Coulomb peaks of a single dot."""
+
+    def __init__(self, lever_arms: Mapping[str, float], spacing: float, width: float, position: float = 0.0, **kwargs):
+        super().__init__(lever_arms, **kwargs)
+        self.spacing = spacing
+        self.width = width
+        self.position = position
+
+    def signal(self, effective_voltage: np.ndarray) -> np.ndarray:
+        detuning = (effective_voltage - self.position) / self.spacing
+        detuning = (detuning - np.round(detuning)) * self.spacing
+        return np.cosh(detuning / self.width) ** -2
+
+
+class ChargeStability(DeviceModel):
+    """
+    Charge sensor next to several dots. The dot occupations are defined by the
+    capacitance (lever arm) matrix, every added charge shifts the sensor's Coulomb peaks.
+
+    Args:
+        sensor (CoulombPeaks): Model of the charge sensor.
+        lever_arms (Mapping[str, Sequence[float]]): Lever arms of each gate to each dot.
+        coupling (Sequence[float]): Shift of the sensor's effective voltage for each
+            charge on the corresponding dot.
+        offsets (Sequence[float] | None): Offset charge of each dot.
+    """
+
+    def __init__(
+        self,
+        sensor: CoulombPeaks,
+        lever_arms: Mapping[str, Sequence[float]],
+        coupling: Sequence[float],
+        offsets: Sequence[float] | None = None,
+    ):
+        super().__init__({}, amplitude=sensor.amplitude, offset=sensor.offset)
+        self.sensor = sensor
+        self.dot_lever_arms = {gate: np.asarray(arms, dtype=float) for gate, arms in lever_arms.items()}
+        self.coupling = np.asarray(coupling, dtype=float)
+        self.offsets = np.zeros_like(self.coupling) if offsets is None else np.asarray(offsets, dtype=float)
+
+    def occupations(self, voltages: Mapping[str, np.ndarray]) -> np.ndarray:
+        """Returns the number of charges on each dot, shape (num_dots, num_points)."""
+        potentials = sum(np.outer(arms, voltages[gate]) for gate, arms in self.dot_lever_arms.items())
+        return np.clip(np.floor(potentials + self.offsets[:, np.newaxis]), 0, None)
+
+    def effective_voltage(self, voltages: Mapping[str, np.ndarray]) -> np.ndarray:
+        return self.sensor.effective_voltage(voltages) - self.coupling @ self.occupations(voltages)
+
+    def signal(self, effective_voltage: np.ndarray) -> np.ndarray:
+        return self.sensor.signal(effective_voltage)
+
+
+class DeviceSimulator:
+    """
+    Evaluates a device model for the voltages the gates had at the given times.
+
+    Args:
+        model (Callable): Gets a dict of gate name -> voltage array and returns the signal array,
+            e.g. one of the DeviceModels.
+        gates (Mapping[str, Any]): DummyDac channels (or their voltage parameters) for each gate
+            name used in the model. Other parameters are assumed to be constant.
+        noise (float): Standard deviation of gaussian noise added to the signal.
+        seed (int | None): Seed of the noise generator.
+    """
+
+    def __init__(
+        self,
+        model: Callable[[Mapping[str, np.ndarray]], np.ndarray],
+        gates: Mapping,
+        noise: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.model = model
+        self.gates = dict(gates)
+        self.noise = noise
+        self._rng = np.random.default_rng(seed)
+
+    @staticmethod
+    def _voltages_at(gate, times: np.ndarray) -> np.ndarray:
+        if hasattr(gate, "voltage_at"):
+            return gate.voltage_at(times)
+        if isinstance(gate, Parameter):
+            if hasattr(gate.instrument, "voltage_at"):
+                return gate.instrument.voltage_at(times)
+            return np.full(len(times), gate.cache.get(), dtype=float)
+        raise TypeError(f"Cannot get voltages of {gate}")
+
+    def evaluate(self, times: np.ndarray) -> np.ndarray:
+        """
+        Returns the simulated signal at the given times (time.perf_counter timestamps).
+        """
+        times = np.asarray(times, dtype=float)
+        voltages = {name: self._voltages_at(gate, times) for name, gate in self.gates.items()}
+        signal = np.broadcast_to(np.asarray(self.model(voltages), dtype=float), times.shape)
+        if self.noise:
+            signal = signal + self._rng.normal(0, self.noise, times.shape)
+        return signal
+
+    def __call__(self) -> float:
+        """Returns the current signal."""
+        return float(self.evaluate(np.array([perf_counter()]))[0])
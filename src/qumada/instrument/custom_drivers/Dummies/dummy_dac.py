@@ -22,23 +22,69 @@
 # most of the drivers only need a couple of these... moved all up here for clarity below
 from __future__ import annotations
 
+import logging
 import threading
-from time import sleep
+from time import perf_counter, sleep
 
 import numpy as np
 from qcodes.instrument import ChannelList, Instrument, InstrumentChannel
 from qcodes.validators import validators as vals
 
+logger = logging.getLogger(__name__)
+
 
 # %%
 class DummyDac_Channel(InstrumentChannel):
+    HISTORY_LENGTH = 2**16  # Number of voltage changes remembered for voltage_at
+
     def __init__(self, parent, name, channel):
         super().__init__(parent, name)
         self._channel = channel
+        # Ring buffer of the voltage changes, entry _num_records % HISTORY_LENGTH is written next
+        self._history_times = np.empty(self.HISTORY_LENGTH)
+        self._history_values = np.empty(self.HISTORY_LENGTH)
+        self._num_records = 0
+        self._history_lock = threading.Lock()
 
-        self.add_parameter("voltage", unit="V", set_cmd=None, vals=vals.Numbers(-10, 10))
+        self.add_parameter("voltage", unit="V", get_cmd=None, set_cmd=self._record_voltage, vals=vals.Numbers(-10, 10))
         self.voltage.set(0)
 
+    def _record_voltage(self, value: float) -> None:
+        with self._history_lock:
+            index = self._num_records % self.HISTORY_LENGTH
+            self._history_times[index] = perf_counter()
+            self._history_values[index] = value
+            self._num_records += 1
+
+    def voltage_at(self, times: np.ndarray) -> np.ndarray:
+        """
+        Returns the voltages the channel had at the given times (time.perf_counter timestamps).
+        Used to simulate instruments measuring the channel, see device_simulator.
+        Times before the oldest remembered voltage change get the oldest voltage.
+        """
+        times = np.asarray(times, dtype=float)
+        length = self.HISTORY_LENGTH
+        with self._history_lock:
+            newest = (self._num_records - 1) % length
+            # Fast path for the current voltage, e.g. for point by point measurements
+            if times.size and times.min() >= self._history_times[newest]:
+                return np.full(times.shape, self._history_values[newest])
+            if self._num_records <= length:
+                oldest = 0
+                indices = np.searchsorted(self._history_times[: self._num_records], times, side="right") - 1
+            else:
+                # The ring consists of two sorted parts, the older one starts at the next index to write
+                oldest = newest + 1
+                older = np.searchsorted(self._history_times[oldest:], times, side="right") - 1
+                newer = np.searchsorted(self._history_times[:oldest], times, side="right") - 1
+                indices = np.where(newer >= 0, newer + length - oldest, older)
+            if times.size and indices.min() < 0:
+                logger.warning(
+                    f"{self.full_name}: Voltage requested for a time older than the history of "
+                    f"{length} voltage changes, using the oldest voltage."
+                )
+            return self._history_values[(oldest + np.clip(indices, 0, None)) % length]
+
     def ramp(self, start, stop, duration, num_points):
         self.parent.ramp(self, start, stop, duration, num_points)
 
@@ -58,10 +104,27 @@ class DummyDac(Instrument):
         self.add_submodule("channels", channels.to_channel_tuple())
         self.add_function("force_trigger", call_cmd=self._is_triggered.set)
 
+    def _play(self, channels: list, setpoints: np.ndarray, duration: float, wait_for_trigger: bool = False):
+        """
+        Sets the channels to the rows of setpoints (shape num_points x num_channels).
+        Row i is set at i * duration / num_points after the start, so delays of setting
+        the channels do not add up. The last row is held until duration has passed.
+        Waits for the trigger before starting, if wait_for_trigger is True.
+        """
+        setters = [channel.voltage.set for channel in channels]
+        rows = np.asarray(setpoints, dtype=float).reshape(len(setpoints), len(channels)).tolist()
+        interval = duration / len(rows)
+        if wait_for_trigger:
+            self._is_triggered.wait()
+        start = perf_counter()
+        for i, row in enumerate(rows, 1):
+            for setter, value in zip(setters, row):
+                setter(value)
+            # Jitter of sleep() does not add up, as the deadline is fixed to the start
+            sleep(max(0, start + i * interval - perf_counter()))
+
     def _run_ramp(self, channel, start, stop, duration, num_points):
-        for setpoint in np.linspace(start, stop, int(num_points)):
-            channel.voltage(setpoint)
-            sleep(duration / num_points)
+        self._play([channel], np.linspace(start, stop, int(num_points)), duration)
 
     def ramp(self, channel, start, stop, duration, num_points):
         self.thread = threading.Thread(
@@ -80,47 +143,18 @@ class DummyDac(Instrument):
         self.thread.start()
 
     def _run_ramp_channels(self, channels: list, start_values: list, stop_values: list, duration, num_points):
-        setpoints = []
-        for ch, start, stop in zip(channels, start_values, stop_values):
-            setpoints.append(np.linspace(start, stop, num_points))
-        setpoints_inv = []
-        for i in range(num_points):
-            setpoints_inv.append([setpoints[j][i] for j in range(len(channels))])
-        for setpoint in setpoints_inv:
-            for i in range(len(channels)):
-                channels[i].voltage(setpoint[i])
-            sleep(duration / num_points)
+        self._play(channels, np.linspace(start_values, stop_values, int(num_points)), duration)
 
     def _run_triggered_ramp(self, channel, start, stop, duration, stepsize=0.01):
-        _ = self._is_triggered.wait()
-        num_points = int((stop - start) / stepsize)
-        for setpoint in np.linspace(start, stop, num_points):
-            channel.voltage(setpoint)
-            sleep(duration / num_points)
+        num_points = max(int(abs(stop - start) / stepsize), 1)
+        self._play([channel], np.linspace(start, stop, num_points), duration, wait_for_trigger=True)
 
     def _run_triggered_ramp_channels(self, channels, start_values, stop_values, duration, num_points):
-        setpoints = []
-        for start, stop in zip(start_values, stop_values):
-            setpoints.append(np.linspace(start, stop, int(num_points)))
-        setpoints_inv = []
-        for i in range(int(num_points)):
-            setpoints_inv.append([setpoints[j][i] for j in range(len(channels))])
-        _ = self._is_triggered.wait()
-        for setpoint in setpoints_inv:
-            for i in range(len(channels)):
-                channels[i].voltage(setpoint[i])
-            sleep(duration / num_points)
+        setpoints = np.linspace(start_values, stop_values, int(num_points))
+        self._play(channels, setpoints, duration, wait_for_trigger=True)
 
     def _run_triggered_pulse_channels(self, channels, setpoints, duration):
-        setpoints_inv = []
-        num_points = len(setpoints[0])
-        for i in range(int(len(setpoints[0]))):
-            setpoints_inv.append([setpoints[j][i] for j in range(len(channels))])
-        _ = self._is_triggered.wait()
-        for setpoint in setpoints_inv:
-            for i in range(len(channels)):
-                channels[i].voltage(setpoint[i])
-            sleep(duration / num_points)
+        self._play(channels, np.transpose(setpoints), duration, wait_for_trigger=True)
 
     def _triggered_ramp(self, channel, start, stop, duration, num_points):
         self.thread = threading.Thread(
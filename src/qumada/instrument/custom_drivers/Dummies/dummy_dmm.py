@@ -19,11 +19,12 @@
 # - Daniel Grothe
 # - Till Huckeman
 
+from __future__ import annotations
 
 import threading
 
 # most of the drivers only need a couple of these... moved all up here for clarity below
-from time import sleep
+from time import perf_counter, sleep
 
 import numpy as np
 from qcodes.instrument import Instrument
@@ -32,33 +33,140 @@ from qcodes.validators import validators as vals
 
 
 # %%
-class dmm_results_random(Parameter):
+# Parameters with a get_burst(sample_times) method return the values for all
+# sample times of a buffer acquisition at once. Sample times are time.perf_counter timestamps.
+# If a simulator is assigned to the parameter (DummyDmm.simulate), its values are returned instead.
+class dmm_results(Parameter):
     def get_raw(self):
+        simulator = self.root_instrument._simulators.get(self.name)
+        if simulator is not None:
+            return simulator()
+        return self._get_value()
+
+    def get_burst(self, sample_times: np.ndarray) -> np.ndarray:
+        simulator = self.root_instrument._simulators.get(self.name)
+        if simulator is not None:
+            return simulator.evaluate(sample_times)
+        return self._get_burst(sample_times)
+
+
+class dmm_results_random(dmm_results):
+    def _get_value(self):
         return np.random.sample()
 
+    def _get_burst(self, sample_times: np.ndarray) -> np.ndarray:
+        return np.random.sample(len(sample_times))
 
-class dmm_results_sinus(Parameter):
-    def get_raw(self):
+
+class dmm_results_sinus(dmm_results):
+    def _get_value(self):
         length = self.root_instrument.buffer_n_points()
         if length and length > 0:
-            return [
-                np.sin(2 * np.pi * x / (self.root_instrument.buffer_n_points() ** 2 / self.root_instrument.buffer_SR()))
-                for x in np.linspace(0, length, length)
-            ]
+            return self._sinus(length, self.root_instrument.buffer_SR())
         else:
             raise Exception("Set buffer_n_points first to a positive value")
 
+    def _get_burst(self, sample_times: np.ndarray) -> np.ndarray:
+        # Continue the sinus of the whole acquisition, bursts may be split into chunks
+        buffer = self.root_instrument.buffer
+        indices = np.round((sample_times - buffer.start_time) * buffer.SR)
+        length = max(buffer.buffer_length, 1)
+        return np.sin(2 * np.pi * indices / (length**2 / buffer.SR))
+
+    @staticmethod
+    def _sinus(length: int, sampling_rate: float) -> np.ndarray:
+        return np.sin(2 * np.pi * np.linspace(0, length, length) / (length**2 / sampling_rate))
+
+
+def _sleep_until(deadline: float) -> None:
+    remaining = deadline - perf_counter()
+    if remaining > 0:
+        sleep(remaining)
+
+
+class RingBuffer:
+    """
+    Preallocated FIFO for the samples of a buffer acquisition.
+    Each row holds the timestamp of the sample followed by the value of each channel.
+    If more samples are written than fit into the buffer, the oldest unread samples
+    are overwritten and counted in lost_samples, similar to a data loss of real instruments.
+    """
+
+    def __init__(self, capacity: int, num_channels: int):
+        if capacity < 1:
+            raise ValueError("The capacity of the buffer has to be positive.")
+        self._data = np.full((int(capacity), num_channels + 1), np.nan)
+        self._lock = threading.Lock()
+        self._written = 0
+        self._read = 0
+        self.lost_samples = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._data)
+
+    def __len__(self) -> int:
+        """Number of unread samples."""
+        with self._lock:
+            return self._written - self._read
+
+    def write(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """
+        Appends samples. values has the shape num_channels x num_samples.
+        """
+        block = np.column_stack((timestamps, np.transpose(values)))
+        with self._lock:
+            indices = (self._written + np.arange(len(block))) % self.capacity
+            if len(block) > self.capacity:
+                # Only the last samples remain, write them only once
+                indices, block = indices[-self.capacity :], block[-self.capacity :]
+            self._data[indices] = block
+            self._written += len(timestamps)
+            overwritten = self._written - self._read - self.capacity
+            if overwritten > 0:
+                self.lost_samples += overwritten
+                self._read += overwritten
+
+    def read(self, max_samples: int | None = None, consume: bool = True) -> np.ndarray:
+        """
+        Returns the oldest unread samples (at most max_samples) as array of shape
+        num_samples x (num_channels + 1). If consume is False, the samples remain unread.
+        """
+        with self._lock:
+            num_samples = self._written - self._read
+            if max_samples is not None:
+                num_samples = min(num_samples, max_samples)
+            data = self._data[(self._read + np.arange(num_samples)) % self.capacity]
+            if consume:
+                self._read += num_samples
+        return data
+
+    def clear(self) -> None:
+        with self._lock:
+            self._read = self._written
+
 
 class dmm_buffer(Parameter):
+    CHUNK_TIME = 0.01  # Samples are written to the ring buffer in chunks of this duration
+
     def __init__(self, name, **kwargs):
         super().__init__(name, **kwargs)
-        self.buffer_data = []
         self.buffer_length = 512
         self.SR = 512
         self.is_finished = True
+        self.finished_event = threading.Event()
+        self.finished_event.set()
+        self._stop_event = threading.Event()
         self.subscribed_params = list()
         self.triggered: bool = False
         self._is_triggered = self.root_instrument._trigger_event
+        self.ring_buffer = RingBuffer(1, 0)
+        self.start_time = perf_counter()
+
+    @property
+    def lost_samples(self) -> int:
+        """Number of samples overwritten before they were read."""
+        return self.ring_buffer.lost_samples
 
     def subscribe(self, param):
         assert param.root_instrument == self.root_instrument
@@ -68,8 +176,10 @@ class dmm_buffer(Parameter):
     def ready_buffer(self):
         self.SR = self.root_instrument.buffer_SR()
         self.buffer_length = self.root_instrument.buffer_n_points()
-        self.buffer_data = [list() for _ in self.subscribed_params]
+        self.ring_buffer = RingBuffer(self.root_instrument.buffer_capacity(), len(self.subscribed_params))
         self.is_finished = False
+        self.finished_event.clear()
+        self._stop_event.clear()
 
     def start(self):
         if self.is_finished:
@@ -77,23 +187,66 @@ class dmm_buffer(Parameter):
         self.thread = threading.Thread(target=self._run, args=(), daemon=True)
         self.thread.start()
 
+    def stop(self):
+        """Stops the acquisition after the current chunk."""
+        self._stop_event.set()
+
     def _run(self):
+        """
+        Acquires buffer_length samples with the sample clock SR after the trigger, or
+        runs until stop() if buffer_continuous is set. The samples are written to the ring buffer
+        in chunks of CHUNK_TIME, so acquisitions can be longer than the buffer if it is read
+        while streaming (see read). Sample timestamps are relative to the trigger.
+        Parameters without get_burst method are read at their sample times. Parameters with
+        get_burst method are evaluated once for all sample times of a chunk at the end of the chunk,
+        when all their inputs (e.g. simulated gate voltages) are known.
+        The buffer is finished after the last sample period.
+        """
         _ = self._is_triggered.wait()
-        for i in range(0, self.buffer_length):
-            for j in range(len(self.subscribed_params)):
-                datapoint = self.subscribed_params[j]()
-                if isinstance(datapoint, float):
-                    self.buffer_data[j].append(self.subscribed_params[j]())
-                elif isinstance(datapoint, list):
-                    self.buffer_data[j].append(self.subscribed_params[j]()[i])
-            sleep(1 / self.SR)
+        start = self.start_time = perf_counter()
+        continuous = self.root_instrument.buffer_continuous()
+        chunk_size = max(int(self.SR * self.CHUNK_TIME), 1)
+        sampled_params = [j for j, param in enumerate(self.subscribed_params) if not hasattr(param, "get_burst")]
+        first = 0
+        while (continuous or first < self.buffer_length) and not self._stop_event.is_set():
+            last = first + chunk_size if continuous else min(first + chunk_size, self.buffer_length)
+            sample_times = start + np.arange(first, last) / self.SR
+            chunk = np.empty((len(self.subscribed_params), len(sample_times)))
+            for i, sample_time in enumerate(sample_times):
+                if not sampled_params:
+                    break
+                _sleep_until(sample_time)
+                for j in sampled_params:
+                    datapoint = self.subscribed_params[j]()
+                    if isinstance(datapoint, (list, np.ndarray)):
+                        datapoint = datapoint[(first + i) % len(datapoint)]
+                    chunk[j, i] = datapoint
+            _sleep_until(start + last / self.SR)
+            for j, param in enumerate(self.subscribed_params):
+                if j not in sampled_params:
+                    chunk[j] = param.get_burst(sample_times)
+            self.ring_buffer.write(sample_times - start, chunk)
+            first = last
         self.is_finished = True
+        self.finished_event.set()
+
+    def read(self, max_samples: int | None = None) -> dict:
+        """
+        Returns and removes the oldest samples from the buffer, use while streaming.
+        Output is a dict with timestamps and the data of each subscribed parameter.
+        """
+        data = self.ring_buffer.read(max_samples)
+        result = {param.name: data[:, j + 1] for j, param in enumerate(self.subscribed_params)}
+        result["timestamps"] = data[:, 0]
+        return result
 
     def reset(self):
-        self.buffer_data = []
+        self.ring_buffer.clear()
 
     def get_raw(self):
-        return self.buffer_data
+        """Returns the unread data of each subscribed parameter, without removing it."""
+        data = self.ring_buffer.read(consume=False)
+        return [data[:, j + 1] for j in range(len(self.subscribed_params))]
 
 
 class DummyDmm(Instrument):
@@ -101,6 +254,7 @@ class DummyDmm(Instrument):
         super().__init__(name, **kwargs)
 
         self._trigger_event = trigger_event
+        self._simulators = {}
 
         self.add_parameter(
             "voltage",
@@ -116,7 +270,7 @@ class DummyDmm(Instrument):
             "buffer_SR",
             unit="Sa/s",
             set_cmd=None,
-            vals=vals.Numbers(0, 512),
+            vals=vals.Numbers(0, 1e6),
         )
 
         self.add_parameter(
@@ -125,7 +279,23 @@ class DummyDmm(Instrument):
 
         self.add_parameter("is_finished", get_cmd=self._is_finished)
 
-        self.add_parameter("buffer_n_points", set_cmd=None, vals=vals.Ints(0, 16383))
+        self.add_parameter("buffer_n_points", set_cmd=None, vals=vals.Ints(0))
+
+        self.add_parameter(
+            "buffer_capacity",
+            set_cmd=None,
+            initial_value=16383,
+            vals=vals.Ints(1),
+            docstring="Number of samples the buffer can hold before the oldest unread ones are overwritten.",
+        )
+
+        self.add_parameter(
+            "buffer_continuous",
+            set_cmd=None,
+            initial_value=False,
+            vals=vals.Bool(),
+            docstring="Acquire until the buffer is stopped instead of buffer_n_points samples.",
+        )
 
         self.add_parameter("triggered", set_cmd=None, vals=vals.Bool())
         self.triggered(False)
@@ -136,6 +306,18 @@ class DummyDmm(Instrument):
 
         self.add_function("reset_buffer", call_cmd=self._reset_buffer)
 
+        self.add_function("stop", call_cmd=self.buffer.stop)
+
+    def simulate(self, parameter_name: str, simulator) -> None:
+        """
+        Returns the values of the simulator (see device_simulator.DeviceSimulator)
+        for the parameter instead of the built-in signal. Use None to remove the simulator.
+        """
+        if simulator is None:
+            self._simulators.pop(parameter_name, None)
+        else:
+            self._simulators[parameter_name] = simulator
+
     def _force_trigger(self):
         self.buffer._is_triggered.set()
         return None
@@ -153,7 +335,7 @@ class DummyDmm(Instrument):
 
     def _reset_buffer(self):
         print("Buffer was resetted")
-        self.buffer.buffer_data = []
+        self.buffer.reset()
         return None
 
     def _is_finished(self):
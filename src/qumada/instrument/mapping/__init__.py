@@ -26,6 +26,9 @@ from .base import (
     MappingError,
     add_mapping_to_instrument,
     filter_flatten_parameters,
+    find_parameters,
+    get_parameter_index,
+    invalidate_parameter_index,
     map_gates_to_instruments,
 )
 from .mapping_gui import map_terminals_gui
@@ -60,6 +63,9 @@ __all__ = [
     "add_mapping_to_instrument",
     "map_gates_to_instruments",
     "filter_flatten_parameters",
+    "find_parameters",
+    "get_parameter_index",
+    "invalidate_parameter_index",
     "map_terminals_gui",
     "DECADAC_MAPPING",
     "SR830_MAPPING",
@@ -26,11 +26,13 @@ from __future__ import annotations
 import json
 import logging
 from abc import ABC, abstractmethod
+from collections import defaultdict
 from collections.abc import Iterable, Mapping, MutableMapping
 from typing import Any, Union
+from weakref import WeakKeyDictionary
 
 import jsonschema
-from qcodes.instrument import Instrument
+from qcodes.instrument import Instrument, InstrumentBase
 from qcodes.metadatable import Metadatable
 from qcodes.parameters import Parameter
 from qcodes.station import Station
@@ -83,9 +85,78 @@ class InstrumentMapping(ABC):
         """Setup the trigger based on the buffer_settings"""
 
 
+# Cached flat dicts of parameters for each instrument, see get_parameter_index.
+_parameter_indices: WeakKeyDictionary[InstrumentBase, dict[Any, Parameter]] = WeakKeyDictionary()
+
+
+def get_parameter_index(instrument: InstrumentBase) -> dict[Any, Parameter]:
+    """
+    Returns a flat dict of all parameters of the instrument with their full names as keys.
+    The dict is built once and cached. Call invalidate_parameter_index after adding or
+    removing parameters or submodules of the instrument.
+
+    Args:
+        instrument (InstrumentBase): Instrument to get the parameters from.
+
+    Returns:
+        dict[Any, Parameter]: Flat dict of parameters. Do not modify it.
+    """
+    try:
+        return _parameter_indices[instrument]
+    except KeyError:
+        pass
+    except TypeError:
+        # Not hashable or not weak referencable, cannot be cached
+        return _filter_flatten_parameters(instrument)
+    index = _filter_flatten_parameters(instrument)
+    _parameter_indices[instrument] = index
+    return index
+
+
+def invalidate_parameter_index(instrument: InstrumentBase | None = None) -> None:
+    """
+    Removes the cached parameter index of the instrument, or all indices, if instrument is None.
+    """
+    if instrument is None:
+        _parameter_indices.clear()
+    else:
+        _parameter_indices.pop(instrument, None)
+
+
+def find_parameters(
+    components: Mapping[Any, Metadatable] | Iterable[Metadatable] | Metadatable,
+    *,
+    root_instrument: InstrumentBase | None = None,
+    mapping: str | None = None,
+) -> dict[Any, Parameter]:
+    """
+    Returns the parameters of the components, filtered by their root instrument and
+    their mapped name (the _mapping attribute set by add_mapping_to_instrument).
+
+    Args:
+        components: Instruments/Components in QCoDeS, e.g. station.components.
+        root_instrument (InstrumentBase | None): Only return parameters of this instrument.
+        mapping (str | None): Only return parameters that are mapped to this name, e.g. "voltage".
+
+    Returns:
+        dict[Any, Parameter]: Flat dict of parameters with their full names as keys.
+    """
+    if root_instrument is not None:
+        parameters = get_parameter_index(root_instrument)
+    else:
+        parameters = filter_flatten_parameters(components)
+    return {
+        key: parameter
+        for key, parameter in parameters.items()
+        if (root_instrument is None or parameter.root_instrument is root_instrument)
+        and (mapping is None or getattr(parameter, "_mapping", None) == mapping)
+    }
+
+
 def filter_flatten_parameters(node) -> dict[Any, Parameter]:
     """
     Recursively filters objects of Parameter types from data structure, that consists of dicts, lists and Metadatable.
+    The parameters of instruments are taken from the cached index, see get_parameter_index.
 
     Args:
         node (Union[Dict, List, Metadatable]): Current/starting node in the data structure
@@ -93,6 +164,16 @@ def filter_flatten_parameters(node) -> dict[Any, Parameter]:
     Returns:
         Dict[Any, Parameter]: Flat dict of parameters
     """
+    if isinstance(node, InstrumentBase):
+        return dict(get_parameter_index(node))
+    return _filter_flatten_parameters(node, use_index=True)
+
+
+def _filter_flatten_parameters(node, use_index: bool = False) -> dict[Any, Parameter]:
+    """
+    Walks the data structure and returns the flat dict of parameters.
+    If use_index is True, the cached indices are used for instruments in the structure.
+    """
 
     def recurse(node) -> None:
         """Recursive part of the function. Fills instrument_parameters dict."""
@@ -111,6 +192,8 @@ def filter_flatten_parameters(node) -> dict[Any, Parameter]:
         for value in values:
             if isinstance(value, Parameter):
                 instrument_parameters[value.full_name] = value
+            elif use_index and isinstance(value, InstrumentBase):
+                instrument_parameters.update(get_parameter_index(value))
             else:
                 if isinstance(value, Iterable) and not isinstance(value, str):
                     recurse(value)
@@ -265,6 +348,11 @@ def map_gates_to_instruments(
 
     # get all parameters in one flat list for the mapping process
     instrument_parameters = filter_flatten_parameters(components)
+    # Reverse indices: root instrument -> parameters, root instrument -> _mapping name -> parameters
+    parameters_by_instrument: dict[Any, dict[Any, Parameter]] = defaultdict(dict)
+    for parameter_key, parameter in instrument_parameters.items():
+        parameters_by_instrument[parameter.root_instrument][parameter_key] = parameter
+    mapping_indices: dict[Any, dict[Any, dict[Any, Parameter]]] = {}
     # TODO: We have to distinguish multi channel/module instruments. Possible approach:
     #       [parameter]._instrument should be InstrumentChannel or InstrumentModule type
     for key, gate in gate_parameters.items():
@@ -305,37 +393,28 @@ def map_gates_to_instruments(
                     if not flag:
                         chosen = int(input(f'Which instrument shall be mapped to gate "{key}" ({gate}): '))
                         chosen_instrument = list(components.values())[int(chosen)]
-                    chosen_instrument_parameters = {
-                        k: v for k, v in instrument_parameters.items() if v.root_instrument is chosen_instrument
-                    }
+                    chosen_instrument_parameters = parameters_by_instrument[chosen_instrument]
+                    if chosen_instrument not in mapping_indices:
+                        mapping_indices[chosen_instrument] = _index_by_mapping(chosen_instrument_parameters)
+                    mapping_index = mapping_indices[chosen_instrument]
                     try:
                         if map_manually:
                             raise MappingError("map_manually set, mapping manually.")
                         # Only use chosen instrument's parameters for mapping
-                        _map_gate_to_instrument(gate, chosen_instrument_parameters)
-                        # Remove mapped parameters from parameter list
-                        # TODO: remove all parameters from Channel, if parent is a channel
-                        keys_to_remove = (
-                            key
-                            for key in chosen_instrument_parameters.keys()
-                            if chosen_instrument_parameters[key] in gate.values()
-                        )
-                        for key in keys_to_remove:
-                            instrument_parameters.pop(key, None)
-
+                        _map_gate_to_instrument(gate, chosen_instrument_parameters, mapping_index)
                     except MappingError as ex:
                         # Could not map instrument, do it manually
                         # TODO: Map to multiple instruments
                         print(ex)
-                        _map_gate_parameters_to_instrument_parameters(gate, chosen_instrument_parameters)
-                        # Remove mapped parameters from parameter list
-                        keys_to_remove = (
-                            key
-                            for key in chosen_instrument_parameters.keys()
-                            if chosen_instrument_parameters[key] in gate.values()
+                        _map_gate_parameters_to_instrument_parameters(
+                            gate, chosen_instrument_parameters, mapping_index=mapping_index
                         )
-                        for key in keys_to_remove:
-                            instrument_parameters.pop(key, None)
+                    # Remove mapped parameters from parameter lists
+                    # TODO: remove all parameters from Channel, if parent is a channel
+                    for parameter in gate.values():
+                        if isinstance(parameter, Parameter):
+                            chosen_instrument_parameters.pop(parameter.full_name, None)
+                            mapping_index.get(getattr(parameter, "_mapping", None), {}).pop(parameter.full_name, None)
                     break
                 except (IndexError, ValueError):
                     continue
@@ -345,24 +424,47 @@ def map_gates_to_instruments(
         metadata.add_terminal_mapping(json.dumps(j), name="automatic-mapping")
 
 
-def _map_gate_to_instrument(gate: Mapping[Any, Parameter], instrument_parameters: Mapping[Any, Parameter]) -> None:
+def _index_by_mapping(instrument_parameters: Mapping[Any, Parameter]) -> dict[Any, dict[Any, Parameter]]:
+    """
+    Groups the instrument parameters by the name they are mapped to (their _mapping attribute).
+    Parameters without mapping are not included.
+
+    Args:
+        instrument_parameters (Mapping[Any, Parameter]): Instrument parameters
+
+    Returns:
+        dict[Any, dict[Any, Parameter]]: Mapped names and the parameters mapped to them,
+        in the order of instrument_parameters.
+    """
+    mapping_index: dict[Any, dict[Any, Parameter]] = defaultdict(dict)
+    for key, parameter in instrument_parameters.items():
+        if hasattr(parameter, "_mapping"):
+            mapping_index[parameter._mapping][key] = parameter
+    return mapping_index
+
+
+def _map_gate_to_instrument(
+    gate: Mapping[Any, Parameter],
+    instrument_parameters: Mapping[Any, Parameter],
+    mapping_index: Mapping[Any, Mapping[Any, Parameter]] | None = None,
+) -> None:
     """
     Maps the gate parameters of one specific gate to the parameters of one specific instrument.
 
     Args:
         gate (Mapping[Any, Parameter]): Gate parameters
         instrument_parameters (Mapping[Any, Parameter]): Instrument parameters available for mapping
+        mapping_index (Mapping | None): Instrument parameters grouped by _mapping, as returned by
+            _index_by_mapping. Is created from instrument_parameters, if None.
     """
-    mapped_parameters = {
-        key: parameter for key, parameter in instrument_parameters.items() if hasattr(parameter, "_mapping")
-    }
+    if mapping_index is None:
+        mapping_index = _index_by_mapping(instrument_parameters)
     for key, parameter in gate.items():
         # Map only parameters that are not set already
         if parameter is None:
-            candidates = [parameter for parameter in mapped_parameters.values() if parameter._mapping == key]
             try:
-                gate[key] = candidates.pop(0)
-            except IndexError:
+                gate[key] = next(iter(mapping_index.get(key, {}).values()))
+            except StopIteration:
                 instrument_name = next(iter(instrument_parameters.values())).instrument.name
                 raise MappingError(f'No mapping candidate for "{key}" in instrument "{instrument_name}" found.')
 
@@ -371,6 +473,7 @@ def _map_gate_parameters_to_instrument_parameters(
     gate_parameters: Mapping[Any, Parameter],
     instrument_parameters: Mapping[Any, Parameter],
     append_unmapped_parameters=True,
+    mapping_index: Mapping[Any, Mapping[Any, Parameter]] | None = None,
 ) -> None:
     """
     Maps the gate parameters of one specific gate to the instrument parameters of one specific instrument.
@@ -378,7 +481,11 @@ def _map_gate_parameters_to_instrument_parameters(
     Args:
         gate_parameters (Mapping[Any, Parameter]): Gate parameters
         instrument_parameters (Mapping[Any, Parameter]): Instrument parameters available for mapping
+        mapping_index (Mapping | None): Instrument parameters grouped by _mapping, as returned by
+            _index_by_mapping. Is created from instrument_parameters, if None.
     """
+    if mapping_index is None:
+        mapping_index = _index_by_mapping(instrument_parameters)
     mapped_parameters = {
         key: parameter for key, parameter in instrument_parameters.items() if hasattr(parameter, "_mapping")
     }
@@ -392,7 +499,7 @@ def _map_gate_parameters_to_instrument_parameters(
             # Filter instrument parameters, if _mapping attribute is equal to key_gp
             # if there is no mapping provided, append those parameters to the list
             # if there are no filtered candidates available, show all parameters
-            candidates = {k: p for k, p in mapped_parameters.items() if p._mapping == key}
+            candidates = dict(mapping_index.get(key, {}))
             if append_unmapped_parameters:
                 candidates = candidates | unmapped_parameters
             if not len(candidates):
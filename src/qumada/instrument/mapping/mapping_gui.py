@@ -57,7 +57,11 @@ from qcodes.instrument.instrument import Instrument
 from qcodes.instrument.parameter import Parameter
 from qcodes.utils.metadata import Metadatable
 
-from qumada.instrument.mapping.base import TerminalParameters, filter_flatten_parameters
+from qumada.instrument.mapping.base import (
+    TerminalParameters,
+    _index_by_mapping,
+    filter_flatten_parameters,
+)
 from qumada.metadata import Metadata
 
 RED = QColor(255, 0, 0)
@@ -1027,13 +1031,10 @@ def get_possible_mapping_candidates(
     terminal parameter name, value: list(parameters that can be mapped to that terminal parameter)
     Similar to base.py _map_gate_to_instrument
     """
-    mapped_parameters = {
-        key: parameter for key, parameter in instrument_parameters.items() if hasattr(parameter, "_mapping")
-    }
+    mapping_index = _index_by_mapping(instrument_parameters)
     mapping = {}
     for terminal_param in terminal_params:
-        candidates = [parameter for parameter in mapped_parameters.values() if parameter._mapping == terminal_param]
-        mapping[terminal_param] = candidates
+        mapping[terminal_param] = list(mapping_index.get(terminal_param, {}).values())
 
     return mapping
 
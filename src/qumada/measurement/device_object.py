@@ -5,7 +5,7 @@ import logging
 from abc import ABC
 from copy import deepcopy
 from functools import wraps
-from typing import Any
+from typing import Any, Callable
 
 import numpy as np
 from qcodes import Station
@@ -22,7 +22,7 @@ from qumada.measurement.scripts import (
     Timetrace,
     Timetrace_buffered,
 )
-from qumada.utils.ramp_parameter import ramp_or_set_parameter
+from qumada.utils.ramp_parameter import ramp_or_set_parameter, ramp_or_set_parameters
 
 logger = logging.getLogger(__name__)
 
@@ -50,6 +50,7 @@ class QumadaDevice:
         self.buffer_script_setup = {}
         self.states = {}
         self.ramp: bool = True
+        self.max_ramp_workers: int | None = None  # Max. number of instruments ramped at once
 
     def add_terminal(self, terminal_name: str, type: str | None = None, terminal_data: dict | None = {}):
         if terminal_name not in self.terminals.keys():
@@ -104,21 +105,88 @@ class QumadaDevice:
         self.set_stored_values(ramp=ramp, **kwargs)
 
     def set_stored_values(self, ramp=None, **kwargs):
+        """
+        Sets all Terminals and their parameters to their stored values.
+        If ramp is True, all parameters are ramped simultaneously.
+        """
         if ramp is None:
             ramp = self.ramp
-        for terminal in self.terminals.values():
-            for param in terminal.terminal_parameters.values():
-                param.set_stored_value()
+        if ramp is True:
+            self._ramp_terminal_parameters(lambda param: param._stored_value, "stored", **kwargs)
+        else:
+            for terminal in self.terminals.values():
+                for param in terminal.terminal_parameters.values():
+                    param.set_stored_value(ramp=ramp, **kwargs)
 
     def set_defaults(self, ramp=None, **kwargs):
         """
-        Sets all Terminals and their parameters to their default values
+        Sets all Terminals and their parameters to their default values.
+        If ramp is True, all parameters are ramped simultaneously.
         """
         if ramp is None:
             ramp = self.ramp
+        if ramp is True:
+            self._ramp_terminal_parameters(lambda param: param.default_value, "default", **kwargs)
+        else:
+            for terminal in self.terminals.values():
+                for param in terminal.terminal_parameters.values():
+                    param.set_default(ramp=ramp, **kwargs)
+
+    def _ramp_terminal_parameters(
+        self,
+        get_target: Callable,
+        target_name: str,
+        ramp_rate: float | None = None,
+        ramp_time: float = 5,
+        setpoint_intervall: float = 0.01,
+        **kwargs,
+    ):
+        """
+        Ramps all terminal parameters to the target returned by get_target at once.
+        Parameters on different instruments are ramped in parallel, at most
+        max_ramp_workers instruments at the same time. As for single parameters,
+        parameters that cannot be read are skipped, so they do not abort the ramp of
+        the other parameters.
+        """
+        parameters = []
+        targets = []
+        ramp_rates = []
+        current_values = []
+        updated = False
         for terminal in self.terminals.values():
             for param in terminal.terminal_parameters.values():
-                param.set_default(ramp=ramp, **kwargs)
+                target = get_target(param)
+                if target is None:
+                    logger.warning(f"No {target_name} value set for parameter {param.name}")
+                    continue
+                if param.instrument_parameter is None and not updated:
+                    # TODO: Remove, update_terminal_parameters() should be called by mapping function
+                    self.update_terminal_parameters()
+                    updated = True
+                if param.instrument_parameter is None:
+                    logger.warning(f"No instrument parameter assigned to {terminal.name} {param.name}")
+                    continue
+                try:
+                    current_value = param.instrument_parameter.get()
+                except NotImplementedError as e:
+                    logger.debug(f"{e} was raised and ignored")
+                    continue
+                except Exception as e:
+                    logger.warning(f"{e} was raised when reading {terminal.name} {param.name}, it is not ramped")
+                    continue
+                parameters.append(param.instrument_parameter)
+                targets.append(target)
+                ramp_rates.append(ramp_rate or param.ramp_rate)
+                current_values.append(current_value)
+        ramp_or_set_parameters(
+            parameters,
+            targets,
+            ramp_rate=ramp_rates,
+            ramp_time=ramp_time,
+            setpoint_intervall=setpoint_intervall,
+            max_workers=self.max_ramp_workers,
+            start_values=current_values,
+        )
 
     def voltages(self):
         """
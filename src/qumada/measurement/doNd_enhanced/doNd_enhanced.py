@@ -24,14 +24,16 @@
 
 from __future__ import annotations
 
+import json
 import logging
-import operator
 import sys
 import time
 import warnings
-from collections.abc import Sequence
-from functools import partial
-from typing import Any, Callable, Optional, Union
+from collections import deque
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Optional, Union
 
 import matplotlib.axes
 import matplotlib.colorbar
@@ -61,8 +63,12 @@ from qcodes.dataset.threading import (  # SequentialParamsCaller,; ThreadPoolPar
 from qcodes.parameters import ParameterBase
 from tqdm.auto import tqdm
 
+from qumada.utils.ramp_parameter import _group_by_instrument
+
 ActionsT = Sequence[Callable[[], None]]
 BreakConditionT = Callable[[], bool]
+SettleModelT = Callable[[ParameterBase, float], float]
+SETTLE_MODES = ["per_parameter", "single"]
 
 ParamMeasT = Union[ParameterBase, Callable[[], None]]
 
@@ -100,11 +106,14 @@ def do1d_parallel(
     break_condition: BreakConditionT | None = None,
     backsweep_after_break: bool = False,
     wait_after_break: float = 0,
+    point_callback: Callable[[dict], None] | None = None,
 ) -> AxesTupleListWithDataSet:
     """
     Performs a 1D scan of all ``param_set`` according to "setpoints" in parallel,
     measuring param_meas at each step. In case param_meas is
     an ArrayParameter this is effectively a 2d scan.
+    Each measured parameter is read exactly once per point, the same values are
+    stored, used for the break condition and passed to point_callback.
 
     Args:
         param_set: The QCoDeS parameter to sweep over
@@ -139,6 +148,11 @@ def do1d_parallel(
             reversed sweep starting from the measurement point at which the
             condition was fulfilled and stopping at the first setpoint of the
             measurement is performed.
+        break_condition: Called after each point with a dict of all values measured
+            so far (parameter -> list of values), e.g. BreakConditions. The sweep
+            is stopped if it returns True.
+        point_callback: Called after each point with a dict of the values measured
+            at this point (parameter -> value), e.g. to update a live plot.
 
     Returns:
         The QCoDeS dataset.
@@ -194,6 +208,15 @@ def do1d_parallel(
         sys.stdout.flush()
         sys.stderr.flush()
 
+        def measure_point(set_point) -> dict:
+            # Reads every parameter once, the values are used for storage, breaks and callback
+            results = process_params_meas(measured_params, use_threads=use_threads)
+            datasaver.add_result((param_set[0], set_point), *results, *additional_setpoints_data)
+            values = dict(results)
+            if point_callback is not None:
+                point_callback(values)
+            return values
+
         sweep_data = {}
         for channel in measured_params:
             sweep_data[channel]: list[float] = []
@@ -203,14 +226,10 @@ def do1d_parallel(
                 param.set(set_point)
             tracked_setpoints.append(set_point)
             time.sleep(delay)
-            datasaver.add_result(
-                (param_set[0], set_point),
-                *process_params_meas(measured_params, use_threads=use_threads),
-                *additional_setpoints_data,
-            )
+            values = measure_point(set_point)
 
-            for channel in measured_params:
-                sweep_data[channel].append(channel.get())
+            for channel, value in values.items():
+                sweep_data.setdefault(channel, []).append(value)
             if callable(break_condition):
                 if break_condition(sweep_data):
                     if backsweep_after_break:
@@ -219,11 +238,7 @@ def do1d_parallel(
                         for set_point in tqdm(tracked_setpoints, disable=not show_progress):
                             for param in param_set:
                                 param.set(set_point)
-                            datasaver.add_result(
-                                (param_set[0], set_point),
-                                *process_params_meas(measured_params, use_threads=use_threads),
-                                *additional_setpoints_data,
-                            )
+                            measure_point(set_point)
                         break
                     else:
                         warnings.warn("Break condition was met.")
@@ -252,6 +267,8 @@ def do1d_parallel_asym(
     break_condition: BreakConditionT | None = None,
     backsweep_after_break: bool = False,
     wait_after_break: float = 0,
+    settle_mode: str = "per_parameter",
+    settle_model: SettleModelT | None = None,
 ) -> AxesTupleListWithDataSet:
     """
     Performs a 1D scan of all ``param_set`` according to "setpoints" in parallel,
@@ -291,10 +308,23 @@ def do1d_parallel_asym(
             reversed sweep starting from the measurement point at which the
             condition was fulfilled and stopping at the first setpoint of the
             measurement is performed.
+        settle_mode: "per_parameter" (default) waits ``delay`` after setting
+            each parameter and once more as post_delay of the first parameter,
+            so the dead time per point grows with the number of parameters.
+            During the backsweep only the post_delay is waited. "single" sets all parameters, those of different
+            instruments concurrently, and waits only once per point.
+        settle_model: Only used with settle_mode "single". Function of a
+            parameter and its step size (absolute change of the setpoint)
+            returning the settle time of that parameter in s. The largest
+            settle time of all parameters is waited. If None, ``delay`` is used.
+            The effective wait per point is stored as "effective_delay" in the
+            metadata of the dataset.
 
     Returns:
         The QCoDeS dataset.
     """
+    if settle_mode not in SETTLE_MODES:
+        raise ValueError(f"Settle mode {settle_mode} is not supported, use one of {SETTLE_MODES}.")
     if do_plot is None:
         do_plot = config.dataset.dond_plot
     if show_progress is None:
@@ -338,17 +368,38 @@ def do1d_parallel_asym(
     _set_write_period(meas, write_period)
     _register_actions(meas, enter_actions, exit_actions)
 
+    single_settle = settle_mode == "single"
     original_delay = param_set[0].post_delay
-    param_set[0].post_delay = delay
+    if not single_settle:
+        param_set[0].post_delay = delay
 
     if use_threads is None:
         use_threads = config.dataset.use_threads
 
     tracked_setpoints = list([] for _ in param_set)
+    settle_times = []
+    previous_values = [param.cache.get() for param in param_set] if settle_model is not None else []
+
+    def set_and_settle(values: list) -> list[tuple]:
+        set_parameters(values)
+        if settle_model is None:
+            settle_time = delay
+        else:
+            settle_time = max(
+                settle_model(param, abs(value - previous))
+                for param, value, previous in zip(param_set, values, previous_values)
+            )
+            previous_values[:] = values
+        time.sleep(settle_time)
+        settle_times.append(settle_time)
+        return list(zip(param_set, values))
+
     # do1D enforces a simple relationship between measured parameters
     # and set parameters. For anything more complicated this should be
     # reimplemented from scratch
-    with _catch_interrupts() as interrupted, meas.run() as datasaver:
+    with _catch_interrupts() as interrupted, meas.run() as datasaver, _parameter_setter(
+        param_set, concurrent=single_settle
+    ) as set_parameters:
         dataset = datasaver.dataset
         additional_setpoints_data = process_params_meas(additional_setpoints)
 
@@ -359,11 +410,18 @@ def do1d_parallel_asym(
 
         for j in range(len(setpoints[0])):
             datasaver_list = []
-            for i in range(len(param_set)):
-                param_set[i].set(setpoints[i][j])
-                tracked_setpoints[i].append(setpoints[i][j])
-                time.sleep(delay)
-                datasaver_list.append((param_set[i], setpoints[i][j]))
+            if single_settle:
+                for i in range(len(param_set)):
+                    tracked_setpoints[i].append(setpoints[i][j])
+                datasaver_list = set_and_settle([setpoints[i][j] for i in range(len(param_set))])
+            else:
+                for i in range(len(param_set)):
+                    param_set[i].set(setpoints[i][j])
+                    tracked_setpoints[i].append(setpoints[i][j])
+                    time.sleep(delay)
+                    datasaver_list.append((param_set[i], setpoints[i][j]))
+                # The post_delay of the first parameter is waited in addition
+                settle_times.append(delay * len(param_set) + param_set[0].post_delay)
             datasaver.add_result(
                 *datasaver_list,
                 *process_params_meas(measured_params, use_threads=use_threads),
@@ -378,12 +436,20 @@ def do1d_parallel_asym(
                         tracked_setpoints = [setpoints[::-1] for setpoints in tracked_setpoints]
                         time.sleep(wait_after_break)
                         for j in range(len(tracked_setpoints[0])):
+                            if single_settle:
+                                datasaver.add_result(
+                                    *set_and_settle([values[j] for values in tracked_setpoints]),
+                                    *process_params_meas(measured_params, use_threads=use_threads),
+                                    *additional_setpoints_data,
+                                )
+                                continue
                             datasaver_backward_list = []
                             for i, param in enumerate(param_set):
                                 # tqdm might not work anymore as intended; need j instead of object?
                                 # for set_point in tqdm(tracked_setpoints, disable=not show_progress):
                                 param.set(tracked_setpoints[i][j])
                                 datasaver_backward_list.append((param_set[i], tracked_setpoints[i][j]))
+                            settle_times.append(param_set[0].post_delay)
                             datasaver.add_result(
                                 *datasaver_backward_list,
                                 *process_params_meas(measured_params, use_threads=use_threads),
@@ -399,71 +465,215 @@ def do1d_parallel_asym(
                         raise BreakConditionInterrupt("Break condition was met.")
 
     param_set[0].post_delay = original_delay
+    if settle_times:
+        dataset.add_metadata(
+            "effective_delay",
+            json.dumps(
+                {
+                    "settle_mode": settle_mode,
+                    "mean": float(np.mean(settle_times)),
+                    "max": float(np.max(settle_times)),
+                    "total": float(np.sum(settle_times)),
+                }
+            ),
+        )
 
     return _handle_plotting(dataset, do_plot, interrupted())
 
 
-def _interpret_breaks(break_conditions: list, **kwargs) -> Callable[[], bool] | None:
+@contextmanager
+def _parameter_setter(parameters: Sequence[ParameterBase], concurrent: bool = True):
     """
-    Translates break conditions and returns callable to check them.
+    Returns a function setting the parameters to a list of values, one for each
+    parameter. If concurrent is True, the parameters of different instruments are set
+    in parallel using a thread pool with one thread per instrument, parameters of the
+    same instrument are set one after another.
+    """
+    instrument_indices = list(_group_by_instrument(parameters).values())
+    if not concurrent or len(instrument_indices) < 2:
 
-    Parameters
-    ----------
-    break_conditions : List of dictionaries containing:
-            "channel": Gettable parameter to check
-            "break_condition": String specifying the break condition.
-                    Syntax:
-                        Parameter to check: only "val" supported so far.
-                        Comparator: "<",">" or "=="
-                        Value: float
-                    The parts have to be separated by blanks.
+        def set_parameters(values: Sequence) -> None:
+            for parameter, value in zip(parameters, values):
+                parameter.set(value)
 
-    **kwargs : TYPE
-        DESCRIPTION.
+        yield set_parameters
+        return
 
-    Returns
-    -------
-    Callable
-        Function, that returns a boolean, True if break conditions are fulfilled.
+    def set_instrument(indices: list[int], values: Sequence) -> None:
+        for i in indices:
+            parameters[i].set(values[i])
 
-    """
+    with ThreadPoolExecutor(max_workers=len(instrument_indices), thread_name_prefix="qumada-set") as executor:
 
-    def eval_binary_expr(op1: Any, oper: str, op2: Any) -> bool:
-        # evaluates the string "op1 [operator] op2
-        # supports <, > and == as operators
-        ops = {
-            ">": operator.gt,
-            "<": operator.lt,
-            "==": operator.eq,
-        }
-        # Why convert explicitly to float?
-        # op1, op2 = float(op1), float(op2)
-        return ops[oper](op1, op2)
+        def set_parameters(values: Sequence) -> None:
+            futures = [executor.submit(set_instrument, indices, values) for indices in instrument_indices]
+            for future in futures:
+                future.result()
 
-    def f(cond, ops):
-        return partial(eval_binary_expr, cond["channel"].get_latest(), ops[1], float(ops[2]))()
+        yield set_parameters
 
-    def check_conditions(conditions: list[Callable[[], bool]]):
-        for cond in conditions:
-            if f(cond[0], cond[1]):
-                return True
-        return False
 
-    conditions = []
+class BreakConditions:
+    """
+    Compiled break conditions. The condition strings are parsed once, afterwards
+    the conditions are evaluated on values that were already measured, without
+    reading the instruments again.
+
+    Syntax of the break conditions: "<quantity> <comparator> <value>", parts separated
+    by blanks. Comparators are "<", ">", "<=", ">=" and "==". Quantities are
+        "val": The measured value.
+        "mean N": Moving average of the last N values.
+        "diff N": Change of the value over the last N points, val[-1] - val[-1 - N].
+        "grad N": Relative change over the last N points, (val[-1] - val[-1 - N]) / val[-1].
+    Conditions requiring more points than measured so far are not fulfilled.
+    E.g. "mean 5 > 1e-9" breaks as soon as the average of the last five values
+    exceeds 1 nA.
 
-    # Create break condition callables
-    for cond in break_conditions:
-        ops = cond["break_condition"].split(" ")
-        if ops[0] != "val":
-            raise NotImplementedError(
-                'Only parameter values can be used for breaks in this version. Use "val" for the break condition.'
-            )
-        conditions.append([cond, ops])
+    Args:
+        break_conditions (list): List of dictionaries with the gettable parameter as
+            "channel" and the condition string as "break_condition".
+        outer_parameters (Sequence, optional): Parameters of the outer sweeps of a
+            multidimensional dond. The history of the windowed quantities is cleared
+            whenever one of their cached values changes, so windows do not span from
+            the end of one line to the start of the next.
+
+    Use the object as break condition of dond (the values are taken from the
+    parameters' caches), call check_point() with the values of each point, or check
+    complete buffered traces with check_line().
+    """
 
-    return partial(check_conditions, conditions) if conditions else None
+    COMPARATORS = {
+        ">": np.greater,
+        "<": np.less,
+        ">=": np.greater_equal,
+        "<=": np.less_equal,
+        "==": np.equal,
+    }
+    QUANTITIES = ["val", "mean", "diff", "grad"]
+
+    def __init__(self, break_conditions: list, outer_parameters: Sequence = ()):
+        self.conditions = [self._compile(cond) for cond in break_conditions]
+        self.outer_parameters = list(outer_parameters)
+        self._outer_values: list | None = None
+        self.channels = list(dict.fromkeys(cond["channel"] for cond in self.conditions))
+        self.fulfilled: dict | None = None  # Last condition that was fulfilled
+        history = {}
+        for cond in self.conditions:
+            history[cond["channel"]] = max(history.get(cond["channel"], 1), cond["num_points"])
+        self._history = {channel: deque(maxlen=length) for channel, length in history.items()}
+
+    def __bool__(self) -> bool:
+        return bool(self.conditions)
+
+    def __call__(self, sweep_values: Mapping | None = None) -> bool:
+        """
+        Checks the conditions for the latest point. Without arguments, the latest
+        values are taken from the parameters' caches, as filled by dond.
+        sweep_values can provide all values measured so far (channel -> sequence).
+        """
+        if sweep_values is None:
+            self._reset_on_new_line()
+            return self.check_point({channel: channel.cache.get(get_if_invalid=False) for channel in self.channels})
+        return self._check(
+            {
+                channel: np.asarray(sweep_values[channel][-self._history[channel].maxlen :], dtype=float)
+                for channel in self.channels
+            }
+        )
+
+    def check_point(self, values: Mapping) -> bool:
+        """
+        Adds the values of a point (channel -> value) to the history and checks the
+        conditions. Channels without break conditions are ignored.
+        """
+        for channel in self.channels:
+            self._history[channel].append(values[channel])
+        return self._check({channel: np.asarray(self._history[channel], dtype=float) for channel in self.channels})
+
+    def check_line(self, results: list) -> int | None:
+        """
+        Checks all points of a buffered trace at once. Gets the results as list of
+        (parameter, array) tuples, as returned by readout_buffers, and returns the
+        index of the first point fulfilling any condition or None. Channels that are
+        not part of the results are not checked.
+        """
+        data = dict(results)
+        first_break = None
+        for cond in self.conditions:
+            if cond["channel"] not in data:
+                continue
+            indices = np.flatnonzero(self._evaluate(cond, np.asarray(data[cond["channel"]], dtype=float)))
+            if len(indices) and (first_break is None or indices[0] < first_break):
+                first_break = int(indices[0])
+                self.fulfilled = cond
+        return first_break
+
+    def reset(self) -> None:
+        """Clears the history, e.g. before the next sweep."""
+        for history in self._history.values():
+            history.clear()
+        self.fulfilled = None
+
+    def _reset_on_new_line(self) -> None:
+        """Clears the history, if the setpoint of an outer sweep has changed."""
+        if not self.outer_parameters:
+            return
+        values = [parameter.cache.get(get_if_invalid=False) for parameter in self.outer_parameters]
+        if values != self._outer_values:
+            self.reset()
+            self._outer_values = values
+
+    def _check(self, data: Mapping) -> bool:
+        for cond in self.conditions:
+            series = data[cond["channel"]]
+            if len(series) >= cond["num_points"] and self._evaluate(cond, series[-cond["num_points"] :])[-1]:
+                self.fulfilled = cond
+                return True
+        return False
 
+    @classmethod
+    def _compile(cls, cond: dict) -> dict:
+        ops = cond["break_condition"].split(" ")
+        quantity = ops[0]
+        if quantity not in cls.QUANTITIES:
+            raise NotImplementedError(f'Break condition "{cond["break_condition"]}" is not supported.')
+        if quantity == "val":
+            window, comparator, value = 1, ops[1], ops[2]
+        else:
+            window, comparator, value = int(ops[1]), ops[2], ops[3]
+            if window < 1:
+                raise ValueError(f'The window of "{cond["break_condition"]}" has to be positive.')
+        return {
+            **cond,
+            "quantity": quantity,
+            "window": window,
+            # Number of points required to evaluate the condition
+            "num_points": window if quantity in ("val", "mean") else window + 1,
+            "compare": cls.COMPARATORS[comparator],
+            "value": float(value),
+        }
 
-def _dev_interpret_breaks(break_conditions: list, sweep_values: dict, **kwargs) -> Callable[[], bool] | None:
+    @staticmethod
+    def _evaluate(cond: dict, data: np.ndarray) -> np.ndarray:
+        """Returns for each point of data, if the condition is fulfilled."""
+        window = cond["window"]
+        series = np.full(len(data), np.nan)
+        if cond["quantity"] == "val":
+            series = data
+        elif cond["quantity"] == "mean":
+            cumsum = np.cumsum(np.concatenate([[0], data]))
+            series[window - 1 :] = (cumsum[window:] - cumsum[:-window]) / window
+        elif cond["quantity"] == "diff":
+            series[window:] = data[window:] - data[:-window]
+        elif cond["quantity"] == "grad":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                series[window:] = (data[window:] - data[:-window]) / data[window:]
+            series[~np.isfinite(series)] = np.nan
+        # Comparisons with nan (not enough points) are False
+        return cond["compare"](series, cond["value"])
+
+
+def _interpret_breaks(break_conditions: list, outer_parameters: Sequence = (), **kwargs) -> BreakConditions | None:
     """
     Translates break conditions and returns callable to check them.
 
@@ -471,67 +681,40 @@ def _dev_interpret_breaks(break_conditions: list, sweep_values: dict, **kwargs)
     ----------
     break_conditions : List of dictionaries containing:
             "channel": Gettable parameter to check
-            "break_condition": String specifying the break condition.
-                    Syntax:
-                        Parameter to check: only "val" supported so far.
-                        Comparator: "<",">" or "=="
-                        Value: float
-                    The parts have to be separated by blanks.
-
-    **kwargs : TYPE
-        DESCRIPTION.
+            "break_condition": String specifying the break condition,
+                    see BreakConditions for the syntax.
+    outer_parameters : Parameters of the outer sweeps of a multidimensional sweep.
+            The windowed conditions start over for each line.
 
     Returns
     -------
-    Callable
-        Function, that returns a boolean, True if break conditions are fulfilled.
-
+    BreakConditions
+        Callable, that returns a boolean, True if break conditions are fulfilled.
+        Uses the cached values of the channels. None if there are no break conditions.
     """
+    conditions = BreakConditions(break_conditions, outer_parameters)
+    return conditions if conditions else None
 
-    def return_false():
-        return False
-
-    def eval_binary_expr(op1: Any, oper: str, op2: Any) -> bool:
-        # evaluates the string "op1 [operator] op2
-        # supports <, > and == as operators
-        ops = {
-            ">": operator.gt,
-            "<": operator.lt,
-            "==": operator.eq,
-        }
-        # Why convert explicitly to float?
-        # op1, op2 = float(op1), float(op2)
-        return ops[oper](op1, op2)
 
-    def check_conditions(conditions: list[Callable[[], bool]]):
-        for cond in conditions:
-            if cond():
-                return True
-        return False
-
-    conditions = []
-    # Create break condition callables
-    for cond in break_conditions:
-        ops = cond["break_condition"].split(" ")
-        data = sweep_values[cond["channel"]]
-        if ops[0] == "val":
-
-            def f():
-                return partial(eval_binary_expr, data[-1], ops[1], float(ops[2]))()
-
-        elif ops[0] == "grad":
-            if int(ops[1]) >= len(data):
-                f = return_false
-            elif float(ops[1]) < len(data):
-                if data[len(data) - 1] != 0:
-                    dx = (data[len(data) - 1] - data[len(data) - 1 - int(ops[1])]) / data[len(data) - 1]
+def _interpret_line_breaks(break_conditions: list, **kwargs) -> Callable[[list], int | None] | None:
+    """
+    Vectorized counterpart of _interpret_breaks for buffered measurements, checks
+    the break conditions for all points of a readout line at once.
 
-                    def f():
-                        return partial(eval_binary_expr, dx, ops[2], float(ops[3]))()
+    Parameters
+    ----------
+    break_conditions : List of dictionaries containing:
+            "channel": Gettable parameter to check
+            "break_condition": String specifying the break condition, same syntax
+                    as for _interpret_breaks.
 
-                else:
-                    f = return_false
-        else:
-            raise NotImplementedError("NOT IMPLEMENTED")
-        conditions.append(f)
-    return check_conditions(conditions) if conditions else None
+    Returns
+    -------
+    Callable
+        Function getting the results of a line as list of (parameter, array) tuples,
+        as returned by readout_buffers. Returns the index of the first point fulfilling
+        any break condition or None, if no break condition is fulfilled.
+        Channels that are not part of the results are not checked.
+    """
+    conditions = BreakConditions(break_conditions)
+    return conditions.check_line if conditions else None
@@ -26,24 +26,31 @@ import copy
 import inspect
 import json
 import logging
+import os
+import queue
+import threading
 from abc import ABC, abstractmethod
 from collections.abc import MutableSequence
-from contextlib import suppress
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
 from datetime import datetime
 from functools import wraps
+from time import monotonic, sleep
 from typing import Any, Callable
 
 import numpy as np
 import qcodes as qc
 from qcodes import Station
-from qcodes.dataset import AbstractSweep, LinSweep
+from qcodes.dataset import AbstractSweep, LinSweep, load_by_id
+from qcodes.dataset.data_set import DataSet
 from qcodes.dataset.dond.do_nd_utils import ActionsT
+from qcodes.dataset.measurements import DataSaver
 from qcodes.parameters import Parameter, ParameterBase
 
-from qumada.instrument.buffers import is_bufferable, is_triggerable
+from qumada.instrument.buffers import RunningAverage, is_bufferable, is_triggerable
 from qumada.metadata import Metadata
-from qumada.utils.ramp_parameter import ramp_or_set_parameter
-from qumada.utils.utils import flatten_array
+from qumada.utils.ramp_parameter import ramp_or_set_parameter, ramp_or_set_parameters
+from qumada.utils.utils import ravel_array
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +59,12 @@ def is_measurement_script(o):
     return inspect.isclass(o) and issubclass(o, MeasurementScript)
 
 
+def _stop_and_read_buffer(buffer) -> dict:
+    """Stops the buffer and returns its data."""
+    buffer.stop()
+    return buffer.read()
+
+
 class QtoolsStation(Station):
     """Station object, inherits from qcodes Station."""
 
@@ -120,6 +133,10 @@ class MeasurementScript(ABC):
         self.properties: dict[Any, Any] = {}
         self.gate_parameters: dict[Any, dict[Any, Parameter | None] | Parameter | None] = {}
         self._buffered_num_points: int | None = None
+        self._checkpoint: dict | None = None
+        self._pending_buffer_data: dict = {}  # Data read by read_available_buffers, not yet returned
+        self._dataset_writers: list[DatasetWriter] = []  # Writers closed in clean_up
+        self._variance_parameters: dict[Parameter, Parameter] = {}  # See variance_parameters
 
     def add_gate_parameter(self, parameter_name: str, gate_name: str = None, parameter: Parameter = None) -> None:
         """
@@ -201,6 +218,20 @@ class MeasurementScript(ABC):
                 initialization and reset.
                 setpoint_intervalle: Defines how smooth parameters are ramped
                 during initialization and reset.
+                concurrent_readout: If True, buffers of different instruments
+                are stopped and read in parallel. Default False.
+                ramp_simultaneously: If True (default), all parameters are ramped
+                at once during initialization, else one after another.
+                hardware_ramp: If True, the instruments' _qumada_ramp methods are used
+                for simultaneous ramps during initialization. Only use it with
+                instruments, whose ramps are not triggered. Default False.
+                max_ramp_workers: Maximum number of instruments that are ramped
+                at the same time during initialization. Default None (no limit).
+                async_writer: If True, results are stored by a background thread
+                (see DatasetWriter), supported by Timetrace, Timetrace_with_sweeps
+                and Generic_2D_Sweep_buffered. Default False.
+                writer_queue_size: Maximum number of results waiting for the
+                background writer before the measurement blocks. Default 1000.
         """
         # TODO: Add settings to metadata
         self.metadata = metadata
@@ -492,16 +523,11 @@ class MeasurementScript(ABC):
         #         raise Exception(f"{item} is not in dynamic parameters and cannot be compensated!")
         # self.dynamic_sweeps = []
         self.compensating_sweeps = []
+        ramp_targets = {}
         for gate, parameters in self.gate_parameters.items():
             for parameter, channel in parameters.items():
                 if self.properties[gate][parameter]["type"].find("static") >= 0:
-                    ramp_or_set_parameter(
-                        channel,
-                        self.properties[gate][parameter]["value"],
-                        ramp_rate=ramp_rate,
-                        ramp_time=ramp_time,
-                        setpoint_intervall=setpoint_intervall,
-                    )
+                    ramp_targets[channel] = self.properties[gate][parameter]["value"]
                 elif self.properties[gate][parameter]["type"].find("dynamic") >= 0:
                     if self.properties[gate][parameter].get("_is_triggered", False) and self.buffered:
                         if "num_points" in self.properties[gate][parameter].keys():
@@ -574,47 +600,17 @@ class MeasurementScript(ABC):
                     # Handle different possibilities for starting points
                     if dyn_ramp_to_val or channel in inactive_dyn_channels:
                         try:
-                            ramp_or_set_parameter(
-                                channel,
-                                self.properties[gate][parameter]["value"],
-                                ramp_rate=ramp_rate,
-                                ramp_time=ramp_time,
-                                setpoint_intervall=setpoint_intervall,
-                            )
+                            ramp_targets[channel] = self.properties[gate][parameter]["value"]
                         except KeyError:
                             try:
-                                ramp_or_set_parameter(
-                                    channel,
-                                    self.properties[gate][parameter]["start"],
-                                    ramp_rate=ramp_rate,
-                                    ramp_time=ramp_time,
-                                    setpoint_intervall=setpoint_intervall,
-                                )
+                                ramp_targets[channel] = self.properties[gate][parameter]["start"]
                             except KeyError:
-                                ramp_or_set_parameter(
-                                    channel,
-                                    self.properties[gate][parameter]["setpoints"][0],
-                                    ramp_rate=ramp_rate,
-                                    ramp_time=ramp_time,
-                                    setpoint_intervall=setpoint_intervall,
-                                )
+                                ramp_targets[channel] = self.properties[gate][parameter]["setpoints"][0]
                     else:
                         try:
-                            ramp_or_set_parameter(
-                                channel,
-                                self.properties[gate][parameter]["start"],
-                                ramp_rate=ramp_rate,
-                                ramp_time=ramp_time,
-                                setpoint_intervall=setpoint_intervall,
-                            )
+                            ramp_targets[channel] = self.properties[gate][parameter]["start"]
                         except KeyError:
-                            ramp_or_set_parameter(
-                                channel,
-                                self.properties[gate][parameter]["setpoints"][0],
-                                ramp_rate=ramp_rate,
-                                ramp_time=ramp_time,
-                                setpoint_intervall=setpoint_intervall,
-                            )
+                            ramp_targets[channel] = self.properties[gate][parameter]["setpoints"][0]
 
                     # Generate sweeps from parameters
         self.active_compensated_channels = []
@@ -699,16 +695,30 @@ class MeasurementScript(ABC):
                             # if min(self.compensating_sweeps[-1].get_setpoints()) < min(*self.compensating_limits[i]) \
                             #  or max(self.compensating_sweeps[-1].get_setpoints()) > max(*self.compensating_limits[i]):
                             #     raise Exception(f"Value for compensating gate {compensating_param} exceeds limits!")
-                        ramp_or_set_parameter(
-                            channel,
-                            self.properties[gate][parameter]["value"],
-                            ramp_rate=ramp_rate,
-                            ramp_time=ramp_time,
-                            setpoint_intervall=setpoint_intervall,
-                        )
+                        ramp_targets[channel] = self.properties[gate][parameter]["value"]
                     except ValueError as e:
                         raise e
 
+        if self.settings.get("ramp_simultaneously", True):
+            ramp_or_set_parameters(
+                list(ramp_targets.keys()),
+                list(ramp_targets.values()),
+                ramp_rate=ramp_rate,
+                ramp_time=ramp_time,
+                setpoint_intervall=setpoint_intervall,
+                use_hardware_ramp=self.settings.get("hardware_ramp", False),
+                max_workers=self.settings.get("max_ramp_workers", None),
+            )
+        else:
+            for channel, target in ramp_targets.items():
+                ramp_or_set_parameter(
+                    channel,
+                    target,
+                    ramp_rate=ramp_rate,
+                    ramp_time=ramp_time,
+                    setpoint_intervall=setpoint_intervall,
+                )
+
         if self.buffered:
             for gettable_param in list(set(self.gettable_channels) - set(self.static_gettable_channels)):
                 if is_bufferable(gettable_param):
@@ -779,6 +789,9 @@ class MeasurementScript(ABC):
                 List of functions to be called after the measurement is
                 complete. Defaults to None.
         """
+        for writer in self._dataset_writers:
+            writer.close()
+        self._dataset_writers.clear()
         for buffer in self.buffers:
             buffer.unsubscribe(buffer._subscribed_parameters)
         self.measurement_name = None
@@ -786,15 +799,136 @@ class MeasurementScript(ABC):
             for action in additional_actions:
                 action()
 
-    def ready_buffers(self, **kwargs) -> None:
+    def save_checkpoint(self, **state) -> None:
+        """
+        Stores the progress of the measurement in the file given by the setting
+        "checkpoint_file". Does nothing if no checkpoint_file is set. Besides the state
+        passed as kwargs (e.g. run_id of the dataset, next line and setpoints of the last
+        completed line), the name of the script and all JSON serializable settings are
+        stored. The file is replaced atomically, so it is never left incomplete.
+        """
+        path = self.settings.get("checkpoint_file")
+        if path is None:
+            return
+        settings = {}
+        for key, value in self.settings.items():
+            try:
+                json.dumps(value)
+            except TypeError:
+                continue
+            settings[key] = value
+        checkpoint = {"script": type(self).__name__, "settings": settings, **state}
+        with open(f"{path}.tmp", "w") as file:
+            json.dump(checkpoint, file, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def save_checkpoint_when_stored(self, datasaver: DatasetWriter, **state) -> None:
+        """
+        Saves the checkpoint (see save_checkpoint) once the datasaver has written all
+        results added so far to the database. An interrupted measurement thus never has
+        a checkpoint listing lines that are missing in its dataset.
+        """
+        if self.settings.get("checkpoint_file") is None:
+            return
+        datasaver.call_when_stored(lambda: self.save_checkpoint(**state))
+
+    def resume(self, checkpoint_file: str | None = None, **kwargs):
+        """
+        Continues an interrupted measurement from its checkpoint (see save_checkpoint),
+        appending the remaining lines to the dataset of the checkpoint. The script has to
+        be set up and mapped as for the interrupted measurement. The settings stored in the
+        checkpoint replace the current ones, settings that could not be stored (e.g. trigger
+        methods) are kept. Supported by Generic_2D_Sweep_buffered and
+        Generic_nD_Sweep_buffered.
+
+        Args:
+            checkpoint_file (str | None): Checkpoint to resume from. Defaults to the
+                setting "checkpoint_file".
+            kwargs: Passed to run().
+        """
+        path = checkpoint_file or self.settings.get("checkpoint_file")
+        with open(path) as file:
+            checkpoint = json.load(file)
+        if checkpoint["script"] != type(self).__name__:
+            raise Exception(f"The checkpoint was created by {checkpoint['script']}, not by {type(self).__name__}.")
+        if checkpoint.get("finished", False):
+            raise Exception(f"The measurement of {path} is already finished.")
+        self.settings.update(checkpoint["settings"])
+        self.settings["checkpoint_file"] = path
+        self._checkpoint = checkpoint
+        try:
+            return self.run(**kwargs)
+        finally:
+            self._checkpoint = None
+
+    def _verify_checkpoint(self, setpoints: dict) -> None:
+        """
+        Raises an exception if the setpoints of the last completed line of the measurement
+        differ from the ones stored in the checkpoint, e.g. because the sweeps were changed.
+        """
+        stored = self._checkpoint.get("setpoints", {})
+        if stored.keys() != setpoints.keys() or not np.allclose(
+            [stored[name] for name in setpoints], list(setpoints.values())
+        ):
+            raise Exception(f"Setpoints {setpoints} of the measurement do not match the checkpoint {stored}.")
+
+    def dataset_writer(self, measurement, background: bool | None = None, **run_kwargs) -> DatasetWriter:
+        """
+        Returns a DatasetWriter running the measurement, configured by the settings
+        "async_writer" and "writer_queue_size". Use it as context manager instead of
+        measurement.run(). Writers that were not closed before are flushed and
+        closed in clean_up. When resuming from a checkpoint, the results are appended
+        to the dataset of the checkpoint instead.
+
+        Args:
+            measurement: QCoDeS measurement with all parameters registered.
+            background (bool | None): Overrides the setting "async_writer".
+            run_kwargs: Kwargs passed to measurement.run().
+        """
+        if background is None:
+            background = self.settings.get("async_writer", False)
+        if self._checkpoint is not None:
+            measurement = ResumedMeasurement(self._checkpoint["run_id"], write_period=measurement.write_period)
+        writer = DatasetWriter(
+            measurement,
+            maxsize=self.settings.get("writer_queue_size", 1000),
+            background=background,
+            **run_kwargs,
+        )
+        self._dataset_writers.append(writer)
+        return writer
+
+    def ready_buffers(self, buffer_settings: dict | None = None, **kwargs) -> None:
         """
         Setup all buffers registered in the measurement and start them.
+        Uses the buffer_settings of the script, unless other buffer_settings are passed,
+        e.g. for a single line with less points.
         """
+        if buffer_settings is None:
+            buffer_settings = self.buffer_settings
+        self._pending_buffer_data = {}
         for buffer in self.buffers:
-            buffer.setup_buffer(settings=self.buffer_settings)
+            buffer.setup_buffer(settings=buffer_settings)
             buffer.start()
         for trigger in self.trigger_ins:
-            trigger.setup_trigger_in(trigger_settings=self.buffer_settings)
+            trigger.setup_trigger_in(trigger_settings=buffer_settings)
+
+    def wait_for_buffers(self, timeout: float | None = None) -> None:
+        """
+        Blocks until all buffers registered in the measurement are finished.
+
+        Args:
+            timeout (float | None): Maximum time to wait for all buffers in s.
+                Waits forever if None (default).
+
+        Raises:
+            TimeoutError: If the buffers did not finish in time.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        for buffer in self.buffers:
+            remaining = None if deadline is None else max(deadline - monotonic(), 0)
+            if not buffer.wait_finished(timeout=remaining):
+                raise TimeoutError(f"Buffer {buffer} did not finish within {timeout} s.")
 
     def readout_buffers(self, **kwargs) -> dict:
         """
@@ -805,6 +939,9 @@ class MeasurementScript(ABC):
             **kwargs (dict):
                 timestamps (bool): Set True if timestamp data is to be included
                     in the results. Not implemented yet.
+                concurrent (bool): Stop and read all buffers in parallel, using one
+                    thread per buffered instrument. Defaults to the "concurrent_readout"
+                    setting of the script (False if not set).
 
         Returns:
             dict: Results, list with one tuple for each subscribed parameter.
@@ -812,15 +949,158 @@ class MeasurementScript(ABC):
 
         """
         # TODO: Handle multiple bursts etc.
-        data = {}
+        concurrent = kwargs.get("concurrent", self.settings.get("concurrent_readout", False))
+        buffers = list(self.buffers)
+        if concurrent and len(buffers) > 1:
+            # Every instrument has exactly one buffer, so the instruments' sessions are not shared between threads.
+            with ThreadPoolExecutor(max_workers=len(buffers), thread_name_prefix="qumada-readout") as executor:
+                data = dict(zip(buffers, executor.map(_stop_and_read_buffer, buffers)))
+        else:
+            data = {buffer: _stop_and_read_buffer(buffer) for buffer in buffers}
         results = []
+        for buffer in buffers:
+            for param in buffer._subscribed_parameters:
+                results.append((param, ravel_array(data[buffer][param.name])))
+        if kwargs.get("timestamps", False):
+            results.append(ravel_array(data[buffers[0]]["timestamps"]))
+        return results
+
+    def variance_parameters(self, software_averaged_only: bool = True) -> dict:
+        """
+        Returns a parameter for the variance of each buffered parameter that is
+        averaged in software by acquire_averaged. Register them in the measurement
+        to store the variances. Set software_averaged_only to False to include
+        parameters of buffers with HARDWARE_AVERAGING.
+        """
+        # Cached, so the same parameters are returned during the whole measurement
+        cache = self._variance_parameters
+        variance_parameters = {}
         for buffer in self.buffers:
-            buffer.stop()
-            data[buffer] = buffer.read()
+            if buffer.HARDWARE_AVERAGING and software_averaged_only:
+                continue
+            for param in buffer._subscribed_parameters:
+                if param not in cache:
+                    cache[param] = Parameter(
+                        f"{param.full_name}_variance",
+                        label=f"{param.label} variance",
+                        unit=f"{param.unit}^2" if param.unit else "",
+                    )
+                variance_parameters[param] = cache[param]
+        return variance_parameters
+
+    def acquire_averaged(
+        self,
+        start_burst: Callable[[], None],
+        repetitions: int,
+        prepare_burst: Callable[[], None] | None = None,
+    ) -> tuple[list, list]:
+        """
+        Acquires the same burst several times and returns the mean of all buffered parameters.
+        Buffers with HARDWARE_AVERAGING are set up once and average on the instrument
+        (buffer setting "repetitions"). All other buffers are read after each burst and
+        averaged with a RunningAverage, so only mean and variance are kept.
+        If all buffers average on the instrument, each burst has to be acquired (see
+        Buffer.wait_repetitions) before the next one is prepared.
+
+        Args:
+            start_burst (Callable): Called for each repetition after the buffers are ready.
+                Has to start the dynamic parameters and trigger the buffers.
+            repetitions (int): Number of bursts to average.
+            prepare_burst (Callable, optional): Called for each repetition before the
+                buffers are readied, e.g. to reset the trigger or the gates.
+
+        Returns:
+            tuple[list, list]: Mean of each subscribed parameter as list of tuples
+            (parameter, mean) as in readout_buffers and the variance of each parameter
+            averaged in software as list of tuples (variance parameter, variance),
+            see variance_parameters.
+        """
+        previous_repetitions = self.buffer_settings.get("repetitions")
+        self.buffer_settings["repetitions"] = int(repetitions)
+        buffers = list(self.buffers)
+        averages = {buffer: RunningAverage() for buffer in buffers if not buffer.HARDWARE_AVERAGING}
+        try:
+            for repetition in range(repetitions):
+                if prepare_burst is not None:
+                    prepare_burst()
+                if repetition == 0:
+                    self.ready_buffers()
+                else:
+                    for buffer in averages:
+                        buffer.setup_buffer(settings=self.buffer_settings)
+                        buffer.start()
+                start_burst()
+                if not averages:
+                    self._wait_repetition(buffers, repetition + 1)
+                for buffer, average in averages.items():
+                    buffer.wait_finished()
+                    average.add(_stop_and_read_buffer(buffer))
+            data = {}
+            for buffer in buffers:
+                if buffer not in averages:
+                    buffer.wait_finished()
+                    data[buffer] = _stop_and_read_buffer(buffer)
+        finally:
+            if previous_repetitions is None:
+                self.buffer_settings.pop("repetitions")
+            else:
+                self.buffer_settings["repetitions"] = previous_repetitions
+        variance_parameters = self.variance_parameters()
+        results = []
+        variances = []
+        for buffer in buffers:
             for param in buffer._subscribed_parameters:
-                results.append((param, flatten_array(data[buffer][param.name])))
+                if buffer in averages:
+                    results.append((param, ravel_array(averages[buffer].mean[param.name])))
+                    variances.append((variance_parameters[param], ravel_array(averages[buffer].variance[param.name])))
+                else:
+                    results.append((param, ravel_array(data[buffer][param.name])))
+        return results, variances
+
+    def _wait_repetition(self, buffers: list, repetitions: int) -> None:
+        """
+        Waits until all buffers acquired the given number of repetitions of the burst.
+        Buffers that cannot tell how many repetitions they acquired are given
+        _burst_duration for each burst.
+        """
+        counting = [buffer for buffer in buffers if buffer.num_acquired_repetitions() is not None]
+        for buffer in counting:
+            buffer.wait_repetitions(repetitions)
+        if len(counting) < len(buffers):
+            sleep(self._burst_duration)
+
+    def read_available_buffers(self, **kwargs) -> list:
+        """
+        Streaming counterpart of readout_buffers. Reads the data acquired since the last
+        call from all buffers without stopping them. Only as many points as are available
+        from every buffer are returned, the rest is kept for the next call.
+        All buffers have to support streaming (see Buffer.read_available).
+
+        Args:
+            **kwargs (dict):
+                timestamps (bool): Set True to append the timestamps of the first
+                    buffer to the results.
+
+        Returns:
+            list: Results, one tuple (parameter, measurement_data) for each subscribed
+            parameter as in readout_buffers.
+        """
+        buffers = list(self.buffers)
+        pending = self._pending_buffer_data
+        for buffer in buffers:
+            data = {key: ravel_array(values) for key, values in buffer.read_available().items()}
+            if buffer in pending:
+                data = {key: np.concatenate((pending[buffer][key], values)) for key, values in data.items()}
+            pending[buffer] = data
+        num_points = min((len(pending[buffer]["timestamps"]) for buffer in buffers), default=0)
+        results = []
+        for buffer in buffers:
+            for param in buffer._subscribed_parameters:
+                results.append((param, pending[buffer][param.name][:num_points]))
         if kwargs.get("timestamps", False):
-            results.append(flatten_array(data[list(data.keys())[0]]["timestamps"]))
+            results.append(pending[buffers[0]]["timestamps"][:num_points])
+        for buffer in buffers:
+            pending[buffer] = {key: values[num_points:] for key, values in pending[buffer].items()}
         return results
 
     def _relabel_instruments(self) -> None:
@@ -921,3 +1201,330 @@ class CustomSweep(AbstractSweep):
     @property
     def post_actions(self) -> ActionsT:
         return self._post_actions
+
+
+class ResumedMeasurement:
+    """
+    Replacement of a QCoDeS measurement appending results to an existing dataset, e.g. to
+    continue an interrupted measurement. A completed dataset is reopened for writing
+    until the run ends, a dataset that was never completed (e.g. after a crash) is
+    marked completed at the end of the run. Use run() as for a QCoDeS measurement,
+    parameters cannot be registered, the parameters of the dataset are used.
+
+    Args:
+        run_id: Run id of the dataset.
+        write_period: Time in s after which results are written to the database. Default 5.
+    """
+
+    def __init__(self, run_id: int, write_period: float = 5.0):
+        self.run_id = run_id
+        self.write_period = write_period
+
+    @contextmanager
+    def run(self, **kwargs):
+        if kwargs:
+            # E.g. write_in_background, the existing dataset has no background writer
+            raise TypeError(f"Resumed measurements do not support the arguments {', '.join(kwargs)}.")
+        # The in-memory cache of an existing dataset cannot be extended, results are only
+        # written to the database.
+        dataset = DataSet(run_id=self.run_id, in_memory_cache=False)
+        # QCoDeS does not allow writing to completed datasets. Resetting the flag only
+        # affects this instance, the dataset stays completed in the database.
+        dataset.completed = False
+        datasaver = DataSaver(dataset=dataset, write_period=self.write_period, interdeps=dataset.description.interdeps)
+        try:
+            yield datasaver
+        finally:
+            datasaver.flush_data_to_database(block=True)
+            dataset.mark_completed()
+
+
+class ReadoutPipeline:
+    """
+    Background readout and storage of buffered measurement lines.
+
+    Moves readout_buffers() and datasaver.add_result() of one line into a
+    worker thread, so they can overlap with the preparation (e.g. setting the
+    slow axis, resetting the fast axis and settling) of the next line.
+    Buffers are re-armed only after their data was read, use
+    wait_for_readout() before calling ready_buffers() again.
+    Use a DatasetWriter writing in background as datasaver, as the SQLite
+    connection of a QCoDeS datasaver must not be used from the worker thread.
+
+    Args:
+        script: Measurement script whose buffers are read.
+        datasaver: DatasetWriter the results are added to.
+        maxsize: Maximum number of lines waiting for readout/storage. Submitting
+            further lines blocks until the worker catches up. Default 2.
+        process_results: Optional callable getting the submitted results and the
+            buffer results of a line. Returns both (possibly modified) for storage.
+            Called in the worker thread before wait_for_readout() returns, e.g. to
+            evaluate break conditions.
+        on_stored: Optional callable getting the submitted results and the buffer
+            results of a line after they were added to the datasaver, e.g. to save a
+            checkpoint. Called in the worker thread.
+        readout_kwargs: Kwargs passed to script.readout_buffers().
+    """
+
+    def __init__(
+        self,
+        script: MeasurementScript,
+        datasaver,
+        maxsize: int = 2,
+        process_results: Callable[[tuple, list], tuple[tuple, list]] | None = None,
+        on_stored: Callable[[tuple, list], None] | None = None,
+        **readout_kwargs,
+    ):
+        self._script = script
+        self._datasaver = datasaver
+        self._process_results = process_results
+        self._on_stored = on_stored
+        self._readout_kwargs = readout_kwargs
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._readout_done = threading.Event()
+        self._readout_done.set()
+        self._exception: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="qumada-readout", daemon=True)
+
+    def __enter__(self) -> ReadoutPipeline:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(raise_exception=exc_type is None)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def submit(self, *results: tuple) -> None:
+        """
+        Queues readout of the buffers of the line that just finished.
+        The buffer results are stored together with the provided results
+        (e.g. setpoints and static gettables) of this line.
+        """
+        self._raise_exception()
+        self._readout_done.clear()
+        self._queue.put(results)
+
+    def wait_for_readout(self, timeout: float | None = None) -> None:
+        """Blocks until the buffers of the last submitted line were read."""
+        if not self._readout_done.wait(timeout):
+            raise TimeoutError("Readout of the previous line did not finish in time.")
+        self._raise_exception()
+
+    def close(self, raise_exception: bool = True) -> None:
+        """Waits until all submitted lines were stored and stops the worker."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if raise_exception:
+            self._raise_exception()
+
+    def _raise_exception(self) -> None:
+        if self._exception is not None:
+            raise self._exception
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            if self._exception is not None:
+                # Drain queue after an error, so submit() does not block.
+                continue
+            try:
+                results = self._script.readout_buffers(**self._readout_kwargs)
+                if self._process_results is not None:
+                    job, results = self._process_results(job, results)
+                self._readout_done.set()
+                self._datasaver.add_result(*job, *results)
+                if self._on_stored is not None:
+                    self._on_stored(job, results)
+            except BaseException as ex:
+                logger.exception("Exception in readout pipeline")
+                self._exception = ex
+                self._readout_done.set()
+
+
+class DatasetWriter:
+    """
+    Background storage of measurement results.
+
+    Runs the QCoDeS measurement in a writer thread. add_result() only queues the results,
+    the writer thread passes them to its datasaver, so latency of the database (e.g. on
+    network drives) does not delay the acquisition loop. Queued points with the same scalar
+    parameters are combined into a single add_result() call. The queue is bounded: If the
+    writer falls behind, add_result() blocks until there is space again instead of using
+    more and more memory. All database access happens in the writer thread, as the SQLite
+    connection of a dataset must not be used from other threads.
+
+    Args:
+        measurement: QCoDeS measurement to run, with all parameters registered.
+        maxsize: Maximum number of queued add_result() calls. Default 1000.
+        max_batch_size: Maximum number of points combined into one add_result() call. Default 100.
+        background: If False, the measurement is run in the calling thread and results
+            are added directly. Default True.
+        run_kwargs: Kwargs passed to measurement.run().
+    """
+
+    def __init__(
+        self,
+        measurement,
+        maxsize: int = 1000,
+        max_batch_size: int = 100,
+        background: bool = True,
+        **run_kwargs,
+    ):
+        self._measurement = measurement
+        self._run_kwargs = run_kwargs
+        self._max_batch_size = max_batch_size
+        self._background = background
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._exception: BaseException | None = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="qumada-writer", daemon=True)
+        self._runner = None
+        self._dataset = None
+        self.datasaver = None
+        self.run_id: int | None = None
+
+    def __enter__(self) -> DatasetWriter:
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(raise_exception=exc_type is None, exc_info=(exc_type, exc_value, traceback))
+
+    @property
+    def dataset(self):
+        """The dataset of the measurement. Only available after close() when writing in background."""
+        if self._dataset is None and self.run_id is not None and not self._thread.is_alive():
+            # Load the dataset again, the writer's connection belongs to the writer thread
+            self._dataset = load_by_id(self.run_id)
+        return self._dataset
+
+    def start(self) -> None:
+        """Starts the measurement run."""
+        if not self._background:
+            self._runner = self._measurement.run(**self._run_kwargs)
+            self.datasaver = self._runner.__enter__()
+            self.run_id = self.datasaver.run_id
+            self._dataset = self.datasaver.dataset
+            return
+        self._thread.start()
+        self._started.wait()
+        self._raise_exception()
+
+    def add_result(self, *results: tuple) -> None:
+        """Queues results as accepted by datasaver.add_result(). Blocks while the queue is full."""
+        if not self._background:
+            self.datasaver.add_result(*results)
+            return
+        self._raise_exception()
+        self._queue.put(results)
+
+    def call_when_stored(self, callback: Callable[[], None]) -> None:
+        """
+        Calls callback once all results added so far are written to the database,
+        e.g. to save a checkpoint. When writing in background, the callback is queued
+        like the results and called in the writer thread, so this does not block.
+        """
+        if not self._background:
+            self.datasaver.flush_data_to_database(block=True)
+            callback()
+            return
+        self._raise_exception()
+        self._queue.put(callback)
+
+    def flush(self) -> None:
+        """Blocks until all queued results were added to the datasaver."""
+        if self._thread.is_alive():
+            self._queue.join()
+        self._raise_exception()
+
+    def close(self, raise_exception: bool = True, exc_info: tuple = (None, None, None)) -> None:
+        """Adds all queued results to the dataset and completes the measurement run."""
+        if self._runner is not None:
+            runner, self._runner = self._runner, None
+            runner.__exit__(*exc_info)
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        if raise_exception:
+            self._raise_exception()
+
+    def _raise_exception(self) -> None:
+        if self._exception is not None:
+            raise self._exception
+
+    @staticmethod
+    def _is_scalar_point(results: tuple) -> bool:
+        return all(np.ndim(value) == 0 and isinstance(value, (int, float, np.number)) for _, value in results)
+
+    def _write_batch(self, batch: list) -> None:
+        """Writes the batch, callbacks of call_when_stored() after the results before them are in the database."""
+        start = 0
+        for i, item in enumerate(batch):
+            if callable(item):
+                self._write(batch[start:i])
+                self.datasaver.flush_data_to_database(block=True)
+                item()
+                start = i + 1
+        self._write(batch[start:])
+
+    def _write(self, batch: list[tuple]) -> None:
+        """Adds the batch, consecutive scalar points of the same parameters are combined."""
+        i = 0
+        while i < len(batch):
+            parameters = [parameter for parameter, _ in batch[i]]
+            j = i + 1
+            if self._is_scalar_point(batch[i]):
+                while (
+                    j < len(batch)
+                    and [parameter for parameter, _ in batch[j]] == parameters
+                    and self._is_scalar_point(batch[j])
+                ):
+                    j += 1
+            if j - i == 1:
+                self.datasaver.add_result(*batch[i])
+            else:
+                values = np.array([[value for _, value in results] for results in batch[i:j]])
+                self.datasaver.add_result(*zip(parameters, values.T))
+            i = j
+
+    def _run(self) -> None:
+        try:
+            with self._measurement.run(**self._run_kwargs) as datasaver:
+                self.datasaver = datasaver
+                self.run_id = datasaver.run_id
+                self._started.set()
+                self._process_queue()
+        except BaseException as ex:
+            logger.exception("Exception in dataset writer")
+            self._exception = self._exception or ex
+        finally:
+            self._started.set()
+
+    def _process_queue(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._queue.get()]
+            while len(batch) < self._max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            num_items = len(batch)
+            if None in batch:
+                stop = True
+                batch = batch[: batch.index(None)]
+            try:
+                if self._exception is None:
+                    # Drop results after an error, so add_result() does not block.
+                    self._write_batch(batch)
+            except BaseException as ex:
+                logger.exception("Exception in dataset writer")
+                self._exception = ex
+            finally:
+                for _ in range(num_items):
+                    self._queue.task_done()
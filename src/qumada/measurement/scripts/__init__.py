@@ -25,7 +25,9 @@ from .generic_measurement import (
     Generic_1D_Sweep,
     Generic_1D_Sweep_buffered,
     Generic_2D_Sweep_buffered,
+    Generic_Adaptive_Sweep,
     Generic_nD_Sweep,
+    Generic_nD_Sweep_buffered,
     Generic_Pulsed_Measurement,
     Generic_Pulsed_Repeated_Measurement,
     Timetrace,
@@ -51,6 +53,8 @@ __all__ = [
     "Generic_1D_Hysteresis_buffered",
     "Generic_1D_parallel_asymm_Sweep",
     "Generic_2D_Sweep_buffered",
+    "Generic_nD_Sweep_buffered",
+    "Generic_Adaptive_Sweep",
     "Generic_Pulsed_Measurement",
     "Generic_Pulsed_Repeated_Measurement",
     "Timetrace",
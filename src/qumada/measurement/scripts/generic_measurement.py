@@ -22,29 +22,76 @@
 # - Sionludi Lab
 # - Tobias Hangleiter
 
+import json
 import logging
-from time import sleep, time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from time import perf_counter, sleep, time
 
 import numpy as np
 from qcodes.dataset import dond
 from qcodes.dataset.measurements import Measurement
+from qcodes.dataset.threading import SequentialParamsCaller, ThreadPoolParamsCaller
 from qcodes.parameters.specialized_parameters import ElapsedTimeParameter
 
-from qumada.instrument.buffers import is_bufferable
+from qumada.instrument.buffers import RunningAverage, is_bufferable
 from qumada.measurement.doNd_enhanced.doNd_enhanced import (
-    _dev_interpret_breaks,
+    SETTLE_MODES,
     _interpret_breaks,
+    _interpret_line_breaks,
     do1d_parallel,
     do1d_parallel_asym,
 )
-from qumada.measurement.measurement import CustomSweep, MeasurementScript
-from qumada.utils.ramp_parameter import ramp_or_set_parameter
+from qumada.measurement.measurement import (
+    CustomSweep,
+    MeasurementScript,
+    ReadoutPipeline,
+)
+from qumada.utils.adaptive_sampling import Learner1D, Learner2D
+from qumada.utils.ramp_parameter import ramp_or_set_parameters
+from qumada.utils.scheduler import FixedRateScheduler
 from qumada.utils.utils import _validate_mapping, naming_helper
 
 logger = logging.getLogger(__name__)
 
 
+@contextmanager
+def _parameter_reader(channels: list, use_threads: bool = True):
+    """
+    Returns a function reading all channels and returning (channel, value) tuples in the
+    order of channels. If use_threads is True, the channels of different instruments
+    are read in parallel using a thread pool with one thread per instrument.
+    """
+    caller = ThreadPoolParamsCaller(*channels) if use_threads and channels else SequentialParamsCaller(*channels)
+    with caller as call_channels:
+
+        def read_channels() -> list[tuple]:
+            values = dict(call_channels())
+            return [(channel, values[channel]) for channel in channels]
+
+        yield read_channels
+
+
+def _truncate_results(results, num_points: int) -> list[tuple]:
+    """Keeps only the first num_points of all array valued results."""
+    return [(param, value[:num_points]) if np.ndim(value) else (param, value) for param, value in results]
+
+
+def _line_setpoints(line_results) -> dict[str, float]:
+    """Setpoints of the stepped parameters of a line (all scalar results) by parameter name."""
+    return {param.full_name: float(value) for param, value in line_results if np.ndim(value) == 0}
+
+
 class Generic_1D_Sweep(MeasurementScript):
+    STRATEGIES = ["stepped", "threaded", "buffered", "auto"]
+    THREAD_OVERHEAD = 1e-3  # Estimated time in s to start the threads for each point
+    POINT_DURATION = 1e-3  # Default time in s to set or get a parameter once
+    READOUT_DURATION = 0.05  # Default time in s to read out one buffer after a sweep
+
+    def __init__(self):
+        super().__init__()
+        self._probed_durations: dict[tuple, float] = {}  # (parameter, set_value) -> duration, see _point_duration
+
     def run(self, **dond_kwargs) -> list:
         """
         Peform 1D sweeps for all dynamic parameters, one after another. Dynamic
@@ -67,6 +114,24 @@ class Generic_1D_Sweep(MeasurementScript):
                 log_idle_params[bool]: Record dynamic parameters that are kept constant
                                     during the sweeps of other parameters as gettable
                                     params. Default True.
+                strategy[str]: How the sweeps are performed. "stepped" sets and
+                                    measures point by point with dond, "threaded" does
+                                    the same with one thread per instrument, "buffered"
+                                    uses hardware ramps and buffers as in
+                                    Generic_1D_Sweep_buffered. "auto" estimates the
+                                    duration of each valid strategy for each sweep,
+                                    logs them and uses the fastest one. The plan is
+                                    stored in execution_plan. Default "stepped".
+                point_durations[dict]: Time in s to set or get a parameter once, by
+                                    full name of the parameter or name of its
+                                    instrument. None marks parameters that can only
+                                    be used buffered. Used by "auto". Default {}.
+                readout_duration[float]: Time in s to read out one buffer after a
+                                    sweep. Used by "auto". Default 0.05.
+                probe_durations[bool]: Measure the set and get durations that are
+                                    not in point_durations by setting the swept
+                                    parameter to its current value and reading each
+                                    channel once. Used by "auto". Default False.
 
         Returns
         -------
@@ -76,19 +141,56 @@ class Generic_1D_Sweep(MeasurementScript):
         """
         wait_time = self.settings.get("wait_time", 5)
         include_gate_name = self.settings.get("include_gate_name", True)
-        naming_helper(self, default_name="1D Sweep")
+        strategy = _validate_mapping(
+            self.settings.get("strategy", "stepped"), self.STRATEGIES, default="stepped", default_key_error="stepped"
+        )
+        measurement_name = naming_helper(self, default_name="1D Sweep")
         data = list()
+        self.buffered = strategy in ("buffered", "auto")
         self.generate_lists()
+        self.execution_plan = []
+        sweep_strategies = []
         for sweep, dynamic_parameter in zip(self.dynamic_sweeps, self.dynamic_parameters):
+            if strategy != "auto":
+                sweep_strategies.append(strategy)
+                continue
+            estimates = self.estimate_durations(sweep, self._measured_channels(sweep))
+            possible_strategies = [name for name, duration in estimates.items() if duration is not None]
+            if not possible_strategies:
+                raise Exception(f"{sweep.param} can neither be swept point by point nor buffered!")
+            sweep_strategy = min(possible_strategies, key=estimates.get)
+            sweep_strategies.append(sweep_strategy)
+            self.execution_plan.append({"gate": dynamic_parameter["gate"], "strategy": sweep_strategy, **estimates})
+            logger.info(
+                f"Estimated durations for sweep of {dynamic_parameter['gate']}: "
+                + ", ".join(
+                    f"{name}: {'not possible' if duration is None else f'{duration:.3g} s'}"
+                    for name, duration in estimates.items()
+                )
+                + f". Using {sweep_strategy}."
+            )
+        if "buffered" not in sweep_strategies:
+            # Nothing is measured with buffers, do not subscribe or unsubscribe them.
+            self.buffers = set()
+            self.trigger_ins = set()
+        for i, (sweep, dynamic_parameter, sweep_strategy) in enumerate(
+            zip(self.dynamic_sweeps, self.dynamic_parameters, sweep_strategies)
+        ):
             if include_gate_name:
-                self._measurement_name = f"{self.measurement_name} {dynamic_parameter['gate']}"
+                self._measurement_name = f"{measurement_name} {dynamic_parameter['gate']}"
             else:
-                self._measurement_name = self.measurement_name
-            if self.settings.get("log_idle_params", True):
-                idle_channels = [entry for entry in self.dynamic_channels if entry != sweep.param]
-                measured_channels = {*self.gettable_channels, *idle_channels}
-            else:
-                measured_channels = set(self.gettable_channels)
+                self._measurement_name = measurement_name
+            measured_channels = self._measured_channels(sweep)
+
+            self.buffered = sweep_strategy == "buffered"
+            if sweep_strategy == "buffered":
+                self.measurement_name = self._measurement_name
+                data.append(_run_buffered_1D_sweep(self, i))
+                self.measurement_name = measurement_name
+                continue
+            sweep_kwargs = dict(dond_kwargs)
+            if sweep_strategy == "threaded":
+                sweep_kwargs.setdefault("use_threads", True)
             inactive_channels = [chan for chan in self.dynamic_channels if chan != sweep.param]
             self.initialize(inactive_dyn_channels=inactive_channels)
             sleep(wait_time)
@@ -98,12 +200,103 @@ class Generic_1D_Sweep(MeasurementScript):
                     *measured_channels,
                     measurement_name=self._measurement_name,
                     break_condition=_interpret_breaks(self.break_conditions),
-                    **dond_kwargs,
+                    **sweep_kwargs,
                 )
             )
         self.clean_up()
         return data
 
+    def _measured_channels(self, sweep) -> set:
+        """Channels recorded during the sweep of sweep.param."""
+        if self.settings.get("log_idle_params", True):
+            idle_channels = [entry for entry in self.dynamic_channels if entry != sweep.param]
+            return {*self.gettable_channels, *idle_channels}
+        return set(self.gettable_channels)
+
+    def estimate_durations(self, sweep, measured_channels) -> dict[str, float | None]:
+        """
+        Estimates how long the sweep takes with each strategy. Strategies that
+        cannot be used for the sweep are None. The time to set or get a parameter
+        once is taken from the "point_durations" setting (by full name of the
+        parameter or name of its instrument) and defaults to POINT_DURATION.
+        Buffered sweeps take the burst duration plus the "readout_duration" per buffer.
+        Nothing is set or read, unless the "probe_durations" setting is True. Then
+        the set and get durations are measured once per parameter, the swept
+        parameter is set to its current value for this.
+        Initialization and wait_time are the same for all strategies and not included.
+        If a channel cannot be read point by point, only buffered sweeps are possible.
+        """
+        estimates = {"stepped": None, "threaded": None, "buffered": None}
+        if self._buffered_sweep_possible(sweep):
+            buffers = {
+                channel.root_instrument._qumada_buffer for channel in self.gettable_channels if is_bufferable(channel)
+            }
+            estimates["buffered"] = self._burst_duration + len(buffers) * self.settings.get(
+                "readout_duration", self.READOUT_DURATION
+            )
+        if not getattr(sweep.param, "settable", True) or not all(
+            getattr(channel, "gettable", True) for channel in measured_channels
+        ):
+            logger.info(f"{sweep.param} cannot be swept point by point.")
+            return estimates
+        num_points = len(sweep.get_setpoints())
+        try:
+            set_duration = self._point_duration(sweep.param, set_value=True)
+            get_durations = {channel: self._point_duration(channel) for channel in measured_channels}
+        except Exception as ex:
+            logger.info(f"{sweep.param} cannot be swept point by point: {ex}")
+            return estimates
+        if set_duration is None or None in get_durations.values():
+            logger.info(f"{sweep.param} cannot be swept point by point.")
+            return estimates
+        step_duration = sweep.delay + set_duration
+        instrument_durations = defaultdict(float)
+        for channel, duration in get_durations.items():
+            instrument_durations[channel.root_instrument] += duration
+        estimates["stepped"] = num_points * (step_duration + sum(instrument_durations.values()))
+        estimates["threaded"] = num_points * (
+            step_duration + max(instrument_durations.values(), default=0) + self.THREAD_OVERHEAD
+        )
+        return estimates
+
+    def _point_duration(self, parameter, set_value: bool = False) -> float | None:
+        """
+        Time in s to get (or set) the parameter once, None if it cannot be used
+        point by point. Configured durations take precedence, probed durations
+        are cached for the lifetime of the script.
+        """
+        point_durations = self.settings.get("point_durations", {})
+        for key in (parameter.full_name, parameter.root_instrument.name):
+            if key in point_durations:
+                return None if point_durations[key] is None else float(point_durations[key])
+        if not self.settings.get("probe_durations", False):
+            return self.POINT_DURATION
+        probed = self._probed_durations
+        if (parameter, set_value) not in probed:
+            start = perf_counter()
+            value = parameter.get()
+            if set_value:
+                start = perf_counter()
+                parameter.set(value)
+            probed[(parameter, set_value)] = perf_counter() - start
+        return probed[(parameter, set_value)]
+
+    def _buffered_sweep_possible(self, sweep) -> bool:
+        """
+        Checks if the sweep can be done with a hardware ramp and buffered gettables.
+        """
+        instrument = sweep.param.root_instrument
+        return (
+            getattr(self, "_burst_duration", None) is not None
+            and len(sweep.get_setpoints()) == getattr(self, "buffered_num_points", None)
+            and hasattr(instrument, "_qumada_ramp")
+            and all(
+                is_bufferable(channel)
+                for channel in self.gettable_channels
+                if channel not in self.static_gettable_channels
+            )
+        )
+
 
 class Generic_nD_Sweep(MeasurementScript):
     def run(self, **dond_kwargs):
@@ -142,14 +335,18 @@ class Generic_nD_Sweep(MeasurementScript):
             except Exception:
                 measurement_name = "measurement"
 
-        for sweep in self.dynamic_sweeps:
-            ramp_or_set_parameter(sweep._param, sweep.get_setpoints()[0])
+        ramp_or_set_parameters(
+            [sweep._param for sweep in self.dynamic_sweeps],
+            [sweep.get_setpoints()[0] for sweep in self.dynamic_sweeps],
+        )
         sleep(wait_time)
         data = dond(
             *tuple(self.dynamic_sweeps),
             *tuple(self.gettable_channels),
             measurement_name=measurement_name,
-            break_condition=_interpret_breaks(self.break_conditions),
+            break_condition=_interpret_breaks(
+                self.break_conditions, outer_parameters=[sweep.param for sweep in self.dynamic_sweeps[:-1]]
+            ),
             use_threads=True,
             **dond_kwargs,
         )
@@ -157,10 +354,98 @@ class Generic_nD_Sweep(MeasurementScript):
         return data
 
 
+class Generic_Adaptive_Sweep(MeasurementScript):
+    """
+    1D or 2D sweep of one or two dynamic parameters with adaptively chosen setpoints.
+    Starts with a coarse grid and refines it where the gettables change most, e.g. at
+    the pinch-off of a channel or the transitions of a charge stability diagram (see
+    qumada.utils.adaptive_sampling). The setpoints of the dynamic parameters define the
+    finest possible resolution, all measured points are part of this grid.
+    The points are stored in the order they are measured, so the dataset is not on a
+    regular grid. Break conditions are not supported.
+    kwargs:
+        wait_time: Wait time between initialization and the measurement. Default 5.
+        loss: "gradient" (default) refines where the gettables change fastest,
+            "curvature" where their slope changes (1D only).
+        loss_goal: The measurement stops when the largest loss drops below this
+            value. Default 0.01.
+        max_points: Maximum number of points measured. Default is the number of
+            points of the full grid.
+        initial_points: Number of equidistant setpoints per dynamic parameter
+            measured first. Default 9.
+        batch_size: Number of points measured before the setpoints are refined
+            again, sorted by the setpoints of the first dynamic parameter. Default 10.
+        use_threads: Reads the gettables of different instruments in parallel,
+            one thread per instrument. Default True.
+    """
+
+    def run(self):
+        self.buffered = False
+        self.initialize()
+        if len(self.dynamic_sweeps) not in (1, 2):
+            raise Exception("Adaptive sweeps require one or two dynamic parameters.")
+        wait_time = self.settings.get("wait_time", 5)
+        loss = _validate_mapping(
+            self.settings.get("loss"), Learner1D.LOSSES, default="gradient", default_key_error="gradient"
+        )
+        loss_goal = self.settings.get("loss_goal", 0.01)
+        batch_size = self.settings.get("batch_size", 10)
+        dynamic_channels = [sweep.param for sweep in self.dynamic_sweeps]
+        gettables = [channel for channel in self.gettable_channels if channel not in dynamic_channels]
+        setpoints = [sweep.get_setpoints() for sweep in self.dynamic_sweeps]
+        learner_kwargs = {
+            "num_channels": len(gettables),
+            "initial_points": self.settings.get("initial_points", 9),
+        }
+        if len(setpoints) == 1:
+            learner = Learner1D(setpoints[0], loss=loss, **learner_kwargs)
+        else:
+            if loss != "gradient":
+                logger.warning(f'Loss "{loss}" is not supported for 2D sweeps. Using "gradient".')
+            learner = Learner2D(setpoints, **learner_kwargs)
+        max_points = self.settings.get("max_points", int(np.prod(learner.shape)))
+        delay = max(sweep.delay for sweep in self.dynamic_sweeps)
+
+        naming_helper(self, default_name="Adaptive Sweep")
+        meas = Measurement(name=self.measurement_name)
+        for channel in dynamic_channels:
+            meas.register_parameter(channel)
+        for channel in gettables:
+            meas.register_parameter(channel, setpoints=dynamic_channels)
+        sleep(wait_time)
+        reader = _parameter_reader(gettables, self.settings.get("use_threads", True))
+        with self.dataset_writer(meas) as datasaver, reader as read_gettables:
+            while learner.npoints < max_points and learner.loss() > loss_goal:
+                points = learner.ask(min(batch_size, max_points - learner.npoints))
+                if not points:
+                    break
+                for point in points:
+                    set_values = list(zip(dynamic_channels, np.atleast_1d(point)))
+                    for channel, value in set_values:
+                        channel.set(value)
+                    sleep(delay)
+                    results = read_gettables()
+                    learner.tell(point, [value for _, value in results])
+                    datasaver.add_result(*set_values, *results)
+        dataset = datasaver.dataset
+        logger.info(f"Adaptive sweep finished after {learner.npoints} points with a loss of {learner.loss():.3g}.")
+        dataset.add_metadata("adaptive_points", learner.npoints)
+        dataset.add_metadata("adaptive_loss", learner.loss())
+        self.clean_up()
+        return dataset
+
+
 class Generic_1D_parallel_asymm_Sweep(MeasurementScript):
     """
     Sweeps all dynamic parameters in parallel, setpoints of first parameter are
     used for all parameters.
+    kwargs:
+        settle_mode: "per_parameter" (default) waits the delay of the first sweep
+            after setting each parameter. "single" sets all parameters, those of
+            different instruments concurrently, and waits only once per point.
+        settle_model: Function of a parameter and its step size returning the
+            settle time of the parameter, used with settle_mode "single" instead
+            of the delay. Default None.
     """
 
     def run(self, **do1d_kwargs):
@@ -168,10 +453,17 @@ class Generic_1D_parallel_asymm_Sweep(MeasurementScript):
         self.initialize()
         backsweep_after_break = self.settings.get("backsweep_after_break", False)
         wait_time = self.settings.get("wait_time", 5)
-        dynamic_params = list()
-        for sweep in self.dynamic_sweeps:
-            ramp_or_set_parameter(sweep._param, sweep.get_setpoints()[0])
-            dynamic_params.append(sweep.param)
+        settle_mode = _validate_mapping(
+            self.settings.get("settle_mode"),
+            SETTLE_MODES,
+            default="per_parameter",
+            default_key_error="per_parameter",
+        )
+        dynamic_params = [sweep.param for sweep in self.dynamic_sweeps]
+        ramp_or_set_parameters(
+            [sweep._param for sweep in self.dynamic_sweeps],
+            [sweep.get_setpoints()[0] for sweep in self.dynamic_sweeps],
+        )
         sleep(wait_time)
         data = do1d_parallel_asym(
             *tuple(self.gettable_channels),
@@ -181,6 +473,8 @@ class Generic_1D_parallel_asymm_Sweep(MeasurementScript):
             measurement_name=self.measurement_name,
             break_condition=_interpret_breaks(self.break_conditions),
             backsweep_after_break=backsweep_after_break,
+            settle_mode=settle_mode,
+            settle_model=self.settings.get("settle_model"),
             **do1d_kwargs,
         )
         self.clean_up()
@@ -198,10 +492,11 @@ class Generic_1D_parallel_Sweep(MeasurementScript):
         naming_helper(self, default_name="Parallel 1D Sweep")
         backsweep_after_break = self.settings.get("backsweep_after_break", False)
         wait_time = self.settings.get("wait_time", 5)
-        dynamic_params = list()
-        for sweep in self.dynamic_sweeps:
-            ramp_or_set_parameter(sweep._param, sweep.get_setpoints()[0])
-            dynamic_params.append(sweep.param)
+        dynamic_params = [sweep.param for sweep in self.dynamic_sweeps]
+        ramp_or_set_parameters(
+            [sweep._param for sweep in self.dynamic_sweeps],
+            [sweep.get_setpoints()[0] for sweep in self.dynamic_sweeps],
+        )
         sleep(wait_time)
         data = do1d_parallel(
             *tuple(self.gettable_channels),
@@ -209,7 +504,7 @@ class Generic_1D_parallel_Sweep(MeasurementScript):
             setpoints=self.dynamic_sweeps[0].get_setpoints(),
             delay=self.dynamic_sweeps[0]._delay,
             measurement_name=self.measurement_name,
-            break_condition=lambda x: _dev_interpret_breaks(self.break_conditions, x),
+            break_condition=_interpret_breaks(self.break_conditions),
             backsweep_after_break=backsweep_after_break,
             **do1d_kwargs,
         )
@@ -221,11 +516,19 @@ class Timetrace(MeasurementScript):
     """
     Timetrace measurement, duration and timestep can be set as keyword-arguments,
     both in seconds.
-    Be aware that the timesteps can vary as the time it takes to record a
-    datapoint is not constant, the argument only sets the wait time. However,
-    the recorded "elapsed time" is accurate.
+    The datapoints are recorded at fixed times (multiples of timestep after the start),
+    independent of the time it takes to record a datapoint. If recording takes longer
+    than the timestep, deadlines are missed and handled according to
+    missed_deadline_policy. Missed deadlines are reported after the measurement
+    and stored in the metadata of the dataset. The recorded "elapsed time" is accurate.
     kwargs:
         auto_naming: Renames measurement automatically to Timetrace if True.
+        async_writer: Stores the results in a background thread, so database
+            latency does not delay the next datapoint. Default False.
+        missed_deadline_policy: "skip" (default) skips missed datapoints to keep
+            the sampling rate, "catch_up" records them as fast as possible.
+        use_threads: Reads the parameters of different instruments in parallel,
+            one thread per instrument. Default False.
 
     """
 
@@ -233,6 +536,13 @@ class Timetrace(MeasurementScript):
         self.initialize(dyn_ramp_to_val=True)
         duration = self.settings.get("duration", 300)
         timestep = self.settings.get("timestep", 1)
+        policy = _validate_mapping(
+            self.settings.get("missed_deadline_policy"),
+            FixedRateScheduler.POLICIES,
+            default="skip",
+            default_key_error="skip",
+        )
+        scheduler = FixedRateScheduler(timestep, duration, policy=policy)
         timer = ElapsedTimeParameter("time")
         naming_helper(self, default_name="Timetrace")
         meas = Measurement(name=self.measurement_name)
@@ -244,14 +554,17 @@ class Timetrace(MeasurementScript):
                     timer,
                 ],
             )
-        with meas.run() as datasaver:
+        channels = [*self.gettable_channels, *self.dynamic_channels]
+        use_threads = self.settings.get("use_threads", False)
+        with self.dataset_writer(meas) as datasaver, _parameter_reader(channels, use_threads) as read_channels:
             timer.reset_clock()
-            while timer() < duration:
+            for _ in scheduler:
                 now = timer()
-                results = [(channel, channel.get()) for channel in [*self.gettable_channels, *self.dynamic_channels]]
-                datasaver.add_result((timer, now), *results)
-                sleep(timestep)
+                datasaver.add_result((timer, now), *read_channels())
         dataset = datasaver.dataset
+        if scheduler.missed_deadlines:
+            logger.warning(scheduler.report())
+        dataset.add_metadata("missed_deadlines", scheduler.missed_deadlines)
         self.clean_up()
         return dataset
 
@@ -263,9 +576,17 @@ class Timetrace_buffered(MeasurementScript):
     Furthermore, you cannot use "manual" triggering mode as now ramp is started.
     It is fine to use software triggering here, as long as only one buffered
     instrument is used, else you should use "hardware".
+    For long timetraces, use streaming and split the duration into several bursts
+    (buffer settings "num_bursts" or "burst_duration"). Completed bursts are then
+    read and stored while the acquisition continues, so the trace is not limited
+    by the buffer length of the instruments.
 
     kwargs:
         auto_naming: Renames measurement automatically to Timetrace if True.
+        streaming: Store the data while the buffers are running. Requires buffers
+            supporting streaming. Default False.
+        streaming_interval: Time in s between two reads of the buffers when
+            streaming. Default 0.1.
 
     """
 
@@ -283,10 +604,14 @@ class Timetrace_buffered(MeasurementScript):
             default="software",
             default_key_error="software",
         )
+        streaming = self.settings.get("streaming", False)
+        streaming_interval = self.settings.get("streaming_interval", 0.1)
         self.buffered = True
         datasets = []
 
         self.generate_lists()
+        if streaming and not all(buffer.SUPPORTS_STREAMING for buffer in self.buffers):
+            raise Exception("Streaming is not supported by all buffers of the measurement.")
         naming_helper(self, default_name="Timetrace")
         meas = Measurement(name=self.measurement_name)
 
@@ -300,7 +625,7 @@ class Timetrace_buffered(MeasurementScript):
             )
         # Block required to log gettable and static parameters that are not
         # buffarable (e.g. Dac Channels)
-        static_gettables = []
+        static_values = []
         del_channels = []
         del_params = []
         for parameter, channel in zip(self.gettable_parameters, self.gettable_channels):
@@ -321,7 +646,7 @@ class Timetrace_buffered(MeasurementScript):
                     ],
                 )
                 parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
+                static_values.append((channel, parameter_value))
             else:
                 raise Exception(f"{channel} cannot be buffered and is not static gettable")
         for channel in del_channels:
@@ -330,7 +655,16 @@ class Timetrace_buffered(MeasurementScript):
             self.gettable_parameters.remove(param)
         for parameter, channel in zip(self.dynamic_parameters, self.dynamic_channels):
             parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-            static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
+            static_values.append((channel, parameter_value))
+
+        def add_results(results):
+            timestamps = results.pop(-1)
+            datasaver.add_result(
+                (timer, timestamps),
+                *results,
+                *((channel, np.full(len(timestamps), value)) for channel, value in static_values),
+            )
+
         with meas.run() as datasaver:
             # start = timer.reset_clock()
             self.ready_buffers()
@@ -349,20 +683,26 @@ class Timetrace_buffered(MeasurementScript):
                 for buffer in self.buffers:
                     buffer.force_trigger()
 
-            while not all(buffer.is_finished() for buffer in list(self.buffers)):
-                sleep(0.1)
+            if streaming:
+                finished = False
+                while not finished:
+                    # Check before reading, so the last read gets all remaining data
+                    finished = all(buffer.is_finished() for buffer in self.buffers)
+                    results = self.read_available_buffers(timestamps=True)
+                    if len(results[-1]):
+                        add_results(results)
+                    if not finished:
+                        sleep(streaming_interval)
+            else:
+                self.wait_for_buffers()
             try:
                 trigger_reset()
             except Exception:
                 print("No method to reset the trigger defined.")
 
-            results = self.readout_buffers(timestamps=True)
-            # TODO: Append values from other dynamic parameters
-            datasaver.add_result(
-                (timer, results.pop(-1)),
-                *results,
-                *static_gettables,
-            )
+            if not streaming:
+                # TODO: Append values from other dynamic parameters
+                add_results(self.readout_buffers(timestamps=True))
             datasets.append(datasaver.dataset)
             self.clean_up()
         return datasets
@@ -372,9 +712,14 @@ class Timetrace_with_sweeps(MeasurementScript):
     """
     Timetrace measurement, duration and timestep can be set as keyword-arguments,
     both in seconds.
-    Be aware that the timesteps can vary as the time it takes to record a
-    datapoint is not constant, the argument only sets the wait time. However,
-    the recorded "elapsed time" is accurate.
+    The dynamic parameters are swept repeatedly until duration has passed. Before
+    each sweep, they are ramped back to their start values within timestep. All
+    points of a sweep share the time at which the sweep started. Unlike Timetrace,
+    the sweeps are not scheduled at fixed times, so the time between them depends
+    on how long a sweep takes.
+    kwargs:
+        use_threads: Reads the gettables of different instruments in parallel,
+            one thread per instrument. Default False.
     """
 
     def run(self):
@@ -391,18 +736,21 @@ class Timetrace_with_sweeps(MeasurementScript):
             setpoints.append(parameter)
         for parameter in self.gettable_channels:
             meas.register_parameter(parameter, setpoints=setpoints)
-        with meas.run() as datasaver:
+        reader = _parameter_reader(self.gettable_channels, self.settings.get("use_threads", False))
+        with self.dataset_writer(meas) as datasaver, reader as read_gettables:
             timer.reset_clock()
             while timer() < duration:
-                for sweep in self.dynamic_sweeps:
-                    ramp_or_set_parameter(sweep._param, sweep.get_setpoints()[0], ramp_time=timestep)
+                ramp_or_set_parameters(
+                    [sweep._param for sweep in self.dynamic_sweeps],
+                    [sweep.get_setpoints()[0] for sweep in self.dynamic_sweeps],
+                    ramp_time=timestep,
+                )
                 now = timer()
                 for i in range(0, len(self.dynamic_sweeps[0].get_setpoints())):
                     for sweep in self.dynamic_sweeps:
                         sweep._param.set(sweep.get_setpoints()[i])
                     set_values = [(sweep._param, sweep.get_setpoints()[i]) for sweep in self.dynamic_sweeps]
-                    results = [(channel, channel.get()) for channel in self.gettable_channels]
-                    datasaver.add_result((timer, now), *set_values, *results)
+                    datasaver.add_result((timer, now), *set_values, *read_gettables())
                 # sleep(timestep)
         dataset = datasaver.dataset
         self.clean_up()
@@ -460,7 +808,7 @@ class Timetrace_with_Sweeps_buffered(MeasurementScript):
             elif channel in self.static_gettable_channels:
                 meas.register_parameter(channel, setpoints=[timer, dyn_channel])
                 parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
+                static_gettables.append((channel, np.full(int(self.buffered_num_points), parameter_value)))
         start = time()
         with meas.run() as datasaver:
             try:
@@ -506,8 +854,7 @@ class Timetrace_with_Sweeps_buffered(MeasurementScript):
                         measurement instruments! Only recommended\
                         for debugging."
                     )
-                while not all(buffer.is_finished() for buffer in list(self.buffers)):
-                    sleep(0.1)
+                self.wait_for_buffers()
                 try:
                     trigger_reset()
                 except TypeError:
@@ -553,17 +900,7 @@ class Generic_1D_Sweep_buffered(MeasurementScript):
 
     def run(self):
         self.buffered = True
-        TRIGGER_TYPES = ["software", "hardware", "manual"]
-        trigger_start = self.settings.get("trigger_start", "manual")  # TODO: this should be set elsewhere
-        trigger_reset = self.settings.get("trigger_reset", None)
-        trigger_type = _validate_mapping(
-            self.settings.get("trigger_type"),
-            TRIGGER_TYPES,
-            default="software",
-            default_key_error="software",
-        )
         include_gate_name = self.settings.get("include_gate_name", True)
-        sync_trigger = self.settings.get("sync_trigger", None)
         datasets = []
         self.generate_lists()
         measurement_name = naming_helper(self, default_name="1D Sweep")
@@ -573,142 +910,160 @@ class Generic_1D_Sweep_buffered(MeasurementScript):
             # dynamic_sweep and dynamic_parameter are from copy and not
             # affected by changes made to parameter in original list!
             self.measurement_name = measurement_name
-            dynamic_parameter = self.dynamic_parameters[i]
             if include_gate_name:
-                self.measurement_name += f" {dynamic_parameter['gate']}"
-            self.properties[dynamic_parameter["gate"]][dynamic_parameter["parameter"]]["_is_triggered"] = True
+                self.measurement_name += f" {self.dynamic_parameters[i]['gate']}"
+            datasets.append(_run_buffered_1D_sweep(self, i))
+        return datasets
 
-            dynamic_param = self.dynamic_sweeps[i].param
-            inactive_channels = [chan for chan in self.dynamic_channels if chan != dynamic_param]
-            self.initialize(inactive_dyn_channels=inactive_channels)
-            meas = Measurement(name=self.measurement_name)
-            meas.register_parameter(dynamic_param)
-            for c_param in self.active_compensating_channels:
-                meas.register_parameter(
-                    c_param,
-                    setpoints=[
-                        dynamic_param,
-                    ],
-                )
-            static_gettables = []
-            for parameter, channel in zip(self.gettable_parameters, self.gettable_channels):
-                if is_bufferable(channel) and channel not in self.static_gettable_channels:
-                    meas.register_parameter(
-                        channel,
-                        setpoints=[
-                            dynamic_param,
-                        ],
-                    )
-                elif channel in self.static_gettable_channels:
-                    parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                    parameter_value = channel.get()
-                    static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
-            for parameter, channel in zip(self.dynamic_parameters, self.dynamic_channels):
-                if channel != dynamic_param:
-                    try:
-                        parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                    except KeyError:
-                        logger.error(
-                            "An idle dynamic parameter has no value assigned\
-                              and cannot be logged!"
-                        )
-                        break
-                    static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
-            for param in static_gettables:
-                meas.register_parameter(
-                    param[0],
-                    setpoints=[
-                        dynamic_param,
-                    ],
-                )
-            active_comping_sweeps = []
-            for j in range(len(self.active_compensating_channels)):
-                index = self.compensating_parameters.index(self.active_compensating_parameters[j])
-                active_comping_setpoints = self.compensating_parameters_values[index] + sum(
-                    [sweep.get_setpoints() for sweep in self.compensating_sweeps[j]]
-                )
-                if min(active_comping_setpoints) < min(self.compensating_limits[index]) or max(
-                    active_comping_setpoints
-                ) > max(self.compensating_limits[index]):
-                    raise Exception(f"Setpoints of {self.compensating_parameters[index]} exceed limits!")
-                sweep_delay = self.compensating_sweeps[j][-1]._delay
-                active_comping_sweeps.append(
-                    CustomSweep(
-                        param=self.active_compensating_channels[j],
-                        setpoints=active_comping_setpoints,
-                        delay=sweep_delay,
-                    )
-                )
 
-            meas.write_period = 0.5
+def _run_buffered_1D_sweep(script: MeasurementScript, i: int):
+    """
+    Performs the buffered 1D sweep of the i-th dynamic parameter of the script
+    with a hardware ramp and returns the dataset. Used by Generic_1D_Sweep_buffered
+    and by Generic_1D_Sweep, if it decides to do a sweep buffered.
+    """
+    TRIGGER_TYPES = ["software", "hardware", "manual"]
+    trigger_start = script.settings.get("trigger_start", "manual")  # TODO: this should be set elsewhere
+    trigger_reset = script.settings.get("trigger_reset", None)
+    trigger_type = _validate_mapping(
+        script.settings.get("trigger_type"),
+        TRIGGER_TYPES,
+        default="software",
+        default_key_error="software",
+    )
+    sync_trigger = script.settings.get("sync_trigger", None)
+    dynamic_parameter = script.dynamic_parameters[i]
+    script.properties[dynamic_parameter["gate"]][dynamic_parameter["parameter"]]["_is_triggered"] = True
+
+    dynamic_param = script.dynamic_sweeps[i].param
+    inactive_channels = [chan for chan in script.dynamic_channels if chan != dynamic_param]
+    script.initialize(inactive_dyn_channels=inactive_channels)
+    meas = Measurement(name=script.measurement_name)
+    meas.register_parameter(dynamic_param)
+    for c_param in script.active_compensating_channels:
+        meas.register_parameter(
+            c_param,
+            setpoints=[
+                dynamic_param,
+            ],
+        )
+    static_gettables = []
+    for parameter, channel in zip(script.gettable_parameters, script.gettable_channels):
+        if is_bufferable(channel) and channel not in script.static_gettable_channels:
+            meas.register_parameter(
+                channel,
+                setpoints=[
+                    dynamic_param,
+                ],
+            )
+        elif channel in script.static_gettable_channels:
+            parameter_value = script.properties[parameter["gate"]][parameter["parameter"]]["value"]
+            parameter_value = channel.get()
+            static_gettables.append((channel, np.full(int(script.buffered_num_points), parameter_value)))
+    for parameter, channel in zip(script.dynamic_parameters, script.dynamic_channels):
+        if channel != dynamic_param:
+            try:
+                parameter_value = script.properties[parameter["gate"]][parameter["parameter"]]["value"]
+            except KeyError:
+                logger.error(
+                    "An idle dynamic parameter has no value assigned\
+                      and cannot be logged!"
+                )
+                break
+            static_gettables.append((channel, np.full(int(script.buffered_num_points), parameter_value)))
+    for param in static_gettables:
+        meas.register_parameter(
+            param[0],
+            setpoints=[
+                dynamic_param,
+            ],
+        )
+    active_comping_sweeps = []
+    for j in range(len(script.active_compensating_channels)):
+        index = script.compensating_parameters.index(script.active_compensating_parameters[j])
+        active_comping_setpoints = script.compensating_parameters_values[index] + sum(
+            [sweep.get_setpoints() for sweep in script.compensating_sweeps[j]]
+        )
+        if min(active_comping_setpoints) < min(script.compensating_limits[index]) or max(
+            active_comping_setpoints
+        ) > max(script.compensating_limits[index]):
+            raise Exception(f"Setpoints of {script.compensating_parameters[index]} exceed limits!")
+        sweep_delay = script.compensating_sweeps[j][-1]._delay
+        active_comping_sweeps.append(
+            CustomSweep(
+                param=script.active_compensating_channels[j],
+                setpoints=active_comping_setpoints,
+                delay=sweep_delay,
+            )
+        )
 
-            with meas.run() as datasaver:
+    meas.write_period = 0.5
 
-                dynamic_sweep = self.dynamic_sweeps[i]
-                try:
-                    trigger_reset()
-                except TypeError:
-                    logger.info("No method to reset the trigger defined.")
-                results = []
-                self.ready_buffers()
-                try:
-                    dynamic_param.root_instrument._qumada_ramp(
-                        [dynamic_param, *self.active_compensating_channels],
-                        end_values=[
-                            dynamic_sweep.get_setpoints()[-1],
-                            *[sweep.get_setpoints()[-1] for sweep in active_comping_sweeps],
-                        ],
-                        ramp_time=self._burst_duration,
-                        sync_trigger=sync_trigger,
-                    )
-                except AttributeError as ex:
-                    logger.error(
-                        "Exception: This instrument probably does not have a \
-                          a qumada_ramp method. Buffered measurements without \
-                          ramp method are no longer supported. \
-                          Use the unbuffered script!"
-                    )
-                    raise ex
+    with meas.run() as datasaver:
 
-                if trigger_type == "manual":
-                    pass
-                if trigger_type == "hardware":
-                    try:
-                        trigger_start()
-                    except AttributeError as e:
-                        print("Please set a trigger or define a trigger_start method")
-                        raise e
+        dynamic_sweep = script.dynamic_sweeps[i]
+        try:
+            trigger_reset()
+        except TypeError:
+            logger.info("No method to reset the trigger defined.")
+        results = []
+        script.ready_buffers()
+        try:
+            dynamic_param.root_instrument._qumada_ramp(
+                [dynamic_param, *script.active_compensating_channels],
+                end_values=[
+                    dynamic_sweep.get_setpoints()[-1],
+                    *[sweep.get_setpoints()[-1] for sweep in active_comping_sweeps],
+                ],
+                ramp_time=script._burst_duration,
+                sync_trigger=sync_trigger,
+            )
+        except AttributeError as ex:
+            logger.error(
+                "Exception: This instrument probably does not have a \
+                  a qumada_ramp method. Buffered measurements without \
+                  ramp method are no longer supported. \
+                  Use the unbuffered script!"
+            )
+            raise ex
 
-                elif trigger_type == "software":
-                    for buffer in self.buffers:
-                        buffer.force_trigger()
-                    logger.warning(
-                        "You are using software trigger, which \
-                        can lead to significant delays between \
-                        measurement instruments! Only recommended \
-                        for debugging."
-                    )
-                while not all(buffer.is_finished() for buffer in list(self.buffers)):
-                    sleep(0.1)
-                try:
-                    trigger_reset()
-                except TypeError:
-                    logger.info("No method to reset the trigger defined.")
+        if trigger_type == "manual":
+            pass
+        if trigger_type == "hardware":
+            try:
+                trigger_start()
+            except AttributeError as e:
+                print("Please set a trigger or define a trigger_start method")
+                raise e
+
+        elif trigger_type == "software":
+            for buffer in script.buffers:
+                buffer.force_trigger()
+            logger.warning(
+                "You are using software trigger, which \
+                can lead to significant delays between \
+                measurement instruments! Only recommended \
+                for debugging."
+            )
+        script.wait_for_buffers()
+        try:
+            trigger_reset()
+        except TypeError:
+            logger.info("No method to reset the trigger defined.")
 
-                results = self.readout_buffers()
-                comp_results = []
-                for ch, sw in zip(self.active_compensating_channels, active_comping_sweeps):
-                    comp_results.append((ch, sw.get_setpoints()))
-                datasaver.add_result(
-                    (dynamic_param, dynamic_sweep.get_setpoints()),
-                    *comp_results,
-                    *results,
-                    *static_gettables,
-                )
-                datasets.append(datasaver.dataset)
-                self.properties[dynamic_parameter["gate"]][dynamic_parameter["parameter"]]["_is_triggered"] = False
-                self.clean_up()
-        return datasets
+        results = script.readout_buffers()
+        comp_results = []
+        for ch, sw in zip(script.active_compensating_channels, active_comping_sweeps):
+            comp_results.append((ch, sw.get_setpoints()))
+        datasaver.add_result(
+            (dynamic_param, dynamic_sweep.get_setpoints()),
+            *comp_results,
+            *results,
+            *static_gettables,
+        )
+        script.properties[dynamic_parameter["gate"]][dynamic_parameter["parameter"]]["_is_triggered"] = False
+        script.clean_up()
+    return datasaver.dataset
 
 
 class Generic_1D_Hysteresis_buffered(MeasurementScript):
@@ -731,6 +1086,8 @@ class Generic_1D_Hysteresis_buffered(MeasurementScript):
                     or the keyword "manual" when triggering is done by user. Defauls is manual.
     trigger_reset (optional): Callable to reset the trigger. Default is NONE.
     include_gate_name (optional): Appends name of ramped gates to measurement name. Default is TRUE.
+    average_iterations (optional): Store only the average and variance of all forward and of all
+                                   backward sweeps instead of each iteration. Default is False.
     """
 
     def run(self):
@@ -746,6 +1103,7 @@ class Generic_1D_Hysteresis_buffered(MeasurementScript):
         )
         include_gate_name = self.settings.get("include_gate_name", True)
         sync_trigger = self.settings.get("sync_trigger", None)
+        average_iterations = self.settings.get("average_iterations", False)
         iterations = self.settings.get("iterations", 1)
         iterations *= 2
         datasets = []
@@ -777,7 +1135,7 @@ class Generic_1D_Hysteresis_buffered(MeasurementScript):
                     del_channels.append(channel)
                     del_params.append(parameter)
                     parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                    static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
+                    static_gettables.append((channel, np.full(int(self.buffered_num_points), parameter_value)))
             for parameter, channel in zip(self.dynamic_parameters, self.dynamic_channels):
                 if channel != dynamic_param:
                     try:
@@ -788,7 +1146,7 @@ class Generic_1D_Hysteresis_buffered(MeasurementScript):
                               and cannot be logged!"
                         )
                         break
-                    static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
+                    static_gettables.append((channel, np.full(int(self.buffered_num_points), parameter_value)))
             for param in static_gettables:
                 meas.register_parameter(
                     param[0],
@@ -800,6 +1158,12 @@ class Generic_1D_Hysteresis_buffered(MeasurementScript):
                 self.gettable_channels.remove(channel)
             for param in del_params:
                 self.gettable_parameters.remove(param)
+            if average_iterations:
+                # Every buffer is read after each sweep and averaged here
+                variance_parameters = self.variance_parameters(software_averaged_only=False)
+                for variance_parameter in variance_parameters.values():
+                    meas.register_parameter(variance_parameter, setpoints=[dynamic_param])
+                averages = [RunningAverage(), RunningAverage()]
 
             try:
                 trigger_reset()
@@ -855,28 +1219,46 @@ class Generic_1D_Hysteresis_buffered(MeasurementScript):
                                         measurement instruments! Only recommended\
                                         for debugging."
                         )
-                    while not all(buffer.is_finished() for buffer in list(self.buffers)):
-                        sleep(0.1)
+                    self.wait_for_buffers()
                     try:
                         trigger_reset()
                     except TypeError:
                         logger.info("No method to reset the trigger defined.")
 
                     results = self.readout_buffers()
+                    if average_iterations:
+                        averages[iiter % 2].add(dict(results))
+                        continue
                     datasaver.add_result(
                         (dynamic_param, set_points),
                         *results,
                         *static_gettables,
                     )
+                if average_iterations:
+                    for direction, average in enumerate(averages):
+                        set_points = dynamic_sweep.get_setpoints()
+                        datasaver.add_result(
+                            (dynamic_param, set_points if direction == 0 else list(reversed(set_points))),
+                            *average.mean.items(),
+                            *((variance_parameters[param], variance) for param, variance in average.variance.items()),
+                            *static_gettables,
+                        )
                 datasets.append(datasaver.dataset)
                 self.properties[dynamic_parameter["gate"]][dynamic_parameter["parameter"]]["_is_triggered"] = False
                 self.clean_up()
         return datasets
 
 
-class Generic_2D_Sweep_buffered(MeasurementScript):
+class Generic_nD_Sweep_buffered(MeasurementScript):
     """
-    WIP Buffer measurement script
+    Buffered measurement script for n dynamic parameters. The fastest axis is ramped by
+    the instrument's hardware ramp and recorded by the buffers, one line per ramp. The
+    remaining axes are stepped in software, the slowest axis first.
+    Axes are ordered by the priority of the dynamic parameters (lowest priority is the
+    slowest axis), parameters without priority keep the order of the gate parameters,
+    so the last one is the fastest axis. Dynamic parameters of the same group are swept
+    in parallel as one axis and require the same number of setpoints. The fast axis
+    requires as many setpoints as the buffers record per line. Supports linear compensation.
     Trigger Types:
             "software": Sends a software command to each buffer and dynamic parameters
                         in order to start data acquisition and ramping. Timing
@@ -889,18 +1271,53 @@ class Generic_2D_Sweep_buffered(MeasurementScript):
             "manual"  : The trigger setup is done by the user. The measurent script will
                         just start the first ramp. Usefull for synchronized trigger outputs
                         as in the QDac.
-    trigger_start: A callable that triggers the trigger (called to start the measurement)
+    kwargs:
+        trigger_start: A callable that triggers the trigger (called to start the measurement)
                     or the keyword "manual" when triggering is done by user. Defauls is manual.
-    trigger_reset (optional): Callable to reset the trigger. Default is NONE.
-    include_gate_name (optional): Appends name of ramped gates to measurement name. Default is TRUE.
-    reset_time: Time for ramping fast param back to the start value.
-    reverse_param_order: Switch slow and fast param.
+        trigger_reset (optional): Callable to reset the trigger. Default is NONE.
+        include_gate_name (optional): Appends name of ramped gates to measurement name.
+                    Default is TRUE.
+        reset_time: Time for ramping the fast parameters back to their start values.
+        pipelined (optional): Read out and store each line in a background thread while the
+                    next line is prepared (stepped axes set, fast axis reset, settling).
+                    The data is written to the database in background. As the buffers are
+                    only re-armed after they were read, at most one line is read out while
+                    the next one is prepared. Default is FALSE.
+        async_writer (optional): Store the lines in a background thread, see DatasetWriter.
+                    Always used if pipelined is TRUE. Default is FALSE.
+        break_action (optional): What happens when a break condition of the gettables is
+                    fulfilled in a line. The whole line is checked at once after readout.
+                    "stop": No further lines are measured (default).
+                    "skip": The points of the line after the break are not stored, the
+                            next line is measured completely. As the fast axis is a
+                            hardware ramp, this does not shorten the line itself.
+                    "narrow": Subsequent lines of the same 2D plane are only ramped until
+                            the setpoint of the break (plus narrow_margin) at the same
+                            sampling rate, so they take less time. The range is not widened
+                            again before the next plane starts.
+                    The indices of the breaks are stored in the metadata of the dataset.
+        narrow_margin (optional): Fraction of the fast axis measured after the break point
+                    when using break_action "narrow". Default is 0.05.
+        start_line (optional): Index of the first line to measure, counting all lines of
+                    the stepped axes in the order they are measured. Lines before are
+                    skipped, so an interrupted measurement can be continued in a new
+                    dataset. Default is 0.
+        checkpoint_file (optional): File the progress is stored in after each line, see
+                    save_checkpoint(). An interrupted measurement is continued with
+                    resume(), appending the remaining lines to the same dataset. The range
+                    of break_action "narrow" starts from the full line again.
+                    Default is None.
+    The number of completed lines is stored as "progress" in the metadata of the dataset,
+    also if the measurement is interrupted.
     """
 
+    BREAK_ACTIONS = ["stop", "skip", "narrow"]
+    DEFAULT_NAME = "nD Sweep"
+
     def run(self):
         self.buffered = True
         TRIGGER_TYPES = ["software", "hardware", "manual"]
-        trigger_start = self.settings.get("trigger_start", "manual")  # TODO: this should be set elsewhere
+        trigger_start = self.settings.get("trigger_start", "manual")
         trigger_reset = self.settings.get("trigger_reset", None)
         trigger_type = _validate_mapping(
             self.settings.get("trigger_type"),
@@ -910,207 +1327,345 @@ class Generic_2D_Sweep_buffered(MeasurementScript):
         )
         include_gate_name = self.settings.get("include_gate_name", True)
         sync_trigger = self.settings.get("sync_trigger", None)
-        reverse_param_order = self.settings.get("reverse_param_order", False)
         reset_time = self.settings.get("reset_time", 0)
         buffer_timeout_multiplier = self.settings.get("buffer_timeout_multiplier", 20)
+        pipelined = self.settings.get("pipelined", False)
+        break_action = _validate_mapping(
+            self.settings.get("break_action"),
+            self.BREAK_ACTIONS,
+            default="stop",
+            default_key_error="stop",
+        )
+        narrow_margin = self.settings.get("narrow_margin", 0.05)
+        start_line = self.settings.get("start_line", 0)
         datasets = []
 
         self.generate_lists()
-
-        if len(self.dynamic_sweeps) != 2:
-            raise Exception("The 2D workflow takes exactly two dynamic parameters! ")
-        self.measurement_name = naming_helper(self, default_name="2D Sweep")
+        check_breaks = _interpret_line_breaks(self.break_conditions)
+        if len(self.dynamic_sweeps) < 1:
+            raise Exception("The nD workflow requires at least one dynamic parameter!")
+        axes = self._sweep_axes()
+        slow_axes, fast_axis = axes[:-1], axes[-1]
+        fast_channels = [self.dynamic_channels[i] for i in fast_axis]
+        fast_sweeps = [self.dynamic_sweeps[i] for i in fast_axis]
+        if len(fast_sweeps[0].get_setpoints()) != int(self.buffered_num_points):
+            raise Exception(
+                f"The fast axis has {len(fast_sweeps[0].get_setpoints())} setpoints, but the buffers "
+                f"record {int(self.buffered_num_points)} points per line!"
+            )
+        for i in fast_axis:
+            self.properties[self.dynamic_parameters[i]["gate"]][self.dynamic_parameters[i]["parameter"]][
+                "_is_triggered"
+            ] = True
+        self.measurement_name = naming_helper(self, default_name=self.DEFAULT_NAME)
         if include_gate_name:
             gate_names = [gate["gate"] for gate in self.dynamic_parameters]
             self.measurement_name += f" {gate_names}"
 
         meas = Measurement(name=self.measurement_name)
-
-        if reverse_param_order:
-            slow_param = self.dynamic_parameters[1]
-            slow_channel = self.dynamic_channels[1]
-            slow_sweep = self.dynamic_sweeps[1]
-            fast_param = self.dynamic_parameters[0]
-            fast_channel = self.dynamic_channels[0]
-            fast_sweep = self.dynamic_sweeps[0]
-            self.properties[self.dynamic_parameters[0]["gate"]][self.dynamic_parameters[0]["parameter"]][
-                "_is_triggered"
-            ] = True
-        else:
-            slow_param = self.dynamic_parameters[0]
-            slow_channel = self.dynamic_channels[0]
-            slow_sweep = self.dynamic_sweeps[0]
-            fast_param = self.dynamic_parameters[1]
-            fast_channel = self.dynamic_channels[1]
-            fast_sweep = self.dynamic_sweeps[1]
-            self.properties[self.dynamic_parameters[1]["gate"]][self.dynamic_parameters[1]["parameter"]][
-                "_is_triggered"
-            ] = True
-
+        setpoint_channels = [self.dynamic_channels[i] for axis in axes for i in axis]
         for dynamic_param in self.dynamic_channels:
             meas.register_parameter(dynamic_param)
-        # -------------------
         static_gettables = []
         del_channels = []
         del_params = []
         for parameter, channel in zip(self.gettable_parameters, self.gettable_channels):
             if is_bufferable(channel):
-                meas.register_parameter(
-                    channel,
-                    setpoints=[
-                        slow_channel,
-                        fast_channel,
-                    ],
-                )
+                meas.register_parameter(channel, setpoints=setpoint_channels)
             elif channel in self.static_channels:
                 del_channels.append(channel)
                 del_params.append(parameter)
-                meas.register_parameter(
-                    channel,
-                    setpoints=[
-                        slow_channel,
-                        fast_channel,
-                    ],
-                )
+                meas.register_parameter(channel, setpoints=setpoint_channels)
                 parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                static_gettables.append((channel, [parameter_value for _ in range(int(self.buffered_num_points))]))
+                static_gettables.append((channel, np.full(int(self.buffered_num_points), parameter_value)))
         for channel in del_channels:
             self.gettable_channels.remove(channel)
         for param in del_params:
             self.gettable_parameters.remove(param)
-        # --------------------------
         self.initialize()
-        # ####################Sensor compensation#####################
         for c_param in self.active_compensating_channels:
-            meas.register_parameter(
-                c_param,
-                setpoints=[
-                    slow_channel,
-                    fast_channel,
-                ],
-            )
+            meas.register_parameter(c_param, setpoints=setpoint_channels)
         try:
             trigger_reset()
         except TypeError:
             logger.info("No method to reset the trigger defined.")
-        with meas.run() as datasaver:
-            results = []
-            slow_setpoints = slow_sweep.get_setpoints()
-            for setpoint in slow_setpoints:
-                slow_channel.set(setpoint)
-                if reset_time > 0:
-                    ramp_or_set_parameter(
-                        fast_channel, fast_sweep.get_setpoints()[0], ramp_rate=None, ramp_time=reset_time
-                    )
-                else:
-                    fast_channel.set(fast_sweep.get_setpoints()[0])
-                if reset_time < slow_sweep._delay:
-                    sleep(slow_sweep._delay - reset_time)
-
-                comping_results = []
-                active_comping_sweeps = []
-                for j in range(len(self.active_compensating_channels)):
-                    index = self.compensating_parameters.index(self.active_compensating_parameters[j])
-                    active_comping_setpoints = np.array(
-                        [self.compensating_parameters_values[index] for _ in range(len(fast_sweep.get_setpoints()))],
-                        dtype=float,
-                    )
-                    try:
-                        slow_index = self.compensated_parameters[j].index(slow_param)
-                        active_comping_setpoints -= float(self.compensating_leverarms[j][slow_index]) * (
-                            float(setpoint) - float(slow_sweep.get_setpoints()[0])
-                        )
-                    except ValueError:
-                        pass
-                    try:
-                        fast_index = self.compensated_parameters[j].index(fast_param)
-                        active_comping_setpoints += self.compensating_sweeps[j][fast_index].get_setpoints()
-                    except ValueError:
-                        pass
 
-                    if min(active_comping_setpoints) < min(self.compensating_limits[index]) or max(
-                        active_comping_setpoints
-                    ) > max(self.compensating_limits[index]):
-                        raise Exception(f"Setpoints of {self.compensating_parameters[index]} exceed limits!")
-                    sweep_delay = self.compensating_sweeps[j][-1]._delay
-                    active_comping_sweeps.append(
-                        CustomSweep(
-                            param=self.active_compensating_channels[j],
-                            setpoints=active_comping_setpoints,
-                            delay=sweep_delay,
+        slow_setpoints = [self.dynamic_sweeps[axis[0]].get_setpoints() for axis in slow_axes]
+        line_indices = list(np.ndindex(*(len(setpoints) for setpoints in slow_setpoints)))
+        previous_breaks = []  # Breaks of the lines measured before resuming
+        line_breaks = []  # Index of the first point fulfilling a break condition in each line or None
+        if self._checkpoint is not None:
+            start_line = self._checkpoint["line"]
+            previous_breaks = self._checkpoint.get("line_breaks", [])
+            self._verify_checkpoint(
+                {
+                    self.dynamic_channels[i].full_name: float(self.dynamic_sweeps[i].get_setpoints()[index])
+                    for axis, index in zip(slow_axes, line_indices[start_line - 1])
+                    for i in axis
+                }
+            )
+        completed_lines = [start_line]
+
+        def process_line(line_results: tuple, results: list) -> tuple[tuple, list]:
+            break_index = check_breaks(results) if check_breaks else None
+            line_breaks.append(break_index)
+            completed_lines[0] += 1
+            if break_index is not None and break_action == "skip":
+                line_results = _truncate_results(line_results, break_index + 1)
+                results = _truncate_results(results, break_index + 1)
+            return line_results, results
+
+        def checkpoint_line(line_results: tuple, results: list) -> None:
+            self.save_checkpoint_when_stored(
+                datasaver,
+                run_id=datasaver.run_id,
+                line=completed_lines[0],
+                num_lines=len(line_indices),
+                setpoints=_line_setpoints(line_results),
+                line_breaks=previous_breaks + line_breaks,
+            )
+
+        full_line_points = len(fast_sweeps[0].get_setpoints())
+        sampling_rate = self.buffer_settings.get("sampling_rate", self.buffered_num_points / self._burst_duration)
+        # The pipeline's worker thread must not access the database itself
+        background = self.settings.get("async_writer", False) or pipelined
+        datasaver = self.dataset_writer(meas, background=background)
+        try:
+            with datasaver:
+                pipeline = (
+                    ReadoutPipeline(self, datasaver, process_results=process_line, on_stored=checkpoint_line)
+                    if pipelined
+                    else None
+                )
+                with pipeline or nullcontext():
+                    previous_index = None
+                    for line, index in enumerate(line_indices[start_line:]):
+                        if previous_index is None or index[:-1] != previous_index[:-1]:
+                            # New 2D plane, lines are measured completely again
+                            num_line_points = full_line_points
+                            line_duration = self._burst_duration
+                            line_buffer_settings = self.buffer_settings
+                            plane_start = line
+                        slow_values = self._set_slow_axes(slow_axes, index, previous_index)
+                        delays = [
+                            self.dynamic_sweeps[i]._delay
+                            for n, axis in enumerate(slow_axes)
+                            if previous_index is None or index[n] != previous_index[n]
+                            for i in axis
+                        ]
+                        previous_index = index
+                        if reset_time > 0:
+                            ramp_or_set_parameters(
+                                fast_channels,
+                                [sweep.get_setpoints()[0] for sweep in fast_sweeps],
+                                ramp_rate=None,
+                                ramp_time=reset_time,
+                            )
+                        else:
+                            for channel, sweep in zip(fast_channels, fast_sweeps):
+                                channel.set(sweep.get_setpoints()[0])
+                        if reset_time < max(delays, default=0):
+                            sleep(max(delays) - reset_time)
+                        comping_results = self._compensation_setpoints(fast_axis, slow_values, full_line_points)
+
+                        if pipeline is not None:
+                            # Buffers of the previous line have to be read before re-arming them.
+                            pipeline.wait_for_readout(timeout=buffer_timeout_multiplier * self._burst_duration)
+                        if line_breaks and line_breaks[-1] is not None:
+                            if break_action == "stop":
+                                logger.info(f"Break condition fulfilled, stopping the measurement before {index}.")
+                                break
+                            if break_action == "narrow" and len(line_breaks) > plane_start:
+                                margin = int(narrow_margin * full_line_points)
+                                num_line_points = min(num_line_points, max(line_breaks[-1] + 1 + margin, 2))
+                                line_duration = num_line_points / sampling_rate
+                                line_buffer_settings = {
+                                    key: value
+                                    for key, value in self.buffer_settings.items()
+                                    if key not in ("burst_duration", "duration", "num_bursts")
+                                }
+                                line_buffer_settings.update(num_points=num_line_points, sampling_rate=sampling_rate)
+                        self.ready_buffers(buffer_settings=line_buffer_settings)
+                        try:
+                            fast_channels[0].root_instrument._qumada_ramp(
+                                [*fast_channels, *self.active_compensating_channels],
+                                start_values=[
+                                    *[sweep.get_setpoints()[0] for sweep in fast_sweeps],
+                                    *[setpoints[0] for _, setpoints in comping_results],
+                                ],
+                                end_values=[
+                                    *[sweep.get_setpoints()[num_line_points - 1] for sweep in fast_sweeps],
+                                    *[setpoints[num_line_points - 1] for _, setpoints in comping_results],
+                                ],
+                                ramp_time=line_duration,
+                                sync_trigger=sync_trigger,
+                            )
+                        except AttributeError as ex:
+                            logger.error(
+                                "Exception: This instrument probably does not have a \
+                                  a qumada_ramp method. Buffered measurements without \
+                                  ramp method are not supported. \
+                                  Use the unbuffered script!"
+                            )
+                            raise ex
+
+                        if trigger_type == "hardware":
+                            try:
+                                trigger_start()
+                            except NameError as ex:
+                                print("Please set a trigger or define a trigger_start method")
+                                raise ex
+                        elif trigger_type == "software":
+                            for buffer in self.buffers:
+                                buffer.force_trigger()
+                            logger.warning(
+                                "You are using software trigger, which \
+                                can lead to significant delays between \
+                                measurement instruments! Only recommended\
+                                for debugging."
+                            )
+                        self.wait_for_buffers(timeout=buffer_timeout_multiplier * self._burst_duration)
+                        try:
+                            trigger_reset()
+                        except TypeError:
+                            logger.info(
+                                "No method to reset the trigger defined. \
+                                As you are sweeping several axes, this can have undesired \
+                                consequences!"
+                            )
+
+                        line_results = (
+                            *slow_values,
+                            *[(channel, sweep.get_setpoints()) for channel, sweep in zip(fast_channels, fast_sweeps)],
+                            *comping_results,
+                            *static_gettables,
                         )
-                    )
-                    comping_results.append((self.active_compensating_channels[j], active_comping_setpoints))
+                        line_results = _truncate_results(line_results, num_line_points)
+                        if pipeline is not None:
+                            pipeline.submit(*line_results)
+                        else:
+                            line_results, results = process_line(line_results, self.readout_buffers())
+                            datasaver.add_result(*line_results, *results)
+                            checkpoint_line(line_results, results)
+            self.save_checkpoint(
+                run_id=datasaver.run_id,
+                line=completed_lines[0],
+                num_lines=len(line_indices),
+                line_breaks=previous_breaks + line_breaks,
+                finished=True,
+            )
+        finally:
+            if datasaver.dataset is not None:
+                datasaver.dataset.add_metadata(
+                    "progress",
+                    json.dumps(
+                        {
+                            "start_line": start_line,
+                            "completed_lines": completed_lines[0],
+                            "num_lines": len(line_indices),
+                        }
+                    ),
+                )
+        if check_breaks:
+            datasaver.dataset.add_metadata("line_breaks", json.dumps(previous_breaks + line_breaks))
+        datasets.append(datasaver.dataset)
+        self.clean_up()
+        return datasets
 
-                self.ready_buffers()
-                try:
-                    fast_channel.root_instrument._qumada_ramp(
-                        [fast_channel, *self.active_compensating_channels],
-                        start_values=[
-                            fast_sweep.get_setpoints()[0],
-                            *[sweep.get_setpoints()[0] for sweep in active_comping_sweeps],
-                        ],
-                        end_values=[
-                            fast_sweep.get_setpoints()[-1],
-                            *[sweep.get_setpoints()[-1] for sweep in active_comping_sweeps],
-                        ],
-                        ramp_time=self._burst_duration,
-                        sync_trigger=sync_trigger,
-                    )
-                except AttributeError as ex:
-                    logger.error(
-                        "Exception: This instrument probably does not have a \
-                          a qumada_ramp method. Buffered measurements without \
-                          ramp method are no longer supported. \
-                          Use the unbuffered script!"
+    def _sweep_axes(self) -> list[list[int]]:
+        """
+        Indices of the dynamic sweeps of each axis, slowest axis first. Dynamic
+        parameters of the same group form one axis with the priority of the group.
+        """
+        axes = {}
+        priorities = {}
+        for i, parameter in enumerate(self.dynamic_parameters):
+            group = self.properties[parameter["gate"]][parameter["parameter"]].get("group")
+            key = ("group", group) if group is not None else ("parameter", i)
+            axes.setdefault(key, []).append(i)
+            priority = self.groups[group]["priority"] if group is not None else parameter.get("priority")
+            priorities[key] = float("inf") if priority is None else priority
+        for axis in axes.values():
+            if len({len(self.dynamic_sweeps[i].get_setpoints()) for i in axis}) > 1:
+                raise Exception(
+                    f"Dynamic parameters of the same group require the same number of setpoints: "
+                    f"{[self.dynamic_parameters[i] for i in axis]}"
+                )
+        return [axes[key] for key in sorted(axes, key=lambda key: priorities[key])]
+
+    def _set_slow_axes(self, slow_axes: list[list[int]], index: tuple, previous_index: tuple | None) -> list[tuple]:
+        """
+        Sets the stepped axes to the setpoints of the line index and returns (channel, setpoint)
+        tuples of all their parameters. Axes stepping forward are set directly, axes returning to
+        their first setpoint (or starting at the first line) are ramped with ramp_rate and ramp_time.
+        """
+        ramped_channels, ramp_targets, values = [], [], []
+        for n, axis in enumerate(slow_axes):
+            for i in axis:
+                channel = self.dynamic_channels[i]
+                value = self.dynamic_sweeps[i].get_setpoints()[index[n]]
+                values.append((channel, value))
+                if previous_index is None or index[n] < previous_index[n]:
+                    ramped_channels.append(channel)
+                    ramp_targets.append(value)
+                elif index[n] != previous_index[n]:
+                    channel.set(value)
+        if ramped_channels:
+            ramp_or_set_parameters(
+                ramped_channels,
+                ramp_targets,
+                ramp_rate=self.settings.get("ramp_rate", 0.3),
+                ramp_time=self.settings.get("ramp_time", 5),
+                setpoint_intervall=self.settings.get("setpoint_intervall", 0.1),
+            )
+        return values
+
+    def _compensation_setpoints(self, fast_axis: list[int], slow_values: list[tuple], num_points: int) -> list[tuple]:
+        """
+        Setpoints of the active compensating channels for the next line: The value of the
+        compensating parameter, corrected for the offset of the stepped parameters from their
+        first setpoint and for the sweep of the fast parameters.
+        """
+        current_values = dict(slow_values)
+        comping_results = []
+        for j, channel in enumerate(self.active_compensating_channels):
+            index = self.compensating_channels.index(channel)
+            setpoints = np.full(num_points, self.compensating_parameters_values[index], dtype=float)
+            for k, comped_param in enumerate(self.compensated_parameters[index]):
+                dynamic_index = self.dynamic_parameters.index(comped_param)
+                if dynamic_index in fast_axis:
+                    setpoints += self.compensating_sweeps[j][k].get_setpoints()
+                else:
+                    sweep = self.dynamic_sweeps[dynamic_index]
+                    offset = float(current_values[self.dynamic_channels[dynamic_index]]) - float(
+                        sweep.get_setpoints()[0]
                     )
-                    raise ex
+                    setpoints -= float(self.compensating_leverarms[index][k]) * offset
+            if min(setpoints) < min(self.compensating_limits[index]) or max(setpoints) > max(
+                self.compensating_limits[index]
+            ):
+                raise Exception(f"Setpoints of {self.compensating_parameters[index]} exceed limits!")
+            comping_results.append((channel, setpoints))
+        return comping_results
 
-                if trigger_type == "manual":
-                    pass
 
-                if trigger_type == "hardware":
-                    try:
-                        trigger_start()
-                    except NameError as ex:
-                        print("Please set a trigger or define a trigger_start method")
-                        raise ex
+class Generic_2D_Sweep_buffered(Generic_nD_Sweep_buffered):
+    """
+    Buffered 2D sweep: Generic_nD_Sweep_buffered with one stepped (slow) and one ramped
+    (fast) dynamic parameter. The first dynamic parameter is the slow one, priorities
+    and groups are not used. See Generic_nD_Sweep_buffered for the settings.
+    kwargs:
+        reverse_param_order (optional): Switch slow and fast param. Default is FALSE.
+    """
 
-                elif trigger_type == "software":
-                    for buffer in self.buffers:
-                        buffer.force_trigger()
-                    logger.warning(
-                        "You are using software trigger, which \
-                        can lead to significant delays between \
-                        measurement instruments! Only recommended\
-                        for debugging."
-                    )
-                timer = 0
-                while not all(buffer.is_finished() for buffer in list(self.buffers)):
-                    timer += 0.1
-                    sleep(0.1)
-                    if timer >= buffer_timeout_multiplier * self._burst_duration:
-                        raise TimeoutError
-                try:
-                    trigger_reset()
-                except TypeError:
-                    logger.info(
-                        "No method to reset the trigger defined. \
-                        As you are doing a 2D Sweep, this can have undesired \
-                        consequences!"
-                    )
+    DEFAULT_NAME = "2D Sweep"
 
-                results = self.readout_buffers()
-                datasaver.add_result(
-                    (slow_channel, setpoint),
-                    (fast_channel, fast_sweep.get_setpoints()),
-                    *comping_results,
-                    *results,
-                    *static_gettables,
-                )
-        datasets.append(datasaver.dataset)
-        self.clean_up()
-        return datasets
+    def _sweep_axes(self) -> list[list[int]]:
+        if len(self.dynamic_sweeps) != 2:
+            raise Exception("The 2D workflow takes exactly two dynamic parameters! ")
+        if self.settings.get("reverse_param_order", False):
+            return [[1], [0]]
+        return [[0], [1]]
 
 
 class Generic_Pulsed_Measurement(MeasurementScript):
@@ -1192,7 +1747,7 @@ class Generic_Pulsed_Measurement(MeasurementScript):
                     ],
                 )
                 parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                static_gettables.append((channel, [parameter_value for _ in range(self.buffered_num_points)]))
+                static_gettables.append((channel, np.full(int(self.buffered_num_points), parameter_value)))
         for channel in del_channels:
             self.gettable_channels.remove(channel)
         for param in del_params:
@@ -1267,12 +1822,7 @@ class Generic_Pulsed_Measurement(MeasurementScript):
                     measurement instruments! Only recommended\
                     for debugging."
                 )
-            timeout_timer = 0
-            while not all(buffer.is_finished() for buffer in list(self.buffers)):
-                timeout_timer += 0.1
-                sleep(0.1)
-                if timeout_timer >= buffer_timeout_multiplier * self._burst_duration:
-                    raise TimeoutError
+            self.wait_for_buffers(timeout=buffer_timeout_multiplier * self._burst_duration)
             try:
                 trigger_reset()
             except TypeError:
@@ -1312,6 +1862,9 @@ class Generic_Pulsed_Repeated_Measurement(MeasurementScript):
     trigger_reset (optional): Callable to reset the trigger. Default is NONE.
     include_gate_name (optional): Appends name of ramped gates to measurement name. Default is TRUE.
     reset_time: Time for ramping fast param back to the start value.
+    repetitions: Number of repetitions of the pulse. Only their average is stored, and the
+                 variance for buffers that average in software. Default is the buffer setting
+                 "repetitions" or 1.
     TODO: Add Time!
     """
 
@@ -1326,7 +1879,7 @@ class Generic_Pulsed_Repeated_Measurement(MeasurementScript):
             default="software",
             default_key_error="software",
         )
-        self.repetitions = self.settings.get("repetitions", 1)
+        self.repetitions = self.settings.get("repetitions", self.buffer_settings.get("repetitions", 1))
         include_gate_name = self.settings.get("include_gate_name", True)
         sync_trigger = self.settings.get("sync_trigger", None)
         datasets = []
@@ -1371,7 +1924,7 @@ class Generic_Pulsed_Repeated_Measurement(MeasurementScript):
                     ],
                 )
                 parameter_value = self.properties[parameter["gate"]][parameter["parameter"]]["value"]
-                static_gettables.append((channel, [parameter_value for _ in range(self.buffered_num_points)]))
+                static_gettables.append((channel, np.full(int(self.buffered_num_points), parameter_value)))
         for channel in del_channels:
             self.gettable_channels.remove(channel)
         for param in del_params:
@@ -1400,76 +1953,72 @@ class Generic_Pulsed_Repeated_Measurement(MeasurementScript):
                 self.compensating_limits[index]
             ):
                 raise Exception(f"Setpoints of compensating gate {self.compensating_parameters[index]} exceed limits!")
-        results = []
-        with meas.run() as datasaver:
-            for k in range(self.repetitions):
-                self.initialize()
-                try:
-                    trigger_reset()
-                except TypeError:
-                    logger.info("No method to reset the trigger defined.")
-                self.ready_buffers()
-                for instr in instruments:
-                    try:
-                        instr._qumada_pulse(
-                            parameters=[*self.dynamic_channels, *self.active_compensating_channels],
-                            setpoints=[*setpoints, *compensating_setpoints],
-                            delay=self._burst_duration / self.buffered_num_points,
-                            sync_trigger=sync_trigger,
-                        )
-                    except AttributeError as ex:
-                        logger.error(
-                            f"Exception: {instr} probably does not have a \
-                                a qumada_pulse method. Buffered measurements without \
-                                ramp method are no longer supported. \
-                                Use the unbuffered script!"
-                        )
-                        raise ex
+        variance_parameters = self.variance_parameters()
+        for variance_parameter in variance_parameters.values():
+            meas.register_parameter(variance_parameter, setpoints=[timer])
 
-                if trigger_type == "manual":
-                    logger.warning(
-                        "You are using manual triggering. If you want to pulse parameters on multiple"
-                        "instruments this can lead to delays and bad timing!"
-                    )
-
-                if trigger_type == "hardware":
-                    try:
-                        trigger_start()
-                    except NameError as ex:
-                        print("Please set a trigger or define a trigger_start method")
-                        raise ex
+        def prepare_burst():
+            self.initialize()
+            try:
+                trigger_reset()
+            except TypeError:
+                logger.info("No method to reset the trigger defined.")
 
-                elif trigger_type == "software":
-                    for buffer in self.buffers:
-                        buffer.force_trigger()
-                    logger.warning(
-                        "You are using software trigger, which \
-                        can lead to significant delays between \
-                        measurement instruments! Only recommended\
-                        for debugging."
+        def start_burst():
+            for instr in instruments:
+                try:
+                    instr._qumada_pulse(
+                        parameters=[*self.dynamic_channels, *self.active_compensating_channels],
+                        setpoints=[*setpoints, *compensating_setpoints],
+                        delay=self._burst_duration / self.buffered_num_points,
+                        sync_trigger=sync_trigger,
                     )
+                except AttributeError as ex:
+                    logger.error(
+                        f"Exception: {instr} probably does not have a \
+                            a qumada_pulse method. Buffered measurements without \
+                            ramp method are no longer supported. \
+                            Use the unbuffered script!"
+                    )
+                    raise ex
+
+            if trigger_type == "manual":
+                logger.warning(
+                    "You are using manual triggering. If you want to pulse parameters on multiple"
+                    "instruments this can lead to delays and bad timing!"
+                )
 
-                while not all(buffer.is_finished() for buffer in list(self.buffers)):
-                    sleep(0.1)
+            if trigger_type == "hardware":
                 try:
-                    trigger_reset()
-                except TypeError:
-                    logger.info("No method to reset the trigger defined.")
+                    trigger_start()
+                except NameError as ex:
+                    print("Please set a trigger or define a trigger_start method")
+                    raise ex
 
-                results.append(self.readout_buffers())
-            average_results = []
-            for i in range(len(results[0])):
-                helper_array = np.zeros(len(results[0][0][1]))
-                for meas_results in results:
-                    helper_array += meas_results[i][1]
-                helper_array /= self.repetitions
-                average_results.append((meas_results[i][0], helper_array))
+            elif trigger_type == "software":
+                for buffer in self.buffers:
+                    buffer.force_trigger()
+                logger.warning(
+                    "You are using software trigger, which \
+                    can lead to significant delays between \
+                    measurement instruments! Only recommended\
+                    for debugging."
+                )
+
+        with meas.run() as datasaver:
+            # Only the average (and variance) of the repetitions is kept
+            average_results, variances = self.acquire_averaged(start_burst, self.repetitions, prepare_burst)
+            try:
+                trigger_reset()
+            except TypeError:
+                logger.info("No method to reset the trigger defined.")
 
             datasaver.add_result(
                 (timer, time_setpoints),
                 *(zip(self.dynamic_channels, setpoints)),
                 *(zip(self.active_compensating_channels, compensating_setpoints)),
                 *average_results,
+                *variances,
                 *static_gettables,
             )
         datasets.append(datasaver.dataset)
@@ -0,0 +1,250 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+"""
+Adaptive choice of setpoints, in the style of the learners of the adaptive package.
+
+The learners refine the setpoints where the measured signal changes most. All points
+lie on the grid of setpoints of the corresponding sweep, which defines the finest
+resolution, so the adaptive measurement is a subset of the regular one. Learners are
+used in rounds: ask() returns the next batch of setpoints, the measured values are
+passed to tell() before the next call of ask().
+
+Both, setpoints and values are normalized for the losses: setpoints to the range of
+the sweep, values to the range measured so far for each channel. With several
+channels, the largest change of any channel is used.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class _GridLearner:
+    """
+    Base class of the learners, stores the measured values on the grid of setpoints.
+
+    Args:
+        setpoints (Sequence[Sequence[float]]): Setpoints of each axis.
+        num_channels (int): Number of measured values per point.
+        initial_points (int): Number of equidistant setpoints per axis measured first.
+    """
+
+    LOSSES: list[str] = ["gradient"]
+
+    def __init__(self, setpoints: Sequence[Sequence[float]], num_channels: int = 1, initial_points: int = 9):
+        self.setpoints = [np.asarray(axis, dtype=float) for axis in setpoints]
+        self.shape = tuple(len(axis) for axis in self.setpoints)
+        if min(self.shape) < 2:
+            raise ValueError("At least two setpoints per axis are required.")
+        if initial_points < 2:
+            raise ValueError("At least two initial points per axis are required.")
+        self.num_channels = num_channels
+        self.values = np.full((*self.shape, num_channels), np.nan)
+        self.measured = np.zeros(self.shape, dtype=bool)
+        self._pending: dict[tuple[float, ...], tuple[int, ...]] = {}
+        self._initial_indices = [
+            np.unique(np.linspace(0, length - 1, min(initial_points, length)).round().astype(int))
+            for length in self.shape
+        ]
+
+    @property
+    def npoints(self) -> int:
+        """Number of measured points."""
+        return int(self.measured.sum())
+
+    def tell(self, point: Sequence[float], values: Sequence[float]) -> None:
+        """Stores the values measured at a point returned by ask()."""
+        try:
+            index = self._pending.pop(tuple(point))
+        except KeyError:
+            raise ValueError(f"{tuple(point)} was not requested by ask().") from None
+        self.values[index] = values
+        self.measured[index] = True
+
+    def ask(self, n: int) -> list[tuple[float, ...]]:
+        """
+        Returns up to n setpoints, sorted by the setpoint of the first axis. The first
+        call returns all initial points. If no point is returned, the grid is completely
+        refined. All points have to be measured and passed to tell() before ask() is
+        called again.
+        """
+        if self._pending:
+            raise RuntimeError(f"{len(self._pending)} points were not measured yet.")
+        if not self.measured.any():
+            grid = np.meshgrid(*self._initial_indices, indexing="ij")
+            indices = list(zip(*(axis.ravel().tolist() for axis in grid)))
+        else:
+            indices = self._refine(n)
+        self._pending = {self._setpoint(index): index for index in sorted(set(indices))}
+        return list(self._pending)
+
+    def loss(self) -> float:
+        """
+        Largest loss of all intervals/cells, 0 if the grid is completely refined
+        and infinite if nothing was measured yet.
+        """
+        if not self.measured.any():
+            return float("inf")
+        return float(self._losses().max(initial=0))
+
+    def _setpoint(self, index: tuple[int, ...]) -> tuple[float, ...]:
+        return tuple(float(axis[i]) for axis, i in zip(self.setpoints, index))
+
+    def _scale(self) -> np.ndarray:
+        """Range of the measured values of each channel, used for normalization."""
+        scale = np.ptp(self.values[self.measured], axis=0)
+        scale[~(scale > 0)] = 1
+        return scale
+
+    def _value_changes(self, *corner_values: np.ndarray) -> np.ndarray:
+        """Largest normalized change of any channel between the corner values."""
+        stacked = np.stack(corner_values) / self._scale()
+        return (stacked.max(axis=0) - stacked.min(axis=0)).max(axis=-1)
+
+    def _losses(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def _refine(self, n: int) -> list[tuple[int, ...]]:
+        raise NotImplementedError
+
+
+class Learner1D(_GridLearner):
+    """
+    Bisects the intervals between measured setpoints with the largest loss.
+
+    Args:
+        setpoints (Sequence[float]): Setpoints of the sweep.
+        num_channels (int): Number of measured values per point.
+        initial_points (int): Number of equidistant setpoints measured first.
+        loss (str): "gradient" (default) uses the length of the interval in the
+            normalized signal plane, so steep parts are refined first. "curvature"
+            uses the area of the triangles formed with the neighbouring points,
+            so kinks and peaks are refined first, straight slopes are not.
+    """
+
+    LOSSES: list[str] = ["gradient", "curvature"]
+
+    def __init__(
+        self, setpoints: Sequence[float], num_channels: int = 1, initial_points: int = 9, loss: str = "gradient"
+    ):
+        if loss not in self.LOSSES:
+            raise ValueError(f"Loss {loss} is not supported, use one of {self.LOSSES}.")
+        super().__init__([setpoints], num_channels, initial_points)
+        self.loss_function = loss
+
+    def _intervals(self) -> tuple[np.ndarray, np.ndarray]:
+        indices = np.flatnonzero(self.measured)
+        return indices[:-1], indices[1:]
+
+    def _losses(self) -> np.ndarray:
+        start, stop = self._intervals()
+        x = np.concatenate([start, stop[-1:]]) / (self.shape[0] - 1)
+        dx = np.diff(x)
+        dy = self._value_changes(self.values[start], self.values[stop])
+        losses = np.hypot(dx, dy)
+        if self.loss_function == "curvature" and len(x) > 2:
+            # Area of the triangles of three neighbouring points, for the largest change of any channel
+            y = self.values[self.measured] / self._scale()
+            left, right = (x[1:-1] - x[:-2])[:, None], (x[2:] - x[:-2])[:, None]
+            areas = 0.5 * np.abs(left * (y[2:] - y[:-2]) - right * (y[1:-1] - y[:-2])).max(axis=-1)
+            # Mean area of the (one or two) triangles each interval is part of
+            triangles = np.zeros(len(dx))
+            counts = np.zeros(len(dx))
+            for offset in (0, 1):
+                triangles[offset : offset + len(areas)] += areas
+                counts[offset : offset + len(areas)] += 1
+            losses = np.sqrt(triangles / counts) + 0.02 * losses + 0.02 * dx
+        # Intervals between neighbouring setpoints cannot be refined further
+        losses[stop - start < 2] = 0
+        return losses
+
+    def _refine(self, n: int) -> list[tuple[int, ...]]:
+        start, stop = self._intervals()
+        losses = self._losses()
+        selected = np.argsort(losses)[::-1][:n]
+        selected = selected[losses[selected] > 0]
+        return [((start[i] + stop[i]) // 2,) for i in selected]
+
+    def ask(self, n: int) -> list[float]:
+        return [point for (point,) in super().ask(n)]
+
+    def tell(self, point: float, values: Sequence[float]) -> None:
+        super().tell((point,), values)
+
+
+class Learner2D(_GridLearner):
+    """
+    Splits the rectangular cells between measured setpoints with the largest loss
+    into four (quadtree), measuring the center and the midpoints of the edges.
+    The loss of a cell is sqrt(area * (change**2 + area)), with the largest change
+    of the signal between the corners of the cell. Cells with a strongly varying
+    signal, e.g. at charge transitions, are refined first, flat regions are only
+    refined coarsely.
+
+    Args:
+        setpoints (tuple[Sequence[float], Sequence[float]]): Setpoints of both axes.
+        num_channels (int): Number of measured values per point.
+        initial_points (int): Number of equidistant setpoints per axis measured first.
+        loss (str): Only "gradient" is supported.
+    """
+
+    def __init__(
+        self,
+        setpoints: tuple[Sequence[float], Sequence[float]],
+        num_channels: int = 1,
+        initial_points: int = 9,
+        loss: str = "gradient",
+    ):
+        if loss not in self.LOSSES:
+            raise ValueError(f"Loss {loss} is not supported, use one of {self.LOSSES}.")
+        super().__init__(setpoints, num_channels, initial_points)
+        x, y = self._initial_indices
+        grid = np.array(np.meshgrid(x[:-1], y[:-1], indexing="ij")).reshape(2, -1).T
+        grid_stop = np.array(np.meshgrid(x[1:], y[1:], indexing="ij")).reshape(2, -1).T
+        # Cells as rows of [x_start, x_stop, y_start, y_stop] indices
+        self.cells = np.column_stack([grid[:, 0], grid_stop[:, 0], grid[:, 1], grid_stop[:, 1]])
+
+    def _losses(self) -> np.ndarray:
+        x0, x1, y0, y1 = self.cells.T
+        change = self._value_changes(self.values[x0, y0], self.values[x1, y0], self.values[x0, y1], self.values[x1, y1])
+        area = (x1 - x0) / (self.shape[0] - 1) * (y1 - y0) / (self.shape[1] - 1)
+        losses = np.sqrt(area * (change**2 + area))
+        losses[(x1 - x0 < 2) & (y1 - y0 < 2)] = 0
+        return losses
+
+    def _refine(self, n: int) -> list[tuple[int, ...]]:
+        losses = self._losses()
+        indices: set[tuple[int, int]] = set()
+        split = []
+        for i in np.argsort(losses)[::-1]:
+            if len(indices) >= n or losses[i] == 0:
+                break
+            x0, x1, y0, y1 = self.cells[i]
+            xs = [x0, (x0 + x1) // 2, x1] if x1 - x0 > 1 else [x0, x1]
+            ys = [y0, (y0 + y1) // 2, y1] if y1 - y0 > 1 else [y0, y1]
+            indices.update((int(x), int(y)) for x in xs for y in ys if not self.measured[x, y])
+            split.append((i, [[xa, xb, ya, yb] for xa, xb in zip(xs, xs[1:]) for ya, yb in zip(ys, ys[1:])]))
+        if split:
+            keep = np.ones(len(self.cells), dtype=bool)
+            keep[[i for i, _ in split]] = False
+            self.cells = np.vstack([self.cells[keep], *[children for _, children in split]])
+        return list(indices)
@@ -24,7 +24,13 @@ from __future__ import annotations
 
 import logging
 import time
+from collections import defaultdict
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from math import isclose
+from typing import Any
+
+import numpy as np
 
 from qumada.utils.generate_sweeps import generate_sweep
 
@@ -112,7 +118,7 @@ def ramp_parameter(
         num_points = int(abs(current_value - float(target)) / (ramp_rate * setpoint_intervall)) + 2
         if ramp_time is not None and ramp_time < abs(current_value - float(target)) / ramp_rate:
             print(
-                f"Ramp rate of {param} is to low to reach target value in specified"
+                f"Ramp rate of {parameter} is to low to reach target value in specified"
                 "max ramp time. Adapting ramp rate to match ramp time"
             )
             return ramp_parameter(
@@ -124,7 +130,7 @@ def ramp_parameter(
                 valid_units=valid_units,
                 **kwargs,
             )
-        sweep = generate_sweep(parameter.get(), target, num_points)
+        sweep = generate_sweep(current_value, target, num_points)
         LOG.debug(f"sweep: {sweep}")
         for value in sweep:
             parameter.set(value)
@@ -151,3 +157,186 @@ def ramp_or_set_parameter(
         ramp_parameter(parameter, target, ramp_rate, ramp_time, setpoint_intervall)
     except Unsweepable_parameter:
         parameter.set(target)
+
+
+def ramp_or_set_parameters(
+    parameters: Sequence,
+    targets: Sequence,
+    ramp_rate: float | Sequence[float] | None = 0.1,
+    ramp_time: float | None = 10,
+    setpoint_intervall: float = 0.1,
+    tolerance: float = 1e-5,
+    use_hardware_ramp: bool = False,
+    max_workers: int | None = None,
+    start_values: Sequence | None = None,
+    **kwargs,
+):
+    """
+    Ramps multiple parameters simultaneously on one shared time grid, so the
+    complete ramp takes as long as the ramp of the slowest parameter.
+    Parameters with non-float values are just set. The ramp_rate and ramp_time
+    are applied as in ramp_parameter: ramp_rate is the maximum rate of each
+    parameter, ramp_time the maximum time its ramp may take. Parameters without
+    ramp_rate (None or 0) are ramped in ramp_time, parameters with ramp_rate
+    reach their target earlier if the rate allows it.
+    Parameters of different instruments are ramped by one worker thread per
+    instrument, parameters of the same instrument are set one after another.
+
+    Parameters
+    ----------
+    parameters : list of QCoDeS parameters
+        Parameters you want to ramp.
+    targets : list of float
+        Target values, one for each parameter.
+    ramp_rate : float | list of float | None, optional
+        Maximum ramp rate of the parameters, either one for all or one for each
+        parameter. The default is 0.1.
+    ramp_time : float | None, optional
+        Maximum time the ramp may take. The default is 10.
+    setpoint_intervall : float, optional
+        Time between two setpoints of the software ramp. The default is 0.1.
+    tolerance : float, optional
+        Parameters with abs(current_value - target_value) < tolerance*max(current_value, target_value)
+        are not ramped. Default 1e-5.
+    use_hardware_ramp : bool, optional
+        Use the _qumada_ramp method of the instruments' mappings, if available.
+        The hardware ramps of different instruments run in parallel to the software ramp
+        of the remaining parameters. Only use this with instruments whose ramps start
+        without trigger. Parameters are ramped in software if the hardware ramp fails.
+        The default is False.
+    max_workers : int | None, optional
+        Maximum number of instruments that are ramped at the same time. Further
+        instruments are ramped once another instrument has finished. None ramps
+        all instruments at once. The default is None.
+    start_values : list | None, optional
+        Current values of the parameters, if they were already read. Otherwise
+        each parameter is read once. The default is None.
+
+    Returns
+    -------
+    BOOL
+        True if all parameters reached their target, False if the ramp could not be done.
+    """
+    assert len(parameters) == len(targets)
+    ramp_rates = np.broadcast_to(np.nan if ramp_rate is None else ramp_rate, len(parameters))
+    current_values = [None] * len(parameters) if start_values is None else list(start_values)
+    assert len(current_values) == len(parameters)
+    ramped_parameters = []
+    start_values = []
+    end_values = []
+    rates = []
+    for parameter, target, rate, current_value in zip(parameters, targets, ramp_rates, current_values):
+        if parameter._settable is False:
+            LOG.warning(f"{parameter} is not _settable and cannot be ramped!")
+            continue
+        if current_value is None:
+            current_value = parameter.get()
+        if not isinstance(current_value, float):
+            parameter.set(target)
+        elif not isclose(current_value, target, rel_tol=tolerance):
+            ramped_parameters.append(parameter)
+            start_values.append(current_value)
+            end_values.append(float(target))
+            rates.append(rate)
+    if not ramped_parameters:
+        return True
+
+    distances = np.abs(np.array(end_values) - np.array(start_values))
+    rates = np.array(rates, dtype=float)
+    has_rate = np.isfinite(rates) & (rates > 0)
+    if not np.all(has_rate) and not ramp_time:
+        print("Please specify either ramp_time or ramp_speed")
+        return False
+    # Parameters with a ramp rate take the time they need at this rate (at most ramp_time),
+    # the others take ramp_time. The complete ramp takes as long as the slowest parameter.
+    durations = np.full(len(ramped_parameters), np.nan if ramp_time is None else float(ramp_time))
+    rate_durations = distances[has_rate] / rates[has_rate]
+    durations[has_rate] = rate_durations if ramp_time is None else np.minimum(rate_durations, ramp_time)
+    duration = float(np.max(durations))
+    LOG.debug(f"Ramping {ramped_parameters} to {end_values} in {durations} s")
+
+    start = time.perf_counter()
+    if use_hardware_ramp:
+        hardware_ramped = _start_hardware_ramps(ramped_parameters, start_values, end_values, durations)
+        ramped_parameters, start_values, end_values, durations = (
+            [item for i, item in enumerate(items) if i not in hardware_ramped]
+            for items in (ramped_parameters, start_values, end_values, durations)
+        )
+    if ramped_parameters:
+        num_points = int(duration / setpoint_intervall) + 2
+        # Each parameter reaches its target after its own duration and is kept there
+        times = np.linspace(0, duration, num_points)[:, np.newaxis]
+        durations = np.array(durations)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            progress = np.where(durations > 0, np.clip(times / durations, 0, 1), 1)
+        setpoints = np.array(start_values) + (np.array(end_values) - np.array(start_values)) * progress
+        instrument_indices = _group_by_instrument(ramped_parameters)
+        if len(instrument_indices) == 1:
+            _run_software_ramp(ramped_parameters, setpoints.tolist(), setpoint_intervall)
+        else:
+            with ThreadPoolExecutor(
+                max_workers=max_workers or len(instrument_indices), thread_name_prefix="qumada-ramp"
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _run_software_ramp,
+                        [ramped_parameters[i] for i in indices],
+                        setpoints[:, indices].tolist(),
+                        setpoint_intervall,
+                    )
+                    for indices in instrument_indices.values()
+                ]
+            for future in futures:
+                future.result()
+    remaining_time = start + duration - time.perf_counter()
+    if use_hardware_ramp and remaining_time > 0:
+        time.sleep(remaining_time)
+    return True
+
+
+def _start_hardware_ramps(parameters: list, start_values: list, end_values: list, durations: Sequence) -> set[int]:
+    """
+    Starts the hardware ramps of all instruments with _qumada_ramp method. The ramp of
+    an instrument takes the longest duration of its parameters.
+    Returns the indices of the parameters that are ramped by hardware.
+    """
+    hardware_ramped = set()
+    for instrument, indices in _group_by_instrument(parameters).items():
+        if not hasattr(instrument, "_qumada_ramp"):
+            continue
+        try:
+            instrument._qumada_ramp(
+                [parameters[i] for i in indices],
+                start_values=[start_values[i] for i in indices],
+                end_values=[end_values[i] for i in indices],
+                ramp_time=float(max(durations[i] for i in indices)),
+            )
+        except Exception as ex:
+            LOG.warning(f"Hardware ramp of {instrument.name} failed, ramping in software instead: {ex}")
+            continue
+        hardware_ramped.update(indices)
+    return hardware_ramped
+
+
+def _group_by_instrument(parameters: list) -> dict[Any, list[int]]:
+    """
+    Returns the indices of the parameters grouped by their root instrument.
+    """
+    instrument_indices = defaultdict(list)
+    for i, parameter in enumerate(parameters):
+        instrument_indices[parameter.root_instrument].append(i)
+    return instrument_indices
+
+
+def _run_software_ramp(parameters: list, setpoints: list[list[float]], setpoint_intervall: float):
+    """
+    Sets all parameters to the setpoints of each step. Steps are scheduled relative to
+    the start of the ramp, so the time for setting the parameters does not add up.
+    """
+    start = time.perf_counter()
+    for step, values in enumerate(setpoints, 1):
+        for parameter, value in zip(parameters, values):
+            parameter.set(value)
+        delay = start + step * setpoint_intervall - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,105 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+from __future__ import annotations
+
+import math
+from collections.abc import Callable, Iterator
+from time import perf_counter, sleep
+
+
+class FixedRateScheduler:
+    """
+    Deadline based scheduling of periodic measurements.
+
+    Iterating yields the index of each sample at start + index * interval. The deadlines
+    are fixed relative to the start, so the time spent in the loop body does not add up
+    as with sleep(interval). If the loop body takes longer than the interval, deadlines
+    are missed and handled according to the policy:
+
+    - "skip": Missed deadlines are skipped, the next sample is taken at the next
+      deadline in the future. The sampling rate stays fixed, but samples are missing.
+    - "catch_up": Missed samples are taken immediately one after another until the
+      schedule is met again. No samples are missing, but they are not equidistant.
+
+    Args:
+        interval (float): Time between two samples in s.
+        duration (float | None): Samples are taken until duration has passed.
+            Runs forever if None.
+        policy (str): Handling of missed deadlines, "skip" (default) or "catch_up".
+        clock (Callable): Clock used for the deadlines. Default time.perf_counter.
+        sleep (Callable): Function used for waiting. Default time.sleep.
+
+    Attributes:
+        missed_deadlines (int): Number of deadlines, that could not be met.
+            These samples were skipped or taken late, depending on the policy.
+        max_delay (float): Maximum delay of a sample after its deadline in s.
+    """
+
+    POLICIES: list[str] = ["skip", "catch_up"]
+
+    def __init__(
+        self,
+        interval: float,
+        duration: float | None = None,
+        policy: str = "skip",
+        clock: Callable[[], float] = perf_counter,
+        sleep: Callable[[float], None] = sleep,
+    ):
+        if interval <= 0:
+            raise ValueError("The interval has to be positive.")
+        if policy not in self.POLICIES:
+            raise ValueError(f"Policy {policy} is not supported, use one of {self.POLICIES}.")
+        self.interval = interval
+        self.duration = duration
+        self.policy = policy
+        self._clock = clock
+        self._sleep = sleep
+        self.missed_deadlines = 0
+        self.max_delay = 0.0
+
+    def __iter__(self) -> Iterator[int]:
+        self.missed_deadlines = 0
+        self.max_delay = 0.0
+        start = self._clock()
+        index = 0
+        while self.duration is None or index * self.interval < self.duration:
+            delay = self._clock() - (start + index * self.interval)
+            if delay < 0:
+                self._sleep(-delay)
+            elif delay >= self.interval:
+                # The deadline was missed by more than one interval
+                if self.policy == "skip":
+                    skipped = math.floor(delay / self.interval)
+                    self.missed_deadlines += skipped
+                    index += skipped
+                    if self.duration is not None and index * self.interval >= self.duration:
+                        break
+                    continue
+                self.missed_deadlines += 1
+            self.max_delay = max(self.max_delay, delay)
+            yield index
+            index += 1
+
+    def report(self) -> str:
+        """Returns a summary of the missed deadlines."""
+        return (
+            f"Missed {self.missed_deadlines} deadlines with an interval of {self.interval} s "
+            f"(policy {self.policy}), maximum delay {self.max_delay:.3g} s."
+        )
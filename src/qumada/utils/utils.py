@@ -41,6 +41,18 @@ def flatten_array(lst) -> list:
     return results
 
 
+def ravel_array(data) -> np.ndarray:
+    """
+    Returns data as flat numpy array.
+    Contiguous arrays are returned as view without copying, lists are converted once.
+    Falls back to flatten_array for nested sequences of different lengths.
+    """
+    try:
+        return np.ravel(np.asarray(data))
+    except ValueError:
+        return np.asarray(flatten_array(data))
+
+
 # %%
 
 
@@ -0,0 +1,71 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+
+# pylint: disable=missing-function-docstring
+import numpy as np
+import pytest
+
+from qumada.utils.adaptive_sampling import Learner1D, Learner2D
+
+
+def run_learner(learner, function, loss_goal, batch_size=5):
+    while learner.loss() > loss_goal:
+        points = learner.ask(batch_size)
+        if not points:
+            break
+        for point in points:
+            learner.tell(point, [function(point)])
+
+
+@pytest.mark.parametrize("loss", Learner1D.LOSSES)
+def test_learner_1d_refines_step(loss):
+    setpoints = np.linspace(-1, 1, 1001)
+    learner = Learner1D(setpoints, loss=loss)
+
+    run_learner(learner, lambda x: np.tanh((x - 0.3) / 0.01), loss_goal=0.02)
+
+    measured = setpoints[learner.measured]
+    assert learner.npoints < 200
+    # Full resolution at the step, coarse elsewhere
+    assert np.diff(measured).min() == pytest.approx(0.002)
+    assert np.diff(measured[measured < 0]).min() > 0.01
+    assert np.abs(measured - 0.3).min() < 0.002
+
+
+def test_learner_2d_refines_edge():
+    setpoints = np.linspace(0, 1, 101)
+    learner = Learner2D((setpoints, setpoints))
+
+    run_learner(learner, lambda point: float(point[0] + point[1] > 1), loss_goal=0.01, batch_size=20)
+
+    assert learner.loss() <= 0.01 and learner.npoints < 101**2 / 4
+    x, y = np.nonzero(learner.measured)
+    # Most points are close to the edge x + y = 1
+    assert np.mean(np.abs(x + y - 100) < 10) > 0.5
+
+
+def test_learner_rejects_unrequested_points():
+    learner = Learner1D(np.linspace(0, 1, 11), initial_points=3)
+
+    assert learner.ask(5) == [0.0, 0.5, 1.0]
+    with pytest.raises(RuntimeError):
+        learner.ask(5)
+    with pytest.raises(ValueError):
+        learner.tell(0.1, [0])
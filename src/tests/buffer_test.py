@@ -0,0 +1,71 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+
+# pylint: disable=missing-function-docstring
+import numpy as np
+import pytest
+from pytest_mock import MockerFixture
+
+from qumada.instrument.buffers import Buffer, RunningAverage
+
+
+@pytest.fixture(name="polled_buffer")
+def fixture_polled_buffer(mocker: MockerFixture):
+    mocker.patch.multiple(Buffer, __abstractmethods__=set())
+    buffer = Buffer()
+    buffer.is_finished = mocker.Mock()
+    return buffer
+
+
+def test_wait_finished_polls_with_backoff(mocker: MockerFixture, polled_buffer):
+    polled_buffer.is_finished.side_effect = [False, False, False, True]
+    sleep = mocker.patch("qumada.instrument.buffers.buffer.sleep")
+
+    assert polled_buffer.wait_finished(min_interval=0.01, max_interval=0.03)
+    assert [call.args[0] for call in sleep.call_args_list] == [0.01, 0.02, 0.03]
+
+
+def test_wait_finished_timeout(polled_buffer):
+    polled_buffer.is_finished.return_value = False
+
+    assert not polled_buffer.wait_finished(timeout=0.01)
+
+
+def test_wait_repetitions(polled_buffer, mocker: MockerFixture):
+    polled_buffer.is_finished.return_value = False
+    polled_buffer.num_acquired_repetitions = mocker.Mock(side_effect=[0, 1, 1, 2])
+    mocker.patch("qumada.instrument.buffers.buffer.sleep")
+
+    assert polled_buffer.wait_repetitions(2)
+    assert polled_buffer.num_acquired_repetitions.call_count == 4
+
+    polled_buffer.num_acquired_repetitions = mocker.Mock(return_value=2)
+    assert not polled_buffer.wait_repetitions(3, timeout=0.01)
+
+
+def test_running_average():
+    bursts = np.random.default_rng(0).normal(size=(5, 10))
+    average = RunningAverage()
+    for burst in bursts:
+        average.add({"signal": burst})
+
+    assert average.count == 5
+    assert np.allclose(average.mean["signal"], bursts.mean(axis=0))
+    assert np.allclose(average.variance["signal"], bursts.var(axis=0, ddof=1))
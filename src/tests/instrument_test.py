@@ -19,11 +19,26 @@
 
 
 # pylint: disable=missing-function-docstring
+import threading
+from time import perf_counter
+
+import numpy as np
 import pytest
 from qcodes.instrument import Instrument, VisaInstrument
 from qcodes.parameters import Parameter
 from qcodes.tests.instrument_mocks import DummyInstrument
 
+from qumada.instrument.custom_drivers.Dummies.device_simulator import (
+    ChargeStability,
+    CoulombPeaks,
+    DeviceSimulator,
+    PinchOff,
+)
+from qumada.instrument.custom_drivers.Dummies.dummy_dac import (
+    DummyDac,
+    DummyDac_Channel,
+)
+from qumada.instrument.custom_drivers.Dummies.dummy_dmm import DummyDmm, RingBuffer
 from qumada.instrument.instrument import is_instrument_class
 
 
@@ -43,3 +58,132 @@ def test_is_instrument(cls, expected: bool):
 def test_mfli_driver():
     MFLI = pytest.importorskip("qumada.instrument.custom_drivers.ZI.MFLI")
     assert is_instrument_class(MFLI.MFLI)
+
+
+def test_dummy_dac_pulse_timing():
+    dac = DummyDac("timing_dac", trigger_event=threading.Event())
+    points = []
+    dac.ch01.voltage.set_parser = lambda value: points.append((perf_counter(), value)) or value
+    setpoints = np.linspace(0, 1, 1000)
+    try:
+        dac.force_trigger()
+        dac._run_triggered_pulse_channels([dac.ch01, dac.ch02], [setpoints, np.zeros(1000)], 0.1)
+        assert dac.ch01.voltage() == 1
+    finally:
+        dac.close()
+
+    times, values = np.transpose(points)
+    assert list(values) == list(setpoints)
+    assert np.all(np.diff(times) > 0)
+    # The last setpoint is played 0.0999 s after the start, the first one right after
+    # the start. Delays of the test machine (e.g. garbage collection) only add time.
+    assert 0.099 < times[-1] - times[0] < 1
+
+
+def test_dummy_dac_voltage_history(monkeypatch, caplog):
+    monkeypatch.setattr(DummyDac_Channel, "HISTORY_LENGTH", 4)
+    dac = DummyDac("history_dac", trigger_event=threading.Event())
+    try:
+        channel = dac.ch01
+        times = []
+        for value in range(1, 7):
+            channel.voltage.set(value)
+            times.append(perf_counter())
+        # Only the last four voltage changes are remembered, the ring has wrapped around
+        voltages = channel.voltage_at(np.array(times[2:]))
+        assert list(voltages) == [3, 4, 5, 6]
+        assert not caplog.records
+        assert list(channel.voltage_at(np.array([perf_counter()]))) == [6]
+
+        assert channel.voltage_at(np.array([times[0]]))[0] == 3
+        assert "older than the history" in caplog.text
+    finally:
+        dac.close()
+
+
+def test_dummy_dmm_burst():
+    dmm = DummyDmm("burst_dmm", trigger_event=threading.Event())
+    try:
+        dmm.buffer_SR(100000)
+        dmm.buffer_n_points(10000)
+        dmm.buffer.subscribe(dmm.voltage)
+        dmm.buffer.subscribe(dmm.current)
+        dmm.buffer.ready_buffer()
+        dmm.buffer.start()
+        dmm._force_trigger()
+        assert dmm.buffer.finished_event.wait(timeout=1)
+        voltage, current = dmm.buffer.get()
+    finally:
+        dmm.close()
+
+    assert voltage.shape == current.shape == (10000,)
+    assert voltage[0] == 0 and np.all((current >= 0) & (current < 1))
+
+
+def test_device_simulator():
+    dac = DummyDac("simulated_dac", trigger_event=threading.Event())
+    dmm = DummyDmm("simulated_dmm", trigger_event=threading.Event())
+    try:
+        dac.ch01.voltage(0.2)
+        before = perf_counter()
+        dac.ch01.voltage(1.0)
+        model = PinchOff({"P1": 1.0, "B1": 0.5}, threshold=1.0, width=0.1)
+        dmm.simulate("current", DeviceSimulator(model, gates={"P1": dac.ch01, "B1": dac.ch02.voltage}))
+
+        assert dmm.current() == pytest.approx(0.5)
+        expected = model({"P1": np.array([0.2, 1.0]), "B1": 0})
+        assert dmm.current.get_burst(np.array([before, perf_counter()])) == pytest.approx(expected)
+    finally:
+        dac.close()
+        dmm.close()
+
+
+def test_charge_stability_occupations():
+    model = ChargeStability(
+        CoulombPeaks({"S": 1.0}, spacing=0.1, width=0.01),
+        lever_arms={"P1": [1.0, 0.2], "P2": [0.2, 1.0]},
+        coupling=[0.02, 0.01],
+    )
+
+    occupations = model.occupations({"S": np.zeros(3), "P1": np.array([0.5, 1.5, 2.5]), "P2": np.zeros(3)})
+
+    assert occupations.tolist() == [[0, 1, 2], [0, 0, 0]]
+
+
+def test_ring_buffer_overflow():
+    buffer = RingBuffer(capacity=4, num_channels=1)
+    buffer.write(np.arange(3), [np.arange(3) * 10])
+    assert buffer.read(max_samples=2)[:, 1].tolist() == [0, 10]
+
+    buffer.write(np.arange(3, 9), [np.arange(3, 9) * 10])
+
+    assert len(buffer) == 4 and buffer.lost_samples == 3
+    assert buffer.read().tolist() == [[t, t * 10] for t in range(5, 9)]
+    assert len(buffer) == 0
+
+
+def test_dummy_dmm_streaming():
+    dmm = DummyDmm("streaming_dmm", trigger_event=threading.Event())
+    try:
+        dmm.buffer_SR(10000)
+        dmm.buffer_capacity(1000)
+        dmm.buffer_continuous(True)
+        dmm.buffer.subscribe(dmm.current)
+        dmm.buffer.ready_buffer()
+        dmm.buffer.start()
+        dmm._force_trigger()
+        timestamps = []
+        deadline = perf_counter() + 0.5
+        while perf_counter() < deadline:
+            timestamps.append(dmm.buffer.read()["timestamps"])
+        dmm.stop()
+        assert dmm.buffer.finished_event.wait(timeout=1)
+        timestamps.append(dmm.buffer.read()["timestamps"])
+        assert dmm.buffer.lost_samples == 0
+    finally:
+        dmm.close()
+
+    timestamps = np.concatenate(timestamps)
+    # Streamed more samples than the buffer holds, without losing any
+    assert len(timestamps) > 4000
+    assert np.allclose(np.diff(timestamps), 1e-4)
@@ -396,3 +396,34 @@ def test_mapping_gui_map_automatically(mocker, qtbot, station_with_instruments,
     assert w.isVisible()
     qtbot.keyPress(w, Qt.Key_E)
     assert not w.isVisible()
+
+
+def test_parameter_index(dac, station_with_instruments):
+    index = mapping.get_parameter_index(dac)
+    assert mapping.get_parameter_index(dac) is index
+    assert mapping.filter_flatten_parameters(
+        station_with_instruments.components
+    ) == mapping.base._filter_flatten_parameters(station_with_instruments.components)
+    voltages = mapping.find_parameters(station_with_instruments.components, root_instrument=dac, mapping="voltage")
+    assert voltages and all(parameter.root_instrument is dac for parameter in voltages.values())
+
+    dac.add_parameter("index_test_parameter", set_cmd=None)
+    try:
+        assert "dac_index_test_parameter" not in mapping.get_parameter_index(dac)
+        mapping.invalidate_parameter_index(dac)
+        assert "dac_index_test_parameter" in mapping.get_parameter_index(dac)
+    finally:
+        del dac.parameters["index_test_parameter"]
+        mapping.invalidate_parameter_index(dac)
+    assert "dac_index_test_parameter" not in mapping.get_parameter_index(dac)
+
+
+def test_map_gates_to_instruments(
+    mocker: MockerFixture, station_with_instruments, unmapped_terminal_parameters, mapped_terminal_parameters
+):
+    mocker.patch("builtins.input", side_effect=["0", "1", "2", "2"])
+    mocker.patch("builtins.print")
+
+    mapping.map_gates_to_instruments(station_with_instruments.components, unmapped_terminal_parameters)
+
+    assert unmapped_terminal_parameters == mapped_terminal_parameters
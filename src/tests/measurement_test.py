@@ -0,0 +1,582 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+
+# pylint: disable=missing-function-docstring
+import json
+import threading
+from collections import Counter
+
+import numpy as np
+import pytest
+from pytest_mock import MockerFixture
+from qcodes.dataset import (
+    Measurement,
+    initialise_or_create_database_at,
+    load_by_id,
+    load_or_create_experiment,
+)
+from qcodes.instrument_drivers.mock_instruments import DummyInstrument
+from qcodes.parameters import ManualParameter
+
+from qumada.instrument.buffered_instruments import BufferedDummyDMM
+from qumada.instrument.buffers.buffer import map_buffers
+from qumada.instrument.custom_drivers.Dummies.dummy_dac import DummyDac
+from qumada.instrument.custom_drivers.Dummies.dummy_dmm import DummyDmm
+from qumada.instrument.mapping import DUMMY_DMM_MAPPING, add_mapping_to_instrument
+from qumada.instrument.mapping.Dummies.DummyDac import DummyDacMapping
+from qumada.measurement.doNd_enhanced.doNd_enhanced import (
+    BreakConditions,
+    _interpret_breaks,
+    _interpret_line_breaks,
+    do1d_parallel,
+    do1d_parallel_asym,
+)
+from qumada.measurement.measurement import (
+    DatasetWriter,
+    ReadoutPipeline,
+    ResumedMeasurement,
+)
+from qumada.measurement.scripts import (
+    Generic_1D_Sweep,
+    Generic_2D_Sweep_buffered,
+    Generic_nD_Sweep_buffered,
+)
+from qumada.measurement.scripts.generic_measurement import _parameter_reader
+
+
+def test_readout_pipeline_stores_lines_in_order(mocker: MockerFixture):
+    script = mocker.Mock()
+    script.readout_buffers.side_effect = [[("buffered", [i, i])] for i in range(3)]
+    datasaver = mocker.Mock()
+
+    with ReadoutPipeline(script, datasaver, maxsize=1) as pipeline:
+        for i in range(3):
+            pipeline.wait_for_readout(timeout=1)
+            pipeline.submit(("slow", i))
+
+    assert script.readout_buffers.call_count == 3
+    assert [call.args for call in datasaver.add_result.call_args_list] == [
+        (("slow", i), ("buffered", [i, i])) for i in range(3)
+    ]
+
+
+def test_readout_pipeline_reraises_worker_exception(mocker: MockerFixture):
+    script = mocker.Mock()
+    script.readout_buffers.side_effect = RuntimeError("readout failed")
+    datasaver = mocker.Mock()
+
+    with pytest.raises(RuntimeError, match="readout failed"):
+        with ReadoutPipeline(script, datasaver) as pipeline:
+            pipeline.submit(("slow", 0))
+            pipeline.wait_for_readout(timeout=1)
+    datasaver.add_result.assert_not_called()
+
+
+def test_interpret_line_breaks(mocker: MockerFixture):
+    current, voltage, other = mocker.Mock(), mocker.Mock(), mocker.Mock()
+    check_line = _interpret_line_breaks(
+        [
+            {"channel": current, "break_condition": "val > 1e-9"},
+            {"channel": voltage, "break_condition": "val < -1"},
+        ]
+    )
+
+    assert _interpret_line_breaks([]) is None
+    assert check_line([(current, np.zeros(5)), (voltage, np.zeros(5))]) is None
+    assert check_line([(current, [0, 0, 0, 2e-9, 3e-9]), (voltage, [0, 0, -2, 0, 0])]) == 2
+    assert check_line([(other, np.ones(5)), (current, [0, 2e-9, 0])]) == 1
+
+
+@pytest.mark.parametrize(
+    "condition,expected",
+    [
+        ("val > 4", 5),
+        ("mean 3 >= 4", 5),
+        ("diff 2 >= 3", 5),
+        ("grad 1 < 0", 6),
+        ("mean 20 > 0", None),
+    ],
+)
+def test_break_conditions(mocker: MockerFixture, condition: str, expected):
+    channel = mocker.Mock()
+    data = [0, 1, 2, 3, 4, 6, 5, 5]
+    conditions = BreakConditions([{"channel": channel, "break_condition": condition}])
+
+    # Point by point from the cache, as in dond, and on the whole trace give the same result
+    first_break = None
+    for i, value in enumerate(data):
+        channel.cache.get.return_value = value
+        if conditions():
+            first_break = i
+            break
+    assert first_break == expected
+    assert conditions.check_line([(channel, data)]) == expected
+    channel.get.assert_not_called()
+
+
+def test_break_conditions_start_over_for_each_line(mocker: MockerFixture):
+    channel, outer = mocker.Mock(), mocker.Mock()
+    conditions = BreakConditions([{"channel": channel, "break_condition": "diff 1 < -5"}], outer_parameters=[outer])
+
+    # Falls from 10 to 0 between the lines, which must not trigger the break
+    fulfilled = []
+    for line, values in enumerate([[0, 5, 10], [0, 5, 10]]):
+        outer.cache.get.return_value = line
+        for value in values:
+            channel.cache.get.return_value = value
+            fulfilled.append(conditions())
+    assert not any(fulfilled)
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_readout_buffers(mocker: MockerFixture, concurrent: bool):
+    script = Generic_1D_Sweep()
+    script.settings = {"concurrent_readout": concurrent}
+    buffers = []
+    for name in ("lockin", "dmm"):
+        parameter = mocker.Mock()
+        parameter.name = name
+        buffer = mocker.Mock()
+        buffer._subscribed_parameters = [parameter]
+        buffer.read.return_value = {name: [1.0, 2.0], "timestamps": [0.0, 0.1]}
+        buffers.append(buffer)
+    script.buffers = set(buffers)
+
+    results = script.readout_buffers()
+
+    assert {param.name: list(data) for param, data in results} == {"lockin": [1.0, 2.0], "dmm": [1.0, 2.0]}
+    for buffer in buffers:
+        buffer.stop.assert_called_once()
+
+
+def test_estimate_durations(mocker: MockerFixture):
+    script = Generic_1D_Sweep()
+    script.settings = {}
+    script._burst_duration = 0.5
+    script.buffered_num_points = 10
+    sweep = mocker.Mock(delay=0.01)
+    sweep.get_setpoints.return_value = np.linspace(0, 1, 10)
+    channels = [mocker.Mock(), mocker.Mock()]
+    script.gettable_channels = channels
+    script.static_gettable_channels = []
+
+    script.settings = {"point_durations": {channels[0].full_name: 0.02}, "readout_duration": 0.1}
+    estimates = script.estimate_durations(sweep, channels)
+
+    # Estimating does not touch the instruments
+    sweep.param.set.assert_not_called()
+    assert not any(channel.get.called for channel in channels)
+    assert estimates["buffered"] == pytest.approx(0.5 + 2 * 0.1)
+    assert estimates["stepped"] == pytest.approx(10 * (0.01 + script.POINT_DURATION + 0.02 + script.POINT_DURATION))
+    assert estimates["threaded"] >= 10 * (0.01 + 0.02 + script.THREAD_OVERHEAD)
+
+    script.settings["probe_durations"] = True
+    script.estimate_durations(sweep, channels)
+    script.estimate_durations(sweep, channels)
+    assert sweep.param.set.call_count == 1 and channels[1].get.call_count == 1
+
+    channels[1].gettable = False
+    assert script.estimate_durations(sweep, channels)["stepped"] is None
+    channels[1].gettable = True
+    script.settings["point_durations"][channels[1].root_instrument.name] = None
+    assert script.estimate_durations(sweep, channels)["threaded"] is None
+
+    del sweep.param.root_instrument._qumada_ramp
+    assert script.estimate_durations(sweep, channels)["buffered"] is None
+
+
+def test_read_available_buffers(mocker: MockerFixture):
+    script = Generic_1D_Sweep()
+    buffers = []
+    for name, chunks in (("fast", [3, 2]), ("slow", [1, 4])):
+        parameter = mocker.Mock()
+        parameter.name = name
+        buffer = mocker.Mock()
+        buffer._subscribed_parameters = [parameter]
+        buffer.read_available.side_effect = [{name: np.ones(n), "timestamps": np.arange(n)} for n in chunks]
+        buffers.append(buffer)
+    script.buffers = buffers
+
+    first = script.read_available_buffers(timestamps=True)
+    second = script.read_available_buffers(timestamps=True)
+
+    # Only points available from all buffers are returned, the rest in the next call
+    assert [len(data) for _, data in first[:-1]] == [1, 1] and len(first[-1]) == 1
+    assert [len(data) for _, data in second[:-1]] == [4, 4]
+
+
+def test_acquire_averaged(mocker: MockerFixture):
+    script = Generic_1D_Sweep()
+    script.buffer_settings = {}
+    script.trigger_ins = set()
+    parameter = mocker.Mock(full_name="dmm_voltage", label="voltage", unit="V")
+    parameter.name = "voltage"
+    buffer = mocker.Mock(HARDWARE_AVERAGING=False, _subscribed_parameters=[parameter])
+    buffer.read.side_effect = [{"voltage": [i, 2 * i], "timestamps": [0, 1]} for i in range(4)]
+    script.buffers = {buffer}
+    start_burst = mocker.Mock()
+
+    (result,), (variance,) = script.acquire_averaged(start_burst, repetitions=4)
+
+    assert start_burst.call_count == buffer.start.call_count == 4
+    assert result[0] is parameter and list(result[1]) == [1.5, 3.0]
+    assert variance[0].name == "dmm_voltage_variance" and variance[1][0] == pytest.approx(np.var(range(4), ddof=1))
+    assert script.buffer_settings == {}
+
+
+def test_acquire_averaged_waits_for_hardware_averaged_bursts(mocker: MockerFixture):
+    script = Generic_1D_Sweep()
+    script.buffer_settings = {}
+    script.trigger_ins = set()
+    parameter = mocker.Mock()
+    parameter.name = "voltage"
+    events = mocker.Mock()
+    buffer = mocker.Mock(HARDWARE_AVERAGING=True, _subscribed_parameters=[parameter])
+    buffer.read.return_value = {"voltage": [1, 2], "timestamps": [0, 1]}
+    buffer.num_acquired_repetitions.return_value = 0
+    buffer.wait_repetitions = events.wait_repetitions
+    script.buffers = {buffer}
+    sleep = mocker.patch("qumada.measurement.measurement.sleep")
+
+    script.acquire_averaged(events.start_burst, repetitions=3, prepare_burst=events.prepare_burst)
+
+    # Each burst is acquired before the next one is prepared
+    assert [name for name, *_ in events.mock_calls] == ["prepare_burst", "start_burst", "wait_repetitions"] * 3
+    assert [call.args for call in events.wait_repetitions.call_args_list] == [(1,), (2,), (3,)]
+    sleep.assert_not_called()
+
+
+def test_dataset_writer_batches_points(mocker: MockerFixture):
+    measurement = mocker.MagicMock()
+    datasaver = measurement.run.return_value.__enter__.return_value
+    writing, release = threading.Event(), threading.Event()
+    writer_threads = set()
+
+    def add_result(*results):
+        writer_threads.add(threading.current_thread().name)
+        writing.set()
+        release.wait(timeout=1)
+
+    datasaver.add_result.side_effect = add_result
+    timer, signal = mocker.Mock(), mocker.Mock()
+
+    with DatasetWriter(measurement, maxsize=10) as writer:
+        writer.add_result((timer, 0), (signal, 0))
+        writing.wait(timeout=1)
+        # Queued while the writer is busy, so they are written as one batch
+        for i in range(1, 5):
+            writer.add_result((timer, i), (signal, 2 * i))
+        writer.add_result((timer, 5), (signal, [1, 2]))
+        release.set()
+
+    assert writer_threads == {"qumada-writer"}
+    calls = [call.args for call in datasaver.add_result.call_args_list]
+    assert len(calls) == 3
+    assert [list(values) for _, values in calls[1]] == [[1, 2, 3, 4], [2, 4, 6, 8]]
+    assert calls[2] == ((timer, 5), (signal, [1, 2]))
+    measurement.run.return_value.__exit__.assert_called_once()
+
+
+@pytest.mark.parametrize("background", [True, False])
+def test_dataset_writer_calls_back_when_stored(tmp_path, background: bool):
+    initialise_or_create_database_at(tmp_path / "stored.db")
+    load_or_create_experiment("stored", "dummy")
+    x, y = ManualParameter("x"), ManualParameter("y")
+    meas = Measurement()
+    meas.register_parameter(x)
+    meas.register_parameter(y, setpoints=[x])
+    meas.write_period = 1000
+    stored = []
+
+    with DatasetWriter(meas, background=background) as writer:
+        for i in range(3):
+            writer.add_result((x, i), (y, i))
+        # The results are in the database when the callback is called, despite the write_period
+        writer.call_when_stored(lambda: stored.append(list(load_by_id(writer.run_id).get_parameter_data()["y"]["y"])))
+        writer.add_result((x, 3), (y, 3))
+
+    assert stored == [[0, 1, 2]]
+
+
+def test_parameter_reader_reads_instruments_in_parallel():
+    instruments = [DummyInstrument(f"reader_dac{i}", gates=["ch01", "ch02"]) for i in range(2)]
+    # Both instruments have to be read at the same time to pass the barrier
+    barrier = threading.Barrier(2, timeout=1)
+    try:
+        channels = [instrument.parameters[name] for instrument in instruments for name in ("ch01", "ch02")]
+        for instrument in instruments:
+            instrument.ch01.get_parser = lambda value: (barrier.wait(), value)[1]
+        with _parameter_reader(channels) as read_channels:
+            results = read_channels()
+    finally:
+        for instrument in instruments:
+            instrument.close()
+
+    assert [channel for channel, _ in results] == channels
+
+
+@pytest.mark.filterwarnings("ignore:Break condition was met")
+@pytest.mark.parametrize("backsweep", [False, True])
+def test_do1d_parallel_reads_each_parameter_once_per_point(tmp_path, backsweep: bool):
+    initialise_or_create_database_at(tmp_path / "benchmark.db")
+    load_or_create_experiment("benchmark", "dummy")
+    dac = DummyDac("benchmark_dac")
+    dmms = [DummyDmm(f"benchmark_dmm{i}") for i in range(2)]
+    instrument_calls = Counter()
+    points = []
+    try:
+        for parameter in (dmms[0].current, dmms[1].current, dac.ch02.voltage):
+            parameter.get_parser = lambda value, name=parameter.full_name: instrument_calls.update([name]) or value
+        dataset, _, _ = do1d_parallel(
+            dmms[0].current,
+            dmms[1].current,
+            param_set=[dac.ch01.voltage, dac.ch02.voltage],
+            setpoints=np.linspace(0, 1, 20),
+            delay=0,
+            break_condition=_interpret_breaks([{"channel": dac.ch02.voltage, "break_condition": "val >= 0.5"}]),
+            backsweep_after_break=backsweep,
+            point_callback=points.append,
+            do_plot=False,
+            show_progress=False,
+        )
+    finally:
+        dac.close()
+        for dmm in dmms:
+            dmm.close()
+
+    num_points = len(dataset.get_parameter_data()["benchmark_dmm0_current"]["benchmark_dmm0_current"])
+    assert num_points == len(points) == (22 if backsweep else 11)
+    # One instrument call per measured parameter and point, shared by dataset, break condition and callback
+    assert instrument_calls == {name: num_points for name in instrument_calls} and len(instrument_calls) == 3
+
+
+def test_do1d_parallel_asym_waits_once_per_point(tmp_path):
+    initialise_or_create_database_at(tmp_path / "settle.db")
+    load_or_create_experiment("settle", "dummy")
+    dacs = [DummyDac(f"settle_dac{i}") for i in range(2)]
+    dmm = DummyDmm("settle_dmm")
+    steps = []
+
+    def settle_model(parameter, step):
+        steps.append((parameter.full_name, step))
+        return 0.01 * step
+
+    try:
+        gates = [dac.ch01.voltage for dac in dacs] + [dac.ch02.voltage for dac in dacs]
+        dataset, _, _ = do1d_parallel_asym(
+            dmm.current,
+            param_set=gates,
+            setpoints=[np.linspace(0, i + 1, 5) for i in range(len(gates))],
+            delay=1,
+            settle_mode="single",
+            settle_model=settle_model,
+            do_plot=False,
+            show_progress=False,
+        )
+    finally:
+        dmm.close()
+        for dac in dacs:
+            dac.close()
+
+    assert len(steps) == 5 * len(gates)
+    # Only the largest settle time of all gates is waited, once per point
+    effective_delay = json.loads(dataset.metadata["effective_delay"])
+    assert effective_delay["settle_mode"] == "single"
+    assert effective_delay["max"] == pytest.approx(0.01)
+    assert effective_delay["total"] == pytest.approx(0.04)
+
+
+def test_do1d_parallel_asym_records_per_parameter_waits(tmp_path):
+    initialise_or_create_database_at(tmp_path / "per_parameter.db")
+    load_or_create_experiment("per_parameter", "dummy")
+    dac = DummyDac("per_parameter_dac")
+    dmm = DummyDmm("per_parameter_dmm")
+    try:
+        gates = [dac.ch01.voltage, dac.ch02.voltage]
+        dataset, _, _ = do1d_parallel_asym(
+            dmm.current,
+            param_set=gates,
+            setpoints=[np.linspace(0, 1, 3)] * 2,
+            delay=0.002,
+            do_plot=False,
+            show_progress=False,
+        )
+        assert gates[0].post_delay == 0
+    finally:
+        dmm.close()
+        dac.close()
+
+    # delay after each gate plus the post_delay of the first gate
+    effective_delay = json.loads(dataset.metadata["effective_delay"])
+    assert effective_delay["max"] == pytest.approx(0.006)
+    assert effective_delay["total"] == pytest.approx(3 * 0.006)
+
+
+def test_nd_sweep_buffered_axes(mocker: MockerFixture):
+    script = Generic_nD_Sweep_buffered()
+    gates = ["field", "plunger", "barrier", "sensor"]
+    script.dynamic_parameters = [{"gate": gate, "parameter": "voltage"} for gate in gates]
+    script.properties = {gate: {"voltage": {}} for gate in gates}
+    script.properties["plunger"]["voltage"]["group"] = script.properties["sensor"]["voltage"]["group"] = "line"
+    script.groups = {"line": {"priority": 2}}
+    script.dynamic_parameters[0]["priority"] = 1
+    script.dynamic_sweeps = [mocker.Mock(**{"get_setpoints.return_value": np.zeros(n)}) for n in (3, 50, 4, 50)]
+
+    # Ungrouped parameters without priority are swept last, the last one is the fastest axis
+    assert script._sweep_axes() == [[0], [1, 3], [2]]
+
+    script.dynamic_sweeps[3].get_setpoints.return_value = np.zeros(10)
+    with pytest.raises(Exception, match="same number of setpoints"):
+        script._sweep_axes()
+
+    script = Generic_2D_Sweep_buffered()
+    script.settings = {"reverse_param_order": True}
+    script.dynamic_sweeps = [mocker.Mock(), mocker.Mock()]
+    assert script._sweep_axes() == [[1], [0]]
+
+
+def test_checkpoint_and_resume(tmp_path, mocker: MockerFixture):
+    checkpoint_file = tmp_path / "checkpoint.json"
+    script = Generic_1D_Sweep()
+    script.settings = {"checkpoint_file": str(checkpoint_file), "break_action": "skip", "trigger_start": print}
+    script.save_checkpoint(run_id=3, line=5, setpoints={"dac_ch01_voltage": 0.5})
+
+    checkpoint = json.loads(checkpoint_file.read_text())
+    # Settings that cannot be stored, like trigger methods, are skipped
+    assert checkpoint["settings"] == {"checkpoint_file": str(checkpoint_file), "break_action": "skip"}
+    assert checkpoint["script"] == "Generic_1D_Sweep" and checkpoint["line"] == 5
+
+    resumed = Generic_1D_Sweep()
+    resumed.settings = {"break_action": "stop", "trigger_start": print}
+    resumed.run = mocker.Mock(side_effect=lambda: resumed._checkpoint["line"])
+    assert resumed.resume(str(checkpoint_file)) == 5
+    assert resumed.settings["break_action"] == "skip" and resumed.settings["trigger_start"] is print
+    assert resumed._checkpoint is None
+
+    with pytest.raises(Exception, match="created by Generic_1D_Sweep"):
+        Generic_nD_Sweep_buffered().resume(str(checkpoint_file))
+
+
+@pytest.mark.parametrize("script_class", [Generic_2D_Sweep_buffered, Generic_nD_Sweep_buffered])
+def test_resume_after_last_line(tmp_path, mocker: MockerFixture, script_class):
+    initialise_or_create_database_at(tmp_path / "last_line.db")
+    load_or_create_experiment("last_line", "dummy")
+    checkpoint_file = tmp_path / "checkpoint.json"
+    trigger = threading.Event()
+    dmm = BufferedDummyDMM("last_line_dmm", trigger_event=trigger)
+    dac = DummyDac("last_line_dac", trigger_event=trigger)
+    add_mapping_to_instrument(dmm, mapping=DUMMY_DMM_MAPPING)
+    add_mapping_to_instrument(dac, mapping=DummyDacMapping())
+    parameters = {
+        "dmm": {"voltage": {"type": "gettable"}},
+        "g1": {"voltage": {"type": "dynamic", "setpoints": np.linspace(0, 1, 3), "value": 0}},
+        "g2": {"voltage": {"type": "dynamic", "setpoints": np.linspace(0, 1, 10), "value": 0}},
+    }
+    metadata_kwargs = {"insert_metadata_into_db": False}
+
+    def make_script():
+        script = script_class()
+        script.setup(
+            parameters,
+            None,
+            add_script_to_metadata=False,
+            add_parameters_to_metadata=False,
+            buffer_settings={"sampling_rate": 500, "num_points": 10, "delay": 0},
+            trigger_type="hardware",
+            trigger_start=trigger.set,
+            trigger_reset=trigger.clear,
+            checkpoint_file=str(checkpoint_file),
+            ramp_rate=10,
+        )
+        script.gate_parameters["dmm"]["voltage"] = dmm.voltage
+        script.gate_parameters["g1"]["voltage"] = dac.ch01.voltage
+        script.gate_parameters["g2"]["voltage"] = dac.ch02.voltage
+        map_buffers({"dmm": dmm, "dac": dac}, script.properties, script.gate_parameters, overwrite_trigger=1)
+        return script
+
+    try:
+        script = make_script()
+        # As if the process died after storing the last line, before the measurement finished
+        save_checkpoint = script.save_checkpoint
+
+        def die_when_finished(**state):
+            if state.get("finished"):
+                raise KeyboardInterrupt
+            save_checkpoint(**state)
+
+        mocker.patch.object(script, "save_checkpoint", side_effect=die_when_finished)
+        with pytest.raises(KeyboardInterrupt):
+            script.run(**metadata_kwargs)
+        checkpoint = json.loads(checkpoint_file.read_text())
+        assert checkpoint["line"] == 3 and "finished" not in checkpoint
+
+        resumed = make_script().resume(**metadata_kwargs)[0]
+    finally:
+        dmm.close()
+        dac.close()
+
+    assert resumed.run_id == checkpoint["run_id"] and resumed.completed
+    assert len(resumed.get_parameter_data()["last_line_dmm_voltage"]["last_line_dmm_voltage"]) == 30
+    assert json.loads(checkpoint_file.read_text())["finished"]
+    assert json.loads(resumed.metadata["progress"]) == {"start_line": 3, "completed_lines": 3, "num_lines": 3}
+
+
+def test_resumed_measurement_appends_to_dataset(tmp_path):
+    initialise_or_create_database_at(tmp_path / "resume.db")
+    load_or_create_experiment("resume", "dummy")
+    x, y = ManualParameter("x"), ManualParameter("y")
+    meas = Measurement()
+    meas.register_parameter(x)
+    meas.register_parameter(y, setpoints=[x])
+    with meas.run() as datasaver:
+        datasaver.add_result((x, 0), (y, 1))
+    run_id = datasaver.run_id
+
+    with DatasetWriter(ResumedMeasurement(run_id)) as writer:
+        writer.add_result((x, 1), (y, 2))
+
+    dataset = load_by_id(run_id)
+    assert dataset.completed
+    assert list(dataset.get_parameter_data()["y"]["y"]) == [1, 2]
+
+
+def test_resumed_measurement_completes_crashed_run(tmp_path):
+    initialise_or_create_database_at(tmp_path / "crashed.db")
+    load_or_create_experiment("crashed", "dummy")
+    x, y = ManualParameter("x"), ManualParameter("y")
+    meas = Measurement()
+    meas.register_parameter(x)
+    meas.register_parameter(y, setpoints=[x])
+    # The run is never exited, as if the process died during the measurement
+    datasaver = meas.run().__enter__()
+    datasaver.add_result((x, 0), (y, 1))
+    datasaver.flush_data_to_database(block=True)
+    run_id = datasaver.run_id
+    assert not load_by_id(run_id).completed
+
+    with pytest.raises(TypeError, match="write_in_background"):
+        with ResumedMeasurement(run_id).run(write_in_background=True):
+            pass
+    with DatasetWriter(ResumedMeasurement(run_id)) as writer:
+        writer.add_result((x, 1), (y, 2))
+
+    dataset = load_by_id(run_id)
+    assert dataset.completed
+    assert list(dataset.get_parameter_data()["y"]["y"]) == [1, 2]
@@ -0,0 +1,113 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+
+# pylint: disable=missing-function-docstring
+import threading
+
+from qcodes.instrument_drivers.mock_instruments import DummyInstrument
+from qcodes.parameters import Parameter
+
+from qumada.measurement.device_object import QumadaDevice
+from qumada.utils.ramp_parameter import ramp_or_set_parameters
+
+
+def test_ramp_or_set_parameters_shared_time_grid():
+    first = Parameter("first", set_cmd=None, initial_value=0.0)
+    second = Parameter("second", set_cmd=None, initial_value=1.0)
+    switch = Parameter("switch", set_cmd=None, initial_value="off")
+    setpoints = []
+    first.set_parser = lambda value: setpoints.append(value) or value
+
+    assert ramp_or_set_parameters(
+        [first, second, switch], [0.5, 0.0, "on"], ramp_rate=10, ramp_time=1, setpoint_intervall=0.01
+    )
+
+    assert first() == 0.5 and second() == 0.0 and switch() == "on"
+    # Both parameters share the grid of the longer ramp (0.1 s)
+    assert len(setpoints) == 12
+    assert setpoints == sorted(setpoints)
+
+
+def test_ramp_or_set_parameters_rate_and_time():
+    rated = Parameter("rated", set_cmd=None, initial_value=0.0)
+    timed = Parameter("timed", set_cmd=None, initial_value=0.0)
+    rated_setpoints, timed_setpoints = [], []
+    rated.set_parser = lambda value: rated_setpoints.append(value) or value
+    timed.set_parser = lambda value: timed_setpoints.append(value) or value
+
+    assert ramp_or_set_parameters(
+        [rated, timed], [0.1, 0.1], ramp_rate=[1, None], ramp_time=0.5, setpoint_intervall=0.01
+    )
+
+    assert rated() == 0.1 and timed() == 0.1
+    # The rated parameter reaches its target after 0.1 s, the other one after ramp_time
+    assert len(timed_setpoints) == 52
+    assert rated_setpoints[11] == 0.1 and timed_setpoints[11] < 0.1
+    assert timed_setpoints == sorted(timed_setpoints)
+
+
+def test_ramp_or_set_parameters_one_worker_per_instrument():
+    first = DummyInstrument("first_dac", gates=["ch01", "ch02"])
+    second = DummyInstrument("second_dac", gates=["ch01"])
+    threads = {}
+
+    def record_thread(name):
+        def parser(value):
+            threads[name] = threading.current_thread().name
+            return value
+
+        return parser
+
+    try:
+        for parameter in (first.ch01, first.ch02, second.ch01):
+            parameter.set(0.0)
+            parameter.set_parser = record_thread(parameter.full_name)
+        ramp_or_set_parameters(
+            [first.ch01, first.ch02, second.ch01], [0.1, 0.1, 0.1], ramp_rate=[10, 10, 1], setpoint_intervall=0.01
+        )
+    finally:
+        first.close()
+        second.close()
+
+    assert threads["first_dac_ch01"] == threads["first_dac_ch02"] != threads["second_dac_ch01"]
+
+
+def test_device_ramp_skips_broken_parameters():
+    device = QumadaDevice.create_from_dict(
+        {"gate": {"voltage": {"type": "static", "value": 0.5}}, "broken": {"voltage": {"type": "static", "value": 0.3}}}
+    )
+    gate = Parameter("gate", set_cmd=None, initial_value=0.0)
+
+    def get_broken():
+        raise NotImplementedError("Cannot be read")
+
+    device.terminals["gate"].terminal_parameters["voltage"].instrument_parameter = gate
+    device.terminals["broken"].terminal_parameters["voltage"].instrument_parameter = Parameter(
+        "broken", set_cmd=None, get_cmd=get_broken
+    )
+
+    reads = []
+    gate.get = lambda: reads.append(gate.cache.get()) or gate.cache.get()
+
+    device.set_stored_values(ramp=True, ramp_rate=10)
+
+    # The value read to check the parameter is used as start value of the ramp
+    assert reads == [0.0]
+    assert gate.cache.get() == 0.5
@@ -0,0 +1,57 @@
+# Copyright (c) 2023 JARA Institute for Quantum Information
+#
+# This file is part of QuMADA.
+#
+# QuMADA is free software: you can redistribute it and/or modify it under the
+# terms of the GNU General Public License as published by the Free Software
+# Foundation, either version 3 of the License, or (at your option) any later
+# version.
+#
+# QuMADA is distributed in the hope that it will be useful, but WITHOUT ANY
+# WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR
+# A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License along with
+# QuMADA. If not, see <https://www.gnu.org/licenses/>.
+#
+# Contributors:
+# - Till Huckeman
+
+
+# pylint: disable=missing-function-docstring
+import pytest
+
+from qumada.utils.scheduler import FixedRateScheduler
+
+
+class FakeClock:
+    """Clock that only advances when sleeping or working."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, duration):
+        self.now += duration
+
+
+@pytest.mark.parametrize(
+    "policy,expected_indices,expected_missed",
+    [("skip", [0, 1, 4, 5, 6, 7, 8, 9], 2), ("catch_up", list(range(10)), 2)],
+)
+def test_fixed_rate_scheduler(policy, expected_indices, expected_missed):
+    clock = FakeClock()
+    scheduler = FixedRateScheduler(0.1, duration=1.0, policy=policy, clock=clock, sleep=clock.sleep)
+    indices, times = [], []
+    for index in scheduler:
+        indices.append(index)
+        times.append(clock.now)
+        # Work takes a fraction of the interval, once it blocks for 0.35 s
+        clock.sleep(0.35 if index == 1 else 0.01)
+
+    assert indices == expected_indices
+    assert scheduler.missed_deadlines == expected_missed
+    # The sampling does not drift
+    assert times[-1] == pytest.approx(0.9)